@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -84,14 +85,35 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+USE_GIS = os.environ.get('USE_GIS', '0') == '1'
+# 공간(GIS) 필드를 쓸 때만 1. GIS 백엔드는 워커가 뜰 때마다 GDAL/GEOS를 읽고 메모리를 더 씀
+# 모델에 공간 필드가 있는데 0이면 시스템 체크(core/checks.py)가 알려줌
+
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 0))
+# 0이 아니면 프로세스마다 연결 풀을 씀 (core/db/backends/mysql). 스레드/async 워커용
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.contrib.gis.db.backends.mysql',
+        'ENGINE': 'core.db.backends.gis_mysql' if USE_GIS else 'core.db.backends.mysql',
+        # django.db.backends.mysql(USE_GIS면 GIS 백엔드) + 연결 확인/풀/통계
         'HOST': 'host.docker.internal',
         # 'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PW'),
+        'CONN_MAX_AGE': 0 if DB_POOL_SIZE else int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        # 요청마다 연결(인증)을 새로 하지 않고 스레드마다 이 시간(초) 동안 다시 씀.
+        # 풀을 쓰면 0: 요청이 끝나면 풀에 돌려줌
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1',
+        # 들고 있던 연결을 요청에서 처음 쓰기 전에 확인 (끊긴 연결로 500이 나지 않게)
+        'OPTIONS': {
+            'pool': {
+                'size': DB_POOL_SIZE,
+                'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+                'max_idle': int(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+                # MySQL wait_timeout(기본 8시간)보다 짧게
+            },
+        } if DB_POOL_SIZE else {},
     }
 }
 
@@ -143,6 +165,9 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
 ]
 
+DEFAULT_FILE_STORAGE = 'core.storage.ContentAddressedStorage'
+# 업로드 파일 이름을 내용의 해시로 정해서 같은 사진은 한 번만 저장 (core/storage.py)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -152,7 +177,107 @@ AUTH_USER_MODEL = 'core.User' # core폴더의 User모델을 사용하겠다고 
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',   
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        # JSONRenderer와 같은 응답을 orjson으로 (큰 목록에서 빠름)
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 50))
+# 목록 api 한 페이지 기본 개수 (?page_size=로 바꿀 수 있음)
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 500))
+# ?page_size= 로 요청할 수 있는 최대 개수
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
 }
+# 기본은 프로세스별 메모리 캐시. 여러 프로세스로 띄울 때는 memcached 등 공용 캐시로 설정
+# 예: CACHE_BACKEND=django.core.cache.backends.memcached.PyMemcacheCache CACHE_LOCATION=memcached:11211
+# (docker-compose는 memcached 서비스를 씀)
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 1))
+# 서버 프로세스 수. gunicorn.conf.py가 정한 값을 넘겨줌 (runserver는 1)
+# 2 이상인데 캐시가 프로세스별 메모리면 시스템 체크(core.E002)가 막음: 캐시 무효화가 다른 워커에 안 감
+
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi')
+# gunicorn.conf.py와 같은 값. wsgi(app.wsgi) 또는 asgi(app.asgi)
+RECIPE_ASYNC_VIEWS = os.environ.get('RECIPE_ASYNC_VIEWS', '0') == '1'
+# 1이면 asgi에서 레시피 목록/상세, 테그/재료 목록을 async 뷰로 (recipe/async_views.py).
+# 쿼리가 느릴 때(20ms 이상)만 이득이고 그 외에는 sync 뷰보다 느려서 기본은 끔
+RECIPE_ASYNC_THREADS = int(os.environ.get('RECIPE_ASYNC_THREADS', DB_POOL_SIZE or 8))
+# async 뷰의 DB 조회/직렬화를 실행하는 워커당 스레드 수 = 워커 하나가 동시에 처리하는 요청 수.
+# 스레드마다 DB 연결을 쓰므로 기본은 연결 풀 크기 (풀이 작으면 스레드가 연결을 기다림)
+
+RECIPE_CACHE = 'default'
+RECIPE_CACHE_TIMEOUT = int(os.environ.get('RECIPE_CACHE_TIMEOUT', 300))
+# 레시피 목록/상세 응답을 캐시할 시간(초). 데이터가 바뀌면 시간과 상관없이 무효화됨
+
+RECIPE_BULK_MAX_ITEMS = int(os.environ.get('RECIPE_BULK_MAX_ITEMS', 1000))
+# /recipes/bulk/ 한 요청에 보낼 수 있는 레시피 수
+
+RECIPE_SYNC_OVERLAP = int(os.environ.get('RECIPE_SYNC_OVERLAP', 60))
+# /recipes/changes/의 토큰은 이 시간(초)보다 최근 변경 앞에서 멈춤. 가장 긴 쓰기 트랜잭션보다 길게
+RECIPE_SYNC_RETENTION_DAYS = int(os.environ.get('RECIPE_SYNC_RETENTION_DAYS', 30))
+# 변경 기록 보관 기간(일). prune_recipe_changes가 정리하고, 이보다 오래된 토큰은 410
+
+RECIPE_FACET_INDEX = os.environ.get('RECIPE_FACET_INDEX', '1') == '1'
+# 테그/재료 필터에 유저별 비트맵 인덱스(recipe/facets.py)를 사용할지
+RECIPE_FACET_INDEX_TTL = int(os.environ.get('RECIPE_FACET_INDEX_TTL', 3600))
+# 비트맵 인덱스를 메모리/캐시에 두는 시간(초). 지나면 DB에서 다시 만듦
+RECIPE_FACET_MAX_IDS = int(os.environ.get('RECIPE_FACET_MAX_IDS', 1000))
+# 비트맵으로 찾은 레시피가 이보다 많으면 id 목록 대신 SQL(EXISTS) 필터를 사용
+
+RECIPE_IMAGE_PROCESSING = os.environ.get('RECIPE_IMAGE_PROCESSING', 'process')
+# 업로드된 사진 처리 방식 (recipe/images.py). 'process', 'thread', 'sync'
+RECIPE_IMAGE_WORKERS = int(os.environ.get(
+    'RECIPE_IMAGE_WORKERS', max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY)))
+# 서버 프로세스마다 사진 처리 프로세스 수. 서버 전체로는 WEB_CONCURRENCY * 이 값만큼 Pillow 프로세스가
+# 사진을 통째로 메모리에 올리므로 기본은 CPU 수를 서버 프로세스끼리 나눈 값 (최소 1)
+RECIPE_IMAGE_WIDTHS = (320, 640, 1280)
+# 축소본 너비 (원본보다 크게 늘리지는 않음)
+RECIPE_IMAGE_FORMATS = ('webp', 'jpeg')
+# 축소본 형식. Pillow가 저장할 수 없는 형식(libwebp가 없을 때의 webp)은 건너뜀
+RECIPE_IMAGE_MAX_UPLOAD_SIZE = int(os.environ.get('RECIPE_IMAGE_MAX_UPLOAD_SIZE', 20 * 1024 * 1024))
+# 업로드 사진의 최대 크기(바이트)
+RECIPE_IMAGE_UPLOAD_CHUNK_SIZE = int(os.environ.get('RECIPE_IMAGE_UPLOAD_CHUNK_SIZE', 4 * 1024 * 1024))
+# 나눠서 올릴 때(/recipes/{id}/uploads/) 조각 하나의 최대 크기(바이트)
+RECIPE_IMAGE_UPLOAD_EXPIRY = int(os.environ.get('RECIPE_IMAGE_UPLOAD_EXPIRY', 24 * 60 * 60))
+# 이 시간(초) 동안 조각이 오지 않은 업로드는 gc_recipe_images가 지움
+RECIPE_IMAGE_MAX_PIXELS = 50_000_000
+# 이보다 픽셀이 많은 사진은 거부 (압축 폭탄 방지)
+RECIPE_IMAGE_GC_GRACE = int(os.environ.get('RECIPE_IMAGE_GC_GRACE', 300))
+# 쓰는 레시피가 없는 사진 파일이라도 저장/재사용된지 이 시간(초)이 안 지났으면 지우지 않음
+RECIPE_IMAGE_REQUEUE_AFTER = int(os.environ.get('RECIPE_IMAGE_REQUEUE_AFTER', 600))
+# 이 시간(초)보다 오래 pending인 사진은 작업을 잃어버린 것으로 보고 다시 처리 (워커 시작, gc_recipe_images)
+RECIPE_IMAGE_SERVE_WIDTHS = (80, 160, 320, 480, 640, 960, 1280, 1920)
+# /recipes/{id}/image/?w= 로 요청할 수 있는 너비. 다른 값은 이 중 가까운 큰 값으로 맞춤
+RECIPE_THUMBNAIL_WIDTH = 320
+# 목록의 thumbnail 너비
+RECIPE_RENDITION_CACHE_DIR = os.environ.get(
+    'RECIPE_RENDITION_CACHE_DIR',
+    os.path.join(tempfile.gettempdir(), 'recipe-renditions'),
+)
+RECIPE_RENDITION_CACHE_MAX_BYTES = int(
+    os.environ.get('RECIPE_RENDITION_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+# 요청할 때 만든 축소본을 저장하는 디렉토리와 최대 크기. 넘으면 오래 안 쓴 것부터 지움
+
+AUTH_TOKEN_CACHE_SIZE = int(os.environ.get('AUTH_TOKEN_CACHE_SIZE', 10000))
+AUTH_TOKEN_CACHE_TTL = int(os.environ.get('AUTH_TOKEN_CACHE_TTL', 60))
+# 토큰 인증 결과를 프로세스 메모리에 몇개, 몇초 동안 캐시할지
+AUTH_TOKEN_SHARED_CACHE = os.environ.get('AUTH_TOKEN_SHARED_CACHE')
+AUTH_TOKEN_SHARED_CACHE_TTL = int(os.environ.get('AUTH_TOKEN_SHARED_CACHE_TTL', 300))
+# 여러 프로세스가 같이 쓰는 캐시(CACHES의 alias, 예: 'default'). 비워두면 사용안함
 
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
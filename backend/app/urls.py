@@ -5,8 +5,11 @@ from drf_spectacular.views import (
 from django.contrib import admin
 from django.urls import path, include
 from django.conf.urls.static import static
+from django.contrib.staticfiles.urls import staticfiles_urlpatterns
 from django.conf import settings
 
+from core.views import DatabaseStatsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
@@ -17,6 +20,7 @@ urlpatterns = [
     ),
     path('api/user/', include('user.urls')),
     path('api/recipe/', include('recipe.urls')),
+    path('api/health/db/', DatabaseStatsView.as_view(), name='health-db'),
 ]
 
 if settings.DEBUG:
@@ -24,4 +28,5 @@ if settings.DEBUG:
         settings.MEDIA_URL,
         document_root = settings.MEDIA_ROOT,
     )
-    
\ No newline at end of file
+    urlpatterns += staticfiles_urlpatterns()
+    # runserver가 하던 정적 파일(/static_backend/) 서빙. gunicorn으로 띄워도 관리자 화면이 깨지지 않게
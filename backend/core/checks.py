@@ -0,0 +1,57 @@
+"""
+settings.USE_GIS가 모델과 맞는지, 여러 프로세스로 띄울 때 캐시를 같이 쓰는지 확인하는 시스템 체크.
+공간 필드 클래스는 django.contrib.gis에 있으므로, GIS를 import 하지 않고 필드의 모듈 이름으로 찾음
+"""
+from django.apps import apps
+from django.conf import settings
+from django.core import checks
+
+
+def spatial_fields():
+    return [
+        f'{model._meta.label}.{field.name}'
+        for model in apps.get_models()
+        for field in model._meta.get_fields()
+        if type(field).__module__.startswith('django.contrib.gis.')
+    ]
+
+
+@checks.register(checks.Tags.database)
+def check_use_gis(app_configs, **kwargs):
+    fields = spatial_fields()
+    if fields and not settings.USE_GIS:
+        return [checks.Error(
+            f'Spatial fields ({", ".join(fields)}) need the GIS database backend.',
+            hint='Set USE_GIS=1 and build the image with --build-arg USE_GIS=1 (GDAL).',
+            id='core.E001',
+        )]
+    if settings.USE_GIS and not fields:
+        return [checks.Warning(
+            'USE_GIS is on but no model has a spatial field.',
+            hint='Set USE_GIS=0 so workers start without loading GDAL/GEOS.',
+            id='core.W001',
+        )]
+    return []
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    레시피 응답 캐시, 토큰 캐시, 검색/필터 인덱스의 버전은 캐시로 다른 워커에 무효화를 알리므로
+    프로세스별 메모리 캐시로는 다른 워커가 오래된 데이터를 계속 보냄
+    """
+    if settings.WEB_CONCURRENCY <= 1:
+        return []
+    local = [
+        alias for alias, config in settings.CACHES.items()
+        if config['BACKEND'] == 'django.core.cache.backends.locmem.LocMemCache'
+    ]
+    if local:
+        return [checks.Error(
+            f'{settings.WEB_CONCURRENCY} server processes cannot share the per-process '
+            f'cache(s) {", ".join(local)}.',
+            hint='Set CACHE_BACKEND/CACHE_LOCATION to a shared cache such as memcached, '
+                 'or run a single worker (WEB_CONCURRENCY=1).',
+            id='core.E002',
+        )]
+    return []
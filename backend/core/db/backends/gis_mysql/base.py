@@ -0,0 +1,13 @@
+"""
+core.db.backends.mysql(연결 확인/풀/통계)에 GIS를 더한 백엔드.
+GDAL/GEOS를 읽으므로 공간 필드가 있을 때만 씀 (settings.USE_GIS)
+"""
+from django.contrib.gis.db.backends.mysql.base import (
+    DatabaseWrapper as GISDatabaseWrapper,
+)
+
+from core.db.backends.mysql import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper, GISDatabaseWrapper):
+    pass
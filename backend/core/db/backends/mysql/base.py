@@ -0,0 +1,104 @@
+"""
+django.db.backends.mysql에 연결 재사용을 더한 백엔드.
+공간(GIS) 필드를 쓰면 같은 기능에 GIS를 더한 core.db.backends.gis_mysql (settings.USE_GIS)
+
+- CONN_HEALTH_CHECKS: CONN_MAX_AGE로 들고 있던 연결을 요청에서 처음 쓰기 전에 ping으로 확인하고,
+  끊겼으면(MySQL wait_timeout, DB 재시작) 새로 엶. Django 4.1의 같은 이름 설정과 같은 동작
+- OPTIONS['pool']: {'size': 10, 'timeout': 10, 'max_idle': 300}을 주면 프로세스의 스레드들이
+  연결 풀(core/db/pool.py)을 같이 씀. 이때 CONN_MAX_AGE는 0 (요청이 끝나면 풀에 돌려줌)
+- 연결을 열고 닫은 수, 풀에서 기다린 시간은 core.db.pool.snapshot() (/api/health/db/)
+"""
+from django.db.backends.mysql.base import DatabaseWrapper as MySQLDatabaseWrapper
+
+from core.db import pool
+
+
+class DatabaseWrapper(MySQLDatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+
+    @property
+    def pool(self):
+        options = self.settings_dict['OPTIONS'].get('pool')
+        if not options:
+            return None
+        return pool.get_pool(self.alias, options, check=self._ping, close=self._close_raw)
+
+    @property
+    def stats(self):
+        return pool.get_stats(self.alias)
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pool', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection_pool = self.pool
+        if connection_pool is not None:
+            return connection_pool.acquire(lambda: super(
+                DatabaseWrapper, self).get_new_connection(conn_params))
+        connection = super().get_new_connection(conn_params)
+        self.stats.incr('opened')
+        return connection
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+        # 방금 열었거나 풀에서 확인하고 받은 연결
+
+    def ensure_connection(self):
+        if (
+            self.connection is not None
+            and self.settings_dict.get('CONN_HEALTH_CHECKS')
+            and not self.health_check_done
+            and not self.in_atomic_block
+        ):
+            self.health_check_done = True
+            if not self.is_usable():
+                self.stats.incr('health_check_failures')
+                self.close()
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        # 요청이 시작/끝날 때 불림. 다음 요청에서 처음 쓸 때 다시 확인
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def _close(self):
+        connection_pool = self.pool
+        if self.connection is None:
+            return
+        if connection_pool is None:
+            with self.wrap_database_errors:
+                self._close_raw(self.connection)
+            self.stats.incr('closed')
+            return
+        connection_pool.release(self.connection, reusable=self._reset_for_pool())
+
+    def _reset_for_pool(self):
+        """풀에 돌려줄 수 있게 트랜잭션을 정리. 정리할 수 없는 연결이면 False"""
+        # atomic 안에서 닫으면 블록이 끝날 때까지 self.connection을 들고 있으므로 풀에 넣지 않음
+        if self.errors_occurred or self.in_atomic_block:
+            return False
+        try:
+            if self.autocommit != self.settings_dict['AUTOCOMMIT']:
+                # get_autocommit()은 ensure_connection()을 거치므로 쓰지 않음
+                self.connection.rollback()
+                self.connection.autocommit(self.settings_dict['AUTOCOMMIT'])
+        except self.Database.Error:
+            return False
+        return True
+
+    @staticmethod
+    def _close_raw(connection):
+        connection.close()
+
+    def _ping(self, connection):
+        try:
+            connection.ping()
+        except self.Database.Error:
+            return False
+        return True
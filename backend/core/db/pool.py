@@ -0,0 +1,175 @@
+"""
+프로세스 하나의 스레드들이 같이 쓰는 DB 연결 풀과 연결 통계.
+core/db/backends/mysql (gis_mysql) 백엔드가 씁니다.
+
+Django는 스레드마다 연결을 따로 들고 있어서, 스레드가 자주 바뀌는 경우(asgi의 sync_to_async,
+스레드 워커)에는 CONN_MAX_AGE로도 연결을 다시 쓰기 어렵습니다.
+풀을 쓰면 요청이 끝날 때 연결을 닫지 않고 풀에 돌려주고, 다음 요청은 어느 스레드에서든 그 연결을 씀.
+"""
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    """timeout초 동안 기다려도 빈 연결이 없음"""
+
+
+class ConnectionStats:
+    """연결을 얼마나 새로 열고 닫았는지(churn), 풀에서 얼마나 기다렸는지"""
+
+    FIELDS = [
+        'opened', 'closed', 'reused', 'health_check_failures',
+        'checkouts', 'wait_seconds', 'max_wait_seconds', 'timeouts',
+    ]
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._values = dict.fromkeys(self.FIELDS, 0)
+
+    def incr(self, field, value=1):
+        with self._lock:
+            self._values[field] += value
+
+    def record_checkout(self, seconds):
+        with self._lock:
+            self._values['checkouts'] += 1
+            self._values['wait_seconds'] += seconds
+            self._values['max_wait_seconds'] = max(self._values['max_wait_seconds'], seconds)
+
+    def as_dict(self):
+        with self._lock:
+            return dict(self._values)
+
+
+class ConnectionPool:
+    """
+    연결을 최대 size개까지 만들고, 다 쓰고 있으면 timeout초까지 기다림.
+    돌려받은 연결은 max_idle초가 지났거나 check(연결)가 False면 닫고 새로 엶
+    """
+
+    def __init__(self, size, timeout, max_idle=None, check=None, close=None, stats=None):
+        self.size = size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._check = check or (lambda conn: True)
+        self._close = close or (lambda conn: conn.close())
+        self.stats = stats or ConnectionStats()
+        self._idle = deque()
+        # (연결, 돌려받은 시각). 가장 최근에 돌려받은 연결부터 씀 (살아있을 가능성이 높음)
+        self._open = 0
+        # 빌려준 연결 + 쉬고 있는 연결
+        self._cond = threading.Condition()
+
+    def acquire(self, connect):
+        """쉬고 있는 연결을 빌려주고, 없으면 connect()로 새로 엶"""
+        start = time.monotonic()
+        conn = None
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    break
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    self.stats.incr('timeouts')
+                    raise PoolTimeout(
+                        f'No database connection available after {self.timeout} s '
+                        f'({self.size} in use).')
+                self._cond.wait(remaining)
+        self.stats.record_checkout(time.monotonic() - start)
+
+        if conn is not None:
+            expired = self.max_idle is not None and time.monotonic() - returned_at > self.max_idle
+            if not expired and self._check(conn):
+                self.stats.incr('reused')
+                return conn
+            if not expired:
+                self.stats.incr('health_check_failures')
+            self._close_quietly(conn)
+            # 자리는 그대로 두고 새로 엶
+        try:
+            conn = connect()
+        except Exception:
+            self._release_slot()
+            raise
+        self.stats.incr('opened')
+        return conn
+
+    def release(self, conn, reusable=True):
+        """연결을 돌려받음. reusable이 아니면(에러가 났던 연결 등) 닫음"""
+        if not reusable:
+            self._close_quietly(conn)
+            self._release_slot()
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def close_all(self):
+        """쉬고 있는 연결을 모두 닫음. 빌려준 연결은 돌려받을 때 다시 풀에 들어감"""
+        with self._cond:
+            idle, self._idle = self._idle, deque()
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    def _close_quietly(self, conn):
+        try:
+            self._close(conn)
+        except Exception:
+            pass
+        self.stats.incr('closed')
+
+    def _release_slot(self):
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    def status(self):
+        with self._cond:
+            return {'size': self.size, 'open': self._open, 'idle': len(self._idle)}
+
+
+_pools = {}
+_stats = {}
+_lock = threading.Lock()
+
+
+def get_stats(alias):
+    with _lock:
+        return _stats.setdefault(alias, ConnectionStats())
+
+
+def get_pool(alias, options, check=None, close=None):
+    """alias마다 프로세스에 하나. options는 DATABASES[alias]['OPTIONS']['pool']"""
+    with _lock:
+        if alias not in _pools:
+            _pools[alias] = ConnectionPool(
+                size=options.get('size', 10),
+                timeout=options.get('timeout', 10),
+                max_idle=options.get('max_idle', 300),
+                check=check, close=close,
+                stats=_stats.setdefault(alias, ConnectionStats()),
+            )
+        return _pools[alias]
+
+
+def snapshot():
+    """{alias: 통계 (+ 풀 상태)}. 이 프로세스의 값"""
+    with _lock:
+        aliases = sorted(_stats)
+    result = {}
+    for alias in aliases:
+        result[alias] = get_stats(alias).as_dict()
+        if alias in _pools:
+            result[alias]['pool'] = _pools[alias].status()
+    return result
@@ -0,0 +1,106 @@
+"""
+벤치마크/부하 테스트 명령(bench_filters, bench_search, bench_json, loadtest)이 같이 쓰는
+데이터 만들기/지우기.
+명령마다 기본 유저(--email)가 달라서 한 명령의 --keep 데이터를 다른 명령이 지우지 않음.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.cache import bump_generation
+
+
+def get_user(email):
+    user, _ = get_user_model().objects.get_or_create(email=email)
+    return user
+
+
+def seed_attrs(model, user, count):
+    """테그/재료를 count개('<모델>-<번호>') 만들고 유저의 id 목록을 반환"""
+    prefix = model._meta.model_name
+    model.objects.bulk_create(
+        [model(user=user, name=f'{prefix}-{i}') for i in range(count)],
+        ignore_conflicts=True,
+    )
+    return list(model.objects.filter(user=user).values_list('id', flat=True))
+
+
+def link_random(relation, recipe_ids, target_ids, per_recipe, rng):
+    """레시피마다 target_ids 중 per_recipe개를 골라 연결 (relation은 Recipe.tags 등)"""
+    through = relation.through
+    source = relation.field.m2m_field_name()
+    target = relation.field.m2m_reverse_field_name()
+    through.objects.bulk_create([
+        through(**{f'{source}_id': recipe_id, f'{target}_id': target_id})
+        for recipe_id in recipe_ids
+        for target_id in rng.sample(target_ids, min(per_recipe, len(target_ids)))
+    ])
+
+
+def seed_recipes(stdout, user, total, batch_size, make_recipe, link=None):
+    """
+    user의 레시피가 total개가 될 때까지 batch_size개씩 만듭니다.
+    make_recipe(i)는 i번째 Recipe를, link(recipe_ids)는 새로 만든 레시피에 테그 등을 연결
+    """
+    existing = Recipe.objects.filter(user=user).count()
+    start = time.perf_counter()
+    for offset in range(existing, total, batch_size):
+        size = min(batch_size, total - offset)
+        with transaction.atomic():
+            last_id = Recipe.objects.order_by('-id').values_list('id', flat=True).first() or 0
+            # bulk_create는 시그널을 보내지 않아서 변경 기록/캐시 처리 없이 빠르게 들어감
+            Recipe.objects.bulk_create([make_recipe(offset + i) for i in range(size)])
+            if link is not None:
+                # Django 3.2의 bulk_create는 MySQL에서 id를 돌려주지 않으므로 다시 읽음
+                link(list(Recipe.objects.filter(
+                    user=user, id__gt=last_id).values_list('id', flat=True)))
+        stdout.write(f'\rseeded {offset + size}/{total}', ending='')
+    if existing < total:
+        stdout.write(f'\nseeding took {time.perf_counter() - start:.1f} s')
+    # 시그널 없이 넣었으므로 검색 역색인/캐시를 직접 무효화
+    bump_generation(user.pk)
+
+
+def seed_catalog(stdout, user, total, rng, tags=50, ingredients=200, batch_size=1000):
+    """
+    API 요청/직렬화 측정용으로 레시피마다 테그 3개, 재료 8개가 붙은 레시피를 total개 만듭니다.
+    (bench_json, loadtest)
+    """
+    tag_ids = seed_attrs(Tag, user, tags)
+    ingredient_ids = seed_attrs(Ingredient, user, ingredients)
+
+    def link(recipe_ids):
+        link_random(Recipe.tags, recipe_ids, tag_ids, 3, rng)
+        link_random(Recipe.ingredients, recipe_ids, ingredient_ids, 8, rng)
+
+    seed_recipes(
+        stdout, user, total, batch_size,
+        lambda i: Recipe(
+            user=user,
+            title=f'recipe {i}',
+            time_minutes=rng.randint(5, 120),
+            price=rng.randint(100, 5000) / 100,
+            link=f'https://example.com/recipes/{i}',
+        ),
+        link,
+    )
+
+
+def cleanup(user):
+    """user와 user의 레시피/테그/재료를 지움"""
+    # ORM delete는 레시피마다 시그널을 보내므로 SQL로 한번에 지움
+    recipe_table = Recipe._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        for relation in (Recipe.tags, Recipe.ingredients):
+            through = relation.through._meta.db_table
+            cursor.execute(
+                f'DELETE FROM {through} WHERE recipe_id IN '
+                f'(SELECT id FROM {recipe_table} WHERE user_id = %s)',
+                [user.pk],
+            )
+        cursor.execute(f'DELETE FROM {recipe_table} WHERE user_id = %s', [user.pk])
+        for model in (Tag, Ingredient):
+            cursor.execute(f'DELETE FROM {model._meta.db_table} WHERE user_id = %s', [user.pk])
+    user.delete()
@@ -0,0 +1,109 @@
+"""
+레시피 테그/재료 필터 벤치마크.
+벤치마크용 유저에 레시피 --recipes개와 레시피마다 테그 --tags-per-recipe개를 만들고,
+예전 방식(JOIN + DISTINCT)과 EXISTS 방식, 비트맵 인덱스(recipe/facets.py)로 id를 먼저 구하는 방식의
+실행계획(EXPLAIN)과 지연시간을 비교합니다.
+
+    python manage.py bench_filters --recipes 200000 --tags 200 --tags-per-recipe 5
+"""
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.management import bench
+from core.models import Recipe, Tag
+from recipe import facets, filters
+
+
+class Command(BaseCommand):
+    help = 'Compare JOIN + DISTINCT, EXISTS and bitmap tag filters on a generated data set'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=200_000)
+        parser.add_argument('--tags', type=int, default=200)
+        parser.add_argument('--tags-per-recipe', type=int, default=5)
+        parser.add_argument('--filter-tags', type=int, default=3)
+        parser.add_argument('--queries', type=int, default=20)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--email', default='bench-filters@example.com')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--keep', action='store_true',
+            help='Keep the generated recipes for the next run',
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        user = bench.get_user(options['email'])
+        tag_ids = self._seed(user, options, rng)
+
+        base = Recipe.objects.filter(user=user)
+        cases = [
+            ('join+distinct any', lambda ids: base.filter(tags__id__in=ids).distinct()),
+            ('exists any', lambda ids: filters.filter_by_relation(
+                base, 'tags', ids, filters.MATCH_ANY)),
+            ('exists all', lambda ids: filters.filter_by_relation(
+                base, 'tags', ids, filters.MATCH_ALL)),
+            ('bitmap all', lambda ids: self._bitmap_filter(base, user, ids)),
+        ]
+        facets.update(user.pk)
+        start = time.perf_counter()
+        facets.get_index(user.pk)
+        # 비트맵 인덱스를 처음 만드는 시간은 따로 표시 (이후는 시그널로 고쳐짐)
+        self.stdout.write(f'facet index build: {(time.perf_counter() - start) * 1000:.1f} ms')
+        samples = [
+            rng.sample(tag_ids, options['filter_tags'])
+            for _ in range(options['queries'])
+        ]
+
+        for name, build in cases:
+            queryset = build(samples[0]).order_by('-id')[:settings.API_PAGE_SIZE]
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            if queryset.query.is_empty():
+                self.stdout.write('(empty result, no query sent)')
+            else:
+                self.stdout.write(queryset.explain())
+
+            latencies = []
+            for ids in samples:
+                start = time.perf_counter()
+                list(build(ids).order_by('-id')[:settings.API_PAGE_SIZE])
+                latencies.append((time.perf_counter() - start) * 1000)
+            latencies.sort()
+            self.stdout.write(self.style.SUCCESS(
+                f'{connection.vendor}: {len(latencies)} queries, '
+                f'p50={statistics.median(latencies):.1f} ms '
+                f'p95={latencies[int(len(latencies) * 0.95) - 1]:.1f} ms '
+                f'max={latencies[-1]:.1f} ms\n'
+            ))
+
+        if not options['keep']:
+            bench.cleanup(user)
+
+    def _bitmap_filter(self, base, user, ids):
+        recipe_ids = facets.resolve(
+            user.pk, {'tags': ids}, filters.MATCH_ALL, settings.RECIPE_FACET_MAX_IDS)
+        if recipe_ids is None:
+            return filters.filter_by_relation(base, 'tags', ids, filters.MATCH_ALL)
+        if not recipe_ids:
+            return base.none()
+        return base.filter(pk__in=recipe_ids)
+
+    def _seed(self, user, options, rng):
+        tag_ids = bench.seed_attrs(Tag, user, options['tags'])
+        bench.seed_recipes(
+            self.stdout, user, options['recipes'], options['batch_size'],
+            lambda i: Recipe(
+                user=user,
+                title=f'recipe {i}',
+                time_minutes=rng.randint(5, 120),
+                price=rng.randint(100, 5000) / 100,
+            ),
+            lambda recipe_ids: bench.link_random(
+                Recipe.tags, recipe_ids, tag_ids, options['tags_per_recipe'], rng),
+        )
+        return tag_ids
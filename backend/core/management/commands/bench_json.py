@@ -0,0 +1,75 @@
+"""
+JSON 렌더러/파서 마이크로벤치마크.
+벤치마크용 유저(--email)에 테그/재료가 붙은 레시피를 가장 큰 --sizes만큼 만들어서
+목록 API와 같은 시리얼라이저로 페이지 크기(--sizes)만큼 직렬화해 두고,
+DRF의 JSONRenderer/JSONParser와 core/renderers.py, core/parsers.py(orjson)로
+--repeat번씩 만들고 읽는 시간을 비교합니다. 두 렌더러의 결과가 같은지도 확인함.
+
+    python manage.py bench_json --sizes 50 500 --repeat 200
+"""
+import io
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.management import bench
+from core.models import Recipe
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+from recipe.serializers import RecipeSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compare DRF JSONRenderer/JSONParser with the orjson renderer/parser on recipe pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', default='bench-json@example.com')
+        parser.add_argument('--sizes', type=int, nargs='+', default=[50, 500])
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--keep', action='store_true',
+            help='Keep the generated recipes for the next run',
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        user = bench.get_user(options['email'])
+        bench.seed_catalog(self.stdout, user, max(options['sizes']), rng)
+        recipes = list(Recipe.objects.filter(user=user).prefetch_related(
+            'tags', 'ingredients').order_by('-id')[:max(options['sizes'])])
+
+        for size in options['sizes']:
+            page = {
+                'count': len(recipes), 'next': None, 'previous': None,
+                'results': RecipeSerializer(recipes[:size], many=True).data,
+            }
+            body = JSONRenderer().render(page)
+            if ORJSONRenderer().render(page) != body:
+                raise CommandError(f'Renderers disagree on a page of {size} recipes')
+
+            self.stdout.write(f'{len(page["results"])} recipes, {len(body)} bytes')
+            for label, stdlib, fast in [
+                ('render', lambda: JSONRenderer().render(page),
+                 lambda: ORJSONRenderer().render(page)),
+                ('parse', lambda: JSONParser().parse(io.BytesIO(body)),
+                 lambda: ORJSONParser().parse(io.BytesIO(body))),
+            ]:
+                stdlib_ms = self._time(stdlib, options['repeat'])
+                fast_ms = self._time(fast, options['repeat'])
+                self.stdout.write(
+                    f'  {label}: json {stdlib_ms:.3f} ms, orjson {fast_ms:.3f} ms '
+                    f'({stdlib_ms / fast_ms:.1f}x)')
+
+        if not options['keep']:
+            bench.cleanup(user)
+
+    def _time(self, func, repeat):
+        func()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - start) / repeat * 1000
@@ -0,0 +1,83 @@
+"""
+레시피 검색 벤치마크.
+벤치마크용 유저에 레시피를 --recipes개(기본 100만개) 만들고 ?search= 와 같은 쿼리의 지연시간을 잽니다.
+MySQL이면 FULLTEXT 인덱스, 그 외 DB면 파이썬 역색인 경로가 측정됩니다.
+
+    python manage.py bench_search --recipes 1000000 --queries 100
+"""
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.management import bench
+from core.models import Recipe
+from recipe.search import search_recipes
+
+WORDS = [
+    'kimchi', 'bulgogi', 'bibimbap', 'tofu', 'garlic', 'onion', 'ginger', 'soy',
+    'sesame', 'rice', 'noodle', 'curry', 'chicken', 'beef', 'pork', 'shrimp',
+    'salmon', 'tuna', 'egg', 'cheese', 'tomato', 'potato', 'carrot', 'spinach',
+    'mushroom', 'pepper', 'chili', 'lemon', 'lime', 'basil', 'mint', 'coconut',
+    'butter', 'cream', 'yogurt', 'honey', 'sugar', 'chocolate', 'vanilla', 'apple',
+    'banana', 'berry', 'mango', 'peach', 'almond', 'walnut', 'bread', 'pasta',
+    'pizza', 'salad', 'soup', 'stew', 'roast', 'grill', 'fried', 'baked',
+    'steamed', 'spicy', 'sweet', 'sour', 'smoky', 'crispy', 'creamy', 'quick',
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark recipe search latency on a generated data set'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=1_000_000)
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--email', default='bench-search@example.com')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--keep', action='store_true',
+            help='Keep the generated recipes for the next run',
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        user = bench.get_user(options['email'])
+
+        bench.seed_recipes(
+            self.stdout, user, options['recipes'], options['batch_size'],
+            lambda i: Recipe(
+                user=user,
+                title=' '.join(rng.sample(WORDS, 3)),
+                description=' '.join(rng.choices(WORDS, k=12)),
+                time_minutes=rng.randint(5, 120),
+                price=rng.randint(100, 5000) / 100,
+            ),
+        )
+
+        latencies = []
+        for i in range(options['queries'] + 1):
+            query = ' '.join(rng.sample(WORDS, rng.randint(1, 2)))
+            start = time.perf_counter()
+            queryset = search_recipes(Recipe.objects.filter(user=user), user, query)
+            list(queryset.order_by('-relevance', '-id')[:settings.API_PAGE_SIZE])
+            elapsed = (time.perf_counter() - start) * 1000
+            if i == 0:
+                # 첫 쿼리는 파이썬 역색인을 만드는 시간이 포함되므로 따로 표시
+                self.stdout.write(f'first query: {elapsed:.1f} ms')
+            else:
+                latencies.append(elapsed)
+
+        latencies.sort()
+        self.stdout.write(self.style.SUCCESS(
+            f'{connection.vendor}: {options["recipes"]} recipes, {len(latencies)} queries, '
+            f'p50={statistics.median(latencies):.1f} ms '
+            f'p95={latencies[int(len(latencies) * 0.95) - 1]:.1f} ms '
+            f'max={latencies[-1]:.1f} ms'
+        ))
+
+        if not options['keep']:
+            bench.cleanup(user)
@@ -0,0 +1,62 @@
+"""
+워커 콜드 스타트 벤치마크.
+새 파이썬 프로세스에서 워커가 요청을 받기 전까지 하는 일(django.setup, app.wsgi, DB 백엔드, URL)을
+USE_GIS=0/1로 --runs번씩 하고, 걸린 시간과 메모리(RSS), 읽은 모듈 수의 중앙값을 비교합니다.
+
+    python manage.py bench_startup --runs 10
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+STARTUP_SCRIPT = """
+import json, resource, sys, time
+start = time.perf_counter()
+from app.wsgi import application
+from django.db import connection
+connection.ops
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(json.dumps({
+    'seconds': time.perf_counter() - start,
+    'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'modules': len(sys.modules),
+    'gis': any(name.startswith('django.contrib.gis') for name in sys.modules),
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = 'Measure worker startup time and memory with and without the GIS backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+
+    def handle(self, *args, **options):
+        for use_gis in ('0', '1'):
+            env = dict(os.environ, USE_GIS=use_gis)
+            results = []
+            for _ in range(options['runs']):
+                proc = subprocess.run(
+                    [sys.executable, '-c', STARTUP_SCRIPT],
+                    cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+                )
+                if proc.returncode:
+                    error = (proc.stderr.strip().splitlines() or ['unknown error'])[-1]
+                    self.stdout.write(self.style.ERROR(f'USE_GIS={use_gis}: failed: {error}'))
+                    break
+                results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+            if not results:
+                continue
+            self.stdout.write(
+                f'USE_GIS={use_gis}: '
+                f'{statistics.median(r["seconds"] for r in results) * 1000:.0f} ms, '
+                f'{statistics.median(r["rss_kb"] for r in results) / 1024:.1f} MB RSS, '
+                f'{statistics.median(r["modules"] for r in results):.0f} modules, '
+                f'GIS loaded: {"yes" if results[0]["gis"] else "no"}'
+            )
@@ -0,0 +1,76 @@
+"""
+쓰는 레시피가 없는 레시피 사진 파일 정리.
+사진을 바꾸거나 레시피를 지울 때도 바로 정리되지만(recipe/images.py의 release),
+그때 지우지 못한 파일(저장한지 얼마 안 된 파일, 예전 uuid 이름의 파일 등)을 모아서 지우고
+지운 용량과 중복 제거로 아낀 용량을 보여줍니다.
+끝나지 않고 오래된 나눠 올리기 업로드(recipe/uploads.py)도 지웁니다.
+처리하던 워커가 끝나서 오래 pending으로 남은 사진도 여기서 다시 처리함.
+
+    python manage.py gc_recipe_images --dry-run
+"""
+import os
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from core.models import Recipe, recipe_image_file_path
+from recipe import images, uploads
+
+
+class Command(BaseCommand):
+    help = 'Delete recipe image files that no recipe refers to and report reclaimed bytes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report what would be deleted',
+        )
+        parser.add_argument(
+            '--grace', type=int, default=settings.RECIPE_IMAGE_GC_GRACE,
+            help='Keep files modified in the last GRACE seconds',
+        )
+
+    def handle(self, *args, **options):
+        referenced, originals, recipes = set(), set(), 0
+        for name, renditions in Recipe.objects.exclude(image='').exclude(
+                image=None).values_list('image', 'image_renditions').iterator():
+            recipes += 1
+            originals.add(name)
+            referenced.update(images.image_files(name, renditions))
+        # 파일을 훑기 전에 참조를 먼저 읽음. 그 사이에 저장/재사용된 사진은 수정 시각(grace)으로 지킴
+
+        directory = os.path.dirname(recipe_image_file_path(None, 'image.jpg'))
+        stored, orphans = 0, []
+        cutoff = time.time() - options['grace']
+        for path in (directory, images.rendition_dir(os.path.join(directory, 'image.jpg'))):
+            for filename in self._listdir(path):
+                name = os.path.join(path, filename)
+                stat = os.stat(default_storage.path(name))
+                stored += stat.st_size
+                if name not in referenced and stat.st_mtime < cutoff:
+                    orphans.append((name, stat.st_size))
+
+        self.stdout.write(
+            f'{recipes} recipes with images share {len(originals)} files '
+            f'({stored} bytes stored)'
+        )
+
+        if options['dry_run']:
+            reclaimed = sum(size for _, size in orphans)
+            self.stdout.write(self.style.WARNING(
+                f'Would delete {len(orphans)} unused files ({reclaimed} bytes)'))
+            return
+        reclaimed = images.delete_files(name for name, _ in orphans)
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {len(orphans)} unused files ({reclaimed} bytes reclaimed)'))
+        self.stdout.write(f'Deleted {uploads.delete_expired()} expired uploads')
+        self.stdout.write(
+            f'Processed {images.requeue_stale(run_now=True)} stale pending images')
+
+    def _listdir(self, path):
+        try:
+            return default_storage.listdir(path)[1]
+        except FileNotFoundError:
+            return []
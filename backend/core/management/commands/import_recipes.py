@@ -0,0 +1,193 @@
+"""
+레시피 대량 가져오기.
+NDJSON(한 줄에 레시피 하나) 또는 CSV 파일을 처음부터 끝까지 메모리에 올리지 않고 읽으면서
+--batch-size개씩 recipe/bulk.py로 넣습니다. /recipes/export/ 로 내보낸 파일을 그대로 넣을 수 있습니다.
+
+- 항목은 API와 같은 시리얼라이저로 검사하고, 잘못된 줄은 건너뛰고 알려줌
+- 테그/재료 이름 -> id는 유저별로 메모리에 들고 있어서 이미 본 이름은 다시 조회하지 않음
+- --checkpoint 파일에 커밋한 줄 수를 기록하므로, 중간에 멈춰도 같은 명령으로 이어서 가져옴
+- 진행 상황과 초당 처리 줄 수를 보여줌
+
+    python manage.py import_recipes recipes.ndjson --user me@example.com --checkpoint import.ckpt
+    python manage.py import_recipes recipes.csv --user me@example.com --batch-size 2000
+"""
+import csv
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError
+
+from recipe import bulk
+from recipe.export import CSV_LIST_SEPARATOR, CSV_TEXT_FIELDS, csv_unescape
+from recipe.serializers import RecipeBulkSerializer
+
+
+class Command(BaseCommand):
+    help = 'Import recipes from an NDJSON or CSV file in batches, resumable from a checkpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="NDJSON or CSV file, or '-' for stdin")
+        parser.add_argument(
+            '--format', choices=['ndjson', 'csv'],
+            help='Defaults to the file extension (ndjson for stdin)',
+        )
+        parser.add_argument(
+            '--user', required=True,
+            help='Email of the owner. A "user" column/key in a row overrides it',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--checkpoint',
+            help='File recording how many rows are committed; resumes from it if it exists',
+        )
+        parser.add_argument(
+            '--max-errors', type=int, default=100,
+            help='Stop after this many invalid rows',
+        )
+
+    def handle(self, *args, **options):
+        self.users = {}
+        self.known_names = {}
+        self.serializer = RecipeBulkSerializer()
+        self.default_user = self._user(options['user'])
+        if self.default_user is None:
+            raise CommandError(f"User {options['user']} does not exist")
+        fmt = options['format'] or (
+            'csv' if options['path'].lower().endswith('.csv') else 'ndjson')
+
+        done = self._read_checkpoint(options['checkpoint'])
+        if done:
+            self.stdout.write(f'resuming after {done} rows')
+
+        imported = errors = 0
+        start = time.perf_counter()
+        with self._open(options['path']) as f:
+            rows = islice(self._rows(f, fmt), done, None)
+            while True:
+                batch = list(islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                batch_imported, batch_errors = self._import_batch(batch)
+                imported += batch_imported
+                errors += batch_errors
+                done += len(batch)
+                self._write_checkpoint(options['checkpoint'], done)
+
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f'\r{done} rows, {imported} imported, {errors} errors '
+                    f'({imported / elapsed:.0f} rows/s)',
+                    ending='',
+                )
+                if errors > options['max_errors']:
+                    raise CommandError(
+                        f'\nStopped after {errors} invalid rows; fix them and run again to resume.')
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} recipes in {elapsed:.1f} s '
+            f'({imported / elapsed if elapsed else 0:.0f} rows/s), {errors} invalid rows skipped'
+        ))
+
+    def _open(self, path):
+        if path == '-':
+            return open(sys.stdin.fileno(), encoding='utf-8', closefd=False)
+        try:
+            return open(path, encoding='utf-8', newline='')
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+    def _rows(self, f, fmt):
+        """(줄 번호, 항목 dict 또는 읽기 에러)를 파일 순서대로. 파일은 한 줄씩 읽음"""
+        if fmt == 'csv':
+            reader = csv.DictReader(f)
+            for row in reader:
+                for field in CSV_TEXT_FIELDS:
+                    # 내보내기가 수식으로 실행되지 않게 붙인 ' 를 뗌
+                    if row.get(field):
+                        row[field] = csv_unescape(row[field])
+                for relation in bulk.RELATION_MODELS:
+                    # 내보내기와 같은 형식: 이름을 | 로 이어서 씀
+                    names = row.get(relation) or ''
+                    row[relation] = [name for name in names.split(CSV_LIST_SEPARATOR) if name]
+                yield reader.line_num, row
+            return
+        for line_num, line in enumerate(f, 1):
+            if line.strip():
+                try:
+                    row = json.loads(line)
+                except ValueError as exc:
+                    row = str(exc)
+                yield line_num, row if isinstance(row, (dict, str)) else 'Expected a JSON object.'
+
+    def _user(self, email):
+        if email not in self.users:
+            self.users[email] = get_user_model().objects.filter(email=email).first()
+        return self.users[email]
+
+    def _validate(self, row):
+        """validated_data 또는 에러"""
+        if not isinstance(row, dict):
+            return None, row
+        for relation in bulk.RELATION_MODELS:
+            # ["Dinner"]처럼 이름만 보내도 됨
+            row[relation] = [
+                {'name': item} if isinstance(item, str) else item
+                for item in row.get(relation) or []
+            ]
+        # 필드를 줄마다 새로 만들지 않도록 시리얼라이저 하나로 검사 (ListSerializer와 같은 방식)
+        try:
+            return self.serializer.run_validation(row), None
+        except ValidationError as exc:
+            return None, exc.detail
+
+    def _import_batch(self, rows):
+        """배치 하나를 한 트랜잭션으로 넣고 (넣은 수, 잘못된 줄 수)를 반환"""
+        by_user, errors = {}, 0
+        for line_num, row in rows:
+            data, error = self._validate(row)
+            user = self.default_user
+            if error is None and row.get('user'):
+                user = self._user(row['user'])
+                if user is None:
+                    error = f"User {row['user']} does not exist."
+            if error is not None:
+                errors += 1
+                self.stderr.write(f'\nline {line_num}: {error}')
+                continue
+            by_user.setdefault(user, []).append(data)
+
+        for attempt in range(2):
+            try:
+                with transaction.atomic():
+                    for user, items in by_user.items():
+                        bulk.create_recipes(
+                            user, items, self.known_names.setdefault(user.pk, {}))
+                break
+            except (IntegrityError, bulk.BulkConflict):
+                # 메모리의 이름 -> id가 그 사이에 지워졌거나 같은 유저의 레시피가 동시에 생김
+                self.known_names.clear()
+                if attempt:
+                    raise
+        return sum(len(items) for items in by_user.values()), errors
+
+    def _read_checkpoint(self, path):
+        if not path or not os.path.exists(path):
+            return 0
+        with open(path) as f:
+            return int(f.read().strip() or 0)
+
+    def _write_checkpoint(self, path, done):
+        if not path:
+            return
+        # 쓰다가 멈춰도 예전 값이 남도록 새 파일에 쓰고 바꿈
+        with open(f'{path}.tmp', 'w') as f:
+            f.write(str(done))
+        os.replace(f'{path}.tmp', path)
@@ -0,0 +1,117 @@
+"""
+떠 있는 서버에 동시에 요청을 보내서 처리량(req/s)과 지연시간을 잽니다.
+runserver와 gunicorn(gunicorn.conf.py)을 같은 시나리오로 비교할 때 씁니다.
+부하 테스트용 유저(--email)에 레시피 --recipes개를 만들고 그 유저의 토큰으로
+레시피 목록/상세, 테그/재료 목록을 차례로 요청하고,
+연결마다 keep-alive로 연결을 다시 씁니다 (nginx upstream과 같은 조건).
+
+    python manage.py runserver 0.0.0.0:8000 &
+    python manage.py loadtest --url http://localhost:8000 --concurrency 32 --duration 20
+    gunicorn -c gunicorn.conf.py &
+    python manage.py loadtest --url http://localhost:8000 --concurrency 32 --duration 20
+"""
+import http.client
+import random
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from core.management import bench
+from core.models import Recipe
+
+SCENARIO = [
+    '/api/recipe/recipes/',
+    '/api/recipe/recipes/{recipe_id}/',
+    '/api/recipe/tags/',
+    '/api/recipe/recipes/?page_size=200',
+    '/api/recipe/ingredients/',
+]
+
+
+class Command(BaseCommand):
+    help = 'Send concurrent API requests to a running server and report throughput and latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000')
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--duration', type=float, default=10, help='Seconds')
+        parser.add_argument('--email', default='loadtest@example.com')
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--keep', action='store_true',
+            help='Keep the generated recipes for the next run',
+        )
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help='Request this path instead of the default scenario (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        user = bench.get_user(options['email'])
+        bench.seed_catalog(self.stdout, user, options['recipes'], random.Random(options['seed']))
+        token, _ = Token.objects.get_or_create(user=user)
+        recipe = Recipe.objects.filter(user=user).order_by('id').first()
+        paths = [
+            path.format(recipe_id=recipe.pk if recipe else 0)
+            for path in options['paths'] or SCENARIO
+        ]
+
+        url = urlsplit(options['url'])
+        headers = {'Authorization': f'Token {token.key}', 'Accept': 'application/json'}
+        deadline = time.perf_counter() + options['duration']
+        results = []
+        # 스레드마다 (지연시간 목록, 실패 수)
+
+        def worker(offset):
+            latencies, failures = [], 0
+            conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+            i = offset
+            while time.perf_counter() < deadline:
+                path = paths[i % len(paths)]
+                i += 1
+                start = time.perf_counter()
+                try:
+                    conn.request('GET', path, headers=headers)
+                    response = conn.getresponse()
+                    response.read()
+                    ok = response.status == 200
+                    if response.getheader('Connection', '').lower() == 'close':
+                        conn.close()
+                except (OSError, http.client.HTTPException):
+                    ok = False
+                    conn.close()
+                if ok:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    failures += 1
+            conn.close()
+            results.append((latencies, failures))
+
+        threads = [
+            threading.Thread(target=worker, args=(n,)) for n in range(options['concurrency'])]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        latencies = sorted(latency for items, _ in results for latency in items)
+        failures = sum(failures for _, failures in results)
+        if not options['keep']:
+            bench.cleanup(user)
+        if not latencies:
+            raise CommandError(f'All {failures} requests failed')
+        quantiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f'{len(latencies)} requests in {elapsed:.1f} s, {failures} failed, '
+            f'concurrency {options["concurrency"]}')
+        self.stdout.write(self.style.SUCCESS(f'{len(latencies) / elapsed:.1f} req/s'))
+        self.stdout.write(
+            f'latency p50 {quantiles[49] * 1000:.1f} ms, p95 {quantiles[94] * 1000:.1f} ms, '
+            f'p99 {quantiles[98] * 1000:.1f} ms, max {latencies[-1] * 1000:.1f} ms')
@@ -0,0 +1,25 @@
+"""
+오래된 레시피 변경 기록(RecipeChange) 정리.
+보관 기간(RECIPE_SYNC_RETENTION_DAYS)보다 오래된 삭제 기록과 더 새 기록이 있는 기록을 지웁니다.
+그보다 오래된 동기화 토큰은 410을 받고 처음부터 다시 동기화함. cron 등으로 하루 한번 실행.
+
+    python manage.py prune_recipe_changes --days 30
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipe import sync
+
+
+class Command(BaseCommand):
+    help = 'Delete recipe change log entries older than the sync retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.RECIPE_SYNC_RETENTION_DAYS,
+            help='Keep changes from the last DAYS days',
+        )
+
+    def handle(self, *args, **options):
+        deleted = sync.prune_changes(options['days'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} old recipe changes'))
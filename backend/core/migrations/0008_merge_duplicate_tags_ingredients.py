@@ -0,0 +1,59 @@
+"""
+(user, name) 유니크 제약을 걸기 전에 중복된 테그/재료를 하나로 합칩니다.
+가장 먼저 만들어진(id가 가장 작은) 것을 남기고, 나머지에 연결되어 있던
+레시피는 남긴 것으로 옮긴 뒤 삭제합니다.
+"""
+from django.db import migrations
+from django.db.models import Count
+
+
+def _merge_duplicates(apps, model_name, relation):
+    Model = apps.get_model('core', model_name)
+    Recipe = apps.get_model('core', 'Recipe')
+    Through = getattr(Recipe, relation).through
+    target = f'{model_name.lower()}_id'
+
+    # GROUP BY는 DB의 collation을 따르므로 유니크 인덱스와 같은 기준으로 중복을 찾음
+    duplicates = (
+        Model.objects.values('user_id', 'name')
+        .annotate(n=Count('id'))
+        .filter(n__gt=1)
+    )
+    for group in duplicates:
+        ids = list(
+            Model.objects.filter(user_id=group['user_id'], name=group['name'])
+            .order_by('id')
+            .values_list('id', flat=True)
+        )
+        keep, others = ids[0], ids[1:]
+
+        recipe_ids = set(
+            Through.objects.filter(**{f'{target}__in': ids})
+            .values_list('recipe_id', flat=True)
+        )
+        linked = set(
+            Through.objects.filter(**{target: keep})
+            .values_list('recipe_id', flat=True)
+        )
+        Through.objects.filter(**{f'{target}__in': others}).delete()
+        Through.objects.bulk_create([
+            Through(recipe_id=recipe_id, **{target: keep})
+            for recipe_id in recipe_ids - linked
+        ])
+        Model.objects.filter(id__in=others).delete()
+
+
+def merge_duplicates(apps, schema_editor):
+    _merge_duplicates(apps, 'Tag', 'tags')
+    _merge_duplicates(apps, 'Ingredient', 'ingredients')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_alter_recipe_price'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_changes(apps, schema_editor):
+    """기존 레시피를 모두 upsert로 기록해서 since=0 동기화에 나오게 함"""
+    Recipe = apps.get_model('core', 'Recipe')
+    RecipeChange = apps.get_model('core', 'RecipeChange')
+    batch = []
+    for recipe_id, user_id in Recipe.objects.order_by('id').values_list('id', 'user_id').iterator():
+        batch.append(RecipeChange(user_id=user_id, recipe_id=recipe_id, kind='upsert'))
+        if len(batch) >= 1000:
+            RecipeChange.objects.bulk_create(batch)
+            batch = []
+    RecipeChange.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0010_timestamps'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipe_id', models.BigIntegerField()),
+                ('kind', models.CharField(choices=[('upsert', 'Created or updated'), ('delete', 'Deleted')], max_length=6)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='recipechange',
+            index=models.Index(fields=['user', 'id'], name='core_recipechange_user_id'),
+        ),
+        migrations.RunPython(backfill_changes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+"""
+레시피 제목/설명 FULLTEXT 인덱스 (MySQL만).
+다른 DB에서는 아무것도 하지 않고, 검색은 recipe/search.py의 파이썬 역색인을 사용합니다.
+"""
+from django.db import migrations
+
+
+def create_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(
+            'CREATE FULLTEXT INDEX core_recipe_fulltext ON core_recipe (title, description)'
+        )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('DROP INDEX core_recipe_fulltext ON core_recipe')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_recipechange'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
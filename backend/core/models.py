@@ -14,6 +14,7 @@ from django.contrib.auth.models import (
 
 def recipe_image_file_path(instance, filename):
 	"""generate file path for new recipe image"""
+	# 실제 파일 이름은 저장소(core/storage.py)가 내용의 해시로 바꿈. uuid 이름은 쓰는 동안의 임시 이름
 	ext = os.path.splitext(filename)[1]
 	filename = f'{uuid.uuid4()}{ext}'
 
@@ -82,6 +83,30 @@ class Recipe(models.Model):
 	tags = models.ManyToManyField('Tag')
 	ingredients = models.ManyToManyField('Ingredient')
 	image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+	IMAGE_PENDING = 'pending'
+	IMAGE_READY = 'ready'
+	IMAGE_FAILED = 'failed'
+	IMAGE_STATUS_CHOICES = [
+		(IMAGE_PENDING, 'Pending'),
+		(IMAGE_READY, 'Ready'),
+		(IMAGE_FAILED, 'Failed'),
+	]
+	image_status = models.CharField(
+		max_length=10, choices=IMAGE_STATUS_CHOICES, blank=True, default='')
+	# 업로드된 사진의 처리 상태 (recipe/images.py). 사진이 없으면 빈 값
+	image_renditions = models.JSONField(default=dict, blank=True)
+	# 축소본 파일 이름 {'jpeg': {'320': 'static/recipe/renditions/...jpg'}, 'webp': {...}}
+	created_at = models.DateTimeField(auto_now_add=True)
+	updated_at = models.DateTimeField(auto_now=True)
+	# 테그/재료 연결이 바뀌거나 테그/재료 이름이 바뀔 때도 갱신됨 (recipe/signals.py)
+
+	class Meta:
+		indexes = [
+			models.Index(fields=['user', '-id'], name='core_recipe_user_id_desc'),
+			# 유저별 최신순(-id) 목록/커서 페이지네이션용
+			models.Index(fields=['user', 'updated_at'], name='core_recipe_user_updated'),
+			# 유저별 MAX(updated_at) 조회용 (조건부 요청 304 판단)
+		]
 
 	def __str__(self):
 		return self.title
@@ -93,6 +118,17 @@ class Tag(models.Model):
 		settings.AUTH_USER_MODEL,
 		on_delete=models.CASCADE,
 	)
+	created_at = models.DateTimeField(auto_now_add=True)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	class Meta:
+		constraints = [
+			models.UniqueConstraint(
+				fields=['user', 'name'],
+				name='core_tag_unique_user_name',
+			),
+			# 유저별로 같은 이름의 테그는 하나만. (user, name) 인덱스로 이름 조회/정렬도 빨라짐
+		]
 
 	def __str__(self):
 		return self.name
@@ -103,10 +139,72 @@ class Ingredient(models.Model):
 		settings.AUTH_USER_MODEL, # settings.py에 AUTH_USER_MODEL = 'core.User' 코어모델쓰겠다는뜻
 		on_delete=models.CASCADE,
 	)
+	created_at = models.DateTimeField(auto_now_add=True)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	class Meta:
+		constraints = [
+			models.UniqueConstraint(
+				fields=['user', 'name'],
+				name='core_ingredient_unique_user_name',
+			),
+		]
 
 	def __str__(self):
 		return self.name 
 	#str(ingredient(Ingredient인스턴스))찍으면 name이 대표로 나옴
 
 
+class RecipeChange(models.Model):
+	"""
+	레시피 변경 기록. 모바일 동기화(/recipes/changes/)에서 사용.
+	id로 변경 토큰을 만듦 (recipe/sync.py). 오래된 기록은 prune_recipe_changes로 정리
+	"""
+	UPSERT = 'upsert'
+	DELETE = 'delete'
+	KIND_CHOICES = [(UPSERT, 'Created or updated'), (DELETE, 'Deleted')]
+
+	user = models.ForeignKey(
+		settings.AUTH_USER_MODEL,
+		on_delete=models.CASCADE,
+		db_constraint=False,
+		# 유저 삭제로 레시피가 CASCADE 삭제될 때도 기록이 생기므로 DB 제약은 걸지 않음
+	)
+	recipe_id = models.BigIntegerField()
+	# 삭제된 레시피도 기록해야 해서 FK가 아닌 id만 저장
+	kind = models.CharField(max_length=6, choices=KIND_CHOICES)
+	created_at = models.DateTimeField(auto_now_add=True)
+
+	class Meta:
+		indexes = [
+			models.Index(fields=['user', 'id'], name='core_recipechange_user_id'),
+		]
+
+	def __str__(self):
+		return f'{self.kind} recipe {self.recipe_id}'
+
+
+class ImageUpload(models.Model):
+	"""
+	나눠서 올리는 레시피 사진 업로드 (recipe/uploads.py).
+	받은 조각은 임시 파일에 바로 이어 쓰고, received까지 받았다는 것을 기록해서
+	연결이 끊겨도 클라이언트가 그 위치부터 다시 보낼 수 있게 함
+	"""
+	id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+	# 추측할 수 없는 id. 업로드 url에 들어감
+	user = models.ForeignKey(
+		settings.AUTH_USER_MODEL,
+		on_delete=models.CASCADE,
+	)
+	recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE)
+	filename = models.CharField(max_length=255)
+	# 클라이언트가 보낸 원래 파일 이름 (확장자를 쓰기 위함)
+	size = models.BigIntegerField()
+	# 전체 크기(바이트). 처음에 알려줘야 함
+	received = models.BigIntegerField(default=0)
+	# 지금까지 이어서 받은 크기 = 다음 조각의 offset
+	created_at = models.DateTimeField(auto_now_add=True)
+	updated_at = models.DateTimeField(auto_now=True)
 
+	def __str__(self):
+		return f'{self.filename} ({self.received}/{self.size})'
@@ -0,0 +1,36 @@
+"""
+orjson으로 JSON 요청 본문을 읽는 파서 (REST_FRAMEWORK의 기본 파서).
+다음은 JSONParser로 읽어서 결과와 에러가 JSONParser와 같음:
+- UTF-8이 아닌 본문
+- 19자리 이상 숫자가 있는 본문. orjson은 64비트를 넘는 정수를 float로 읽어서 값이 바뀜
+  (123456789012345678901234567890 -> 1.2345678901234568e+29). 문자열 안의 숫자도 걸리지만 느려질 뿐
+- orjson이 읽지 못한 본문 (잘못된 JSON, NaN, 1e400 등). 에러 메시지도 JSONParser 것
+"""
+import io
+import re
+
+import orjson
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from core.renderers import ORJSONRenderer
+
+LONG_NUMBER = re.compile(rb'\d{19}')
+# 64비트 정수는 -9223372036854775808 ~ 18446744073709551615 (부호 빼고 19~20자리)
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        if not LONG_NUMBER.search(body):
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
+        return super().parse(io.BytesIO(body), media_type, parser_context)
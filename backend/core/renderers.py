@@ -0,0 +1,43 @@
+"""
+orjson으로 JSON 응답을 만드는 렌더러 (REST_FRAMEWORK의 기본 렌더러).
+DRF의 JSONRenderer(표준 json + 파이썬으로 된 JSONEncoder)보다 큰 목록 응답에서 몇 배 빠름.
+
+응답은 JSONRenderer에 맞춤:
+- Decimal, Promise, QuerySet 등 orjson이 모르는 값은 DRF JSONEncoder.default로 바꿈 (Decimal -> float)
+- UTC datetime은 Z로 끝남, 한글 등은 \\u 이스케이프 없이 UTF-8, 구분자는 공백 없이
+- \\u2028, \\u2029는 이스케이프
+바이트까지 같지는 않은 경우:
+- 지수로 쓰는 float는 표기가 다름 (JSONRenderer의 1e+16, 1e-07이 여기서는 1e16, 1e-7). 읽은 값은 같음
+- NaN/Infinity는 JSONRenderer(STRICT_JSON)에서는 에러인데 여기서는 null
+들여쓰기를 요청했거나(브라우저블 API, ?indent) COMPACT_JSON/UNICODE_JSON 설정을 바꿨거나
+orjson이 못 만드는 값(64비트를 넘는 정수 등)이면 JSONRenderer로 만듦.
+"""
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+_default = JSONEncoder().default
+
+
+def dumps(data):
+    """JSONRenderer(압축, UTF-8)와 같은 JSON 바이트"""
+    ret = orjson.dumps(data, default=_default, option=OPTIONS)
+    if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+        ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return ret
+
+
+class ORJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is None and self.compact and not self.ensure_ascii:
+            try:
+                return dumps(data)
+            except orjson.JSONEncodeError:
+                pass
+        return super().render(data, accepted_media_type, renderer_context)
@@ -0,0 +1,55 @@
+"""
+파일 저장소.
+"""
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+
+
+def file_hash(content):
+    """업로드된 파일(장고 File) 내용의 SHA-256. 다 읽은 뒤 처음 위치로 되돌림"""
+    sha = hashlib.sha256()
+    for chunk in content.chunks():
+        sha.update(chunk)
+    content.seek(0)
+    return sha.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    파일 이름을 내용의 해시로 정하는 저장소.
+    upload_to가 만든 경로에서 디렉토리와 확장자만 쓰고 파일 이름은 SHA-256으로 바꿉니다.
+    같은 내용을 다시 올리면 새로 쓰지 않고 이미 있는 파일 이름을 돌려줍니다 (중복 제거).
+    여러 레코드가 같은 파일을 가리킬 수 있으므로, 지울 때는 그 이름을 쓰는 레코드가
+    남아있지 않은지 먼저 확인해야 합니다 (recipe/images.py의 release).
+    """
+
+    def _save(self, name, content):
+        directory = os.path.dirname(name)
+        ext = os.path.splitext(name)[1].lower()
+        final = os.path.join(directory, f'{file_hash(content)}{ext}')
+        if self._touch(final):
+            return final
+
+        tmp = super()._save(name, content)
+        # upload_to가 만든 (uuid) 이름으로 먼저 다 쓴 다음 해시 이름으로 링크.
+        # 같은 파일이 동시에 올라와도 먼저 링크한 쪽이 이기고 내용은 같음
+        try:
+            os.link(self.path(tmp), self.path(final))
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(self.path(tmp))
+        return final
+
+    def _touch(self, name):
+        """
+        name이 이미 있으면 수정 시각을 지금으로 바꾸고 True.
+        방금 지운 사진을 다시 참조한 경우 정리 작업이 지우지 않게 하기 위함 (RECIPE_IMAGE_GC_GRACE)
+        """
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return False
+        return True
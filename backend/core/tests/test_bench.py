@@ -0,0 +1,58 @@
+"""
+Tests for the shared benchmark seeding helpers and the commands that use them.
+"""
+import random
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import OutputWrapper
+from django.test import TestCase
+
+from core.management import bench
+from core.models import Ingredient, Recipe, Tag
+
+
+class BenchHelperTests(TestCase):
+
+    def test_seed_catalog_and_cleanup(self):
+        user = bench.get_user('bench@example.com')
+
+        bench.seed_catalog(
+            OutputWrapper(StringIO()), user, 12, random.Random(0),
+            tags=5, ingredients=10, batch_size=5)
+
+        self.assertEqual(Recipe.objects.filter(user=user).count(), 12)
+        self.assertEqual(Recipe.tags.through.objects.filter(recipe__user=user).count(), 36)
+        self.assertEqual(
+            Recipe.ingredients.through.objects.filter(recipe__user=user).count(), 96)
+
+        bench.cleanup(user)
+
+        self.assertFalse(get_user_model().objects.filter(email='bench@example.com').exists())
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(Tag.objects.exists())
+        self.assertFalse(Ingredient.objects.exists())
+
+    def test_seed_tops_up_existing_recipes(self):
+        """--keep으로 남긴 레시피가 있으면 모자란 만큼만 만듦"""
+        user = bench.get_user('bench@example.com')
+        bench.seed_catalog(OutputWrapper(StringIO()), user, 4, random.Random(0))
+
+        bench.seed_catalog(OutputWrapper(StringIO()), user, 6, random.Random(0))
+
+        self.assertEqual(Recipe.objects.filter(user=user).count(), 6)
+        self.assertEqual(Tag.objects.filter(user=user).count(), 50)
+
+    def test_commands_use_their_own_users(self):
+        """한 명령이 --keep으로 남긴 데이터를 다른 명령이 지우지 않음"""
+        call_command(
+            'bench_filters', recipes=10, tags=5, tags_per_recipe=2, filter_tags=2,
+            queries=2, keep=True, stdout=StringIO())
+
+        call_command('bench_search', recipes=10, queries=2, stdout=StringIO())
+        call_command('bench_json', sizes=[5], repeat=1, stdout=StringIO())
+
+        users = get_user_model().objects.values_list('email', flat=True)
+        self.assertEqual(list(users), ['bench-filters@example.com'])
+        self.assertEqual(Recipe.objects.count(), 10)
@@ -0,0 +1,56 @@
+"""
+Tests for the USE_GIS and shared cache system checks.
+"""
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from core.checks import check_shared_cache, check_use_gis, spatial_fields
+
+
+class UseGisCheckTests(SimpleTestCase):
+
+    def test_no_spatial_fields(self):
+        """지금 모델에는 공간 필드가 없음"""
+        self.assertEqual(spatial_fields(), [])
+
+    @override_settings(USE_GIS=False)
+    def test_plain_backend_without_spatial_fields(self):
+        self.assertEqual(check_use_gis(None), [])
+
+    @override_settings(USE_GIS=True)
+    def test_warns_when_gis_unused(self):
+        self.assertEqual([error.id for error in check_use_gis(None)], ['core.W001'])
+
+    @override_settings(USE_GIS=False)
+    @patch('core.checks.spatial_fields', return_value=['core.Recipe.location'])
+    def test_error_when_spatial_fields_need_gis(self, patched_fields):
+        errors = check_use_gis(None)
+
+        self.assertEqual([error.id for error in errors], ['core.E001'])
+        self.assertIn('core.Recipe.location', errors[0].msg)
+
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+MEMCACHED = {'default': {
+    'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+    'LOCATION': 'memcached:11211',
+}}
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+
+    @override_settings(WEB_CONCURRENCY=1, CACHES=LOCMEM)
+    def test_single_process_can_use_locmem(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+    @override_settings(WEB_CONCURRENCY=5, CACHES=LOCMEM)
+    def test_error_when_workers_do_not_share_cache(self):
+        errors = check_shared_cache(None)
+
+        self.assertEqual([error.id for error in errors], ['core.E002'])
+        self.assertIn('default', errors[0].msg)
+
+    @override_settings(WEB_CONCURRENCY=5, CACHES=MEMCACHED)
+    def test_shared_cache(self):
+        self.assertEqual(check_shared_cache(None), [])
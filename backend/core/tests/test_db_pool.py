@@ -0,0 +1,142 @@
+"""
+Tests for the database connection pool and connection stats.
+"""
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.db.pool import ConnectionPool, PoolTimeout
+
+HEALTH_DB_URL = reverse('health-db')
+
+
+class FakeConnection:
+
+    def __init__(self, number):
+        self.number = number
+        self.usable = True
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+
+    def setUp(self):
+        self.opened = []
+
+    def connect(self):
+        conn = FakeConnection(len(self.opened))
+        self.opened.append(conn)
+        return conn
+
+    def make_pool(self, **kwargs):
+        params = {'size': 2, 'timeout': 0.1, 'check': lambda conn: conn.usable}
+        params.update(kwargs)
+        return ConnectionPool(**params)
+
+    def test_released_connection_is_reused(self):
+        pool = self.make_pool()
+
+        conn = pool.acquire(self.connect)
+        pool.release(conn)
+        again = pool.acquire(self.connect)
+
+        self.assertIs(again, conn)
+        self.assertEqual(len(self.opened), 1)
+        stats = pool.stats.as_dict()
+        self.assertEqual((stats['opened'], stats['reused'], stats['checkouts']), (1, 1, 2))
+
+    def test_unusable_connection_replaced(self):
+        """확인(ping)에 실패한 연결은 닫고 새로 엶"""
+        pool = self.make_pool()
+        conn = pool.acquire(self.connect)
+        pool.release(conn)
+        conn.usable = False
+
+        again = pool.acquire(self.connect)
+
+        self.assertIsNot(again, conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats.as_dict()['health_check_failures'], 1)
+        self.assertEqual(pool.status()['open'], 1)
+
+    def test_idle_connection_expires(self):
+        pool = self.make_pool(max_idle=0)
+        conn = pool.acquire(self.connect)
+        pool.release(conn)
+        time.sleep(0.01)
+
+        self.assertIsNot(pool.acquire(self.connect), conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats.as_dict()['health_check_failures'], 0)
+
+    def test_timeout_when_exhausted(self):
+        pool = self.make_pool()
+        pool.acquire(self.connect)
+        pool.acquire(self.connect)
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(self.connect)
+        self.assertEqual(pool.stats.as_dict()['timeouts'], 1)
+
+    def test_waits_for_released_connection(self):
+        """다 쓰고 있으면 다른 스레드가 돌려줄 때까지 기다림"""
+        pool = self.make_pool(size=1, timeout=5)
+        conn = pool.acquire(self.connect)
+        threading.Timer(0.05, pool.release, args=(conn,)).start()
+
+        self.assertIs(pool.acquire(self.connect), conn)
+        self.assertGreaterEqual(pool.stats.as_dict()['max_wait_seconds'], 0.04)
+
+    def test_unreusable_release_frees_slot(self):
+        """에러가 난 연결은 닫고, 그 자리에 새 연결을 열 수 있음"""
+        pool = self.make_pool(size=1)
+        conn = pool.acquire(self.connect)
+        pool.release(conn, reusable=False)
+
+        again = pool.acquire(self.connect)
+
+        self.assertTrue(conn.closed)
+        self.assertIsNot(again, conn)
+        self.assertEqual(pool.stats.as_dict()['closed'], 1)
+
+    def test_failed_connect_frees_slot(self):
+        pool = self.make_pool(size=1)
+
+        def fail():
+            raise OSError('connection refused')
+
+        with self.assertRaises(OSError):
+            pool.acquire(fail)
+        self.assertEqual(pool.status()['open'], 0)
+        pool.acquire(self.connect)
+
+
+class DatabaseStatsApiTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_admin_only(self):
+        user = get_user_model().objects.create_user('user@example.com', 'testpass123')
+        self.client.force_authenticate(user)
+
+        res = self.client.get(HEALTH_DB_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_stats_for_admin(self):
+        admin = get_user_model().objects.create_superuser('admin@example.com', 'testpass123')
+        self.client.force_authenticate(admin)
+
+        res = self.client.get(HEALTH_DB_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(res.data, dict)
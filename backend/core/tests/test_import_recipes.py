@@ -0,0 +1,124 @@
+"""
+Tests for the import_recipes management command.
+"""
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Recipe, Tag
+
+
+def recipe_row(title, **params):
+    row = {'title': title, 'time_minutes': 10, 'price': '5.00'}
+    row.update(params)
+    return row
+
+
+class ImportRecipesCommandTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('user@example.com', 'testpass123')
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def write(self, filename, content):
+        path = os.path.join(self.directory, filename)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def write_ndjson(self, rows):
+        return self.write('recipes.ndjson', ''.join(json.dumps(row) + '\n' for row in rows))
+
+    def run_import(self, path, *args):
+        out, err = StringIO(), StringIO()
+        call_command(
+            'import_recipes', path, '--user', self.user.email, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_ndjson(self):
+        """테그/재료는 이름만 보내도 되고, 잘못된 줄은 줄 번호와 함께 건너뜀"""
+        path = self.write_ndjson([
+            recipe_row('Curry', tags=['Dinner'], ingredients=[{'name': 'Rice'}]),
+            recipe_row('', tags=['Dinner']),
+            recipe_row('Soup', tags=['Dinner', 'Vegan']),
+        ])
+
+        out, err = self.run_import(path)
+
+        self.assertIn('Imported 2 recipes', out)
+        self.assertIn('1 invalid rows skipped', out)
+        self.assertIn('line 2:', err)
+        self.assertEqual(
+            sorted(Recipe.objects.filter(user=self.user).values_list('title', flat=True)),
+            ['Curry', 'Soup'])
+        self.assertEqual(Tag.objects.filter(user=self.user, name='Dinner').count(), 1)
+        soup = Recipe.objects.get(title='Soup')
+        self.assertEqual(sorted(soup.tags.values_list('name', flat=True)), ['Dinner', 'Vegan'])
+
+    def test_import_csv(self):
+        """내보내기(CSV)와 같은 형식"""
+        path = self.write('recipes.csv', (
+            'id,title,time_minutes,price,link,description,tags,ingredients,image\n'
+            '7,Curry,10,5.00,,,Dinner|Spicy,Rice|Curry powder,\n'
+        ))
+
+        self.run_import(path)
+
+        recipe = Recipe.objects.get(user=self.user)
+        self.assertEqual(recipe.title, 'Curry')
+        self.assertEqual(sorted(recipe.tags.values_list('name', flat=True)), ['Dinner', 'Spicy'])
+        self.assertEqual(
+            sorted(recipe.ingredients.values_list('name', flat=True)), ['Curry powder', 'Rice'])
+
+    def test_import_csv_unescapes_formulas(self):
+        """내보내기가 수식 앞에 붙인 ' 는 떼고 가져옴"""
+        path = self.write('recipes.csv', (
+            'id,title,time_minutes,price,link,description,tags,ingredients,image\n'
+            "7,'=1+2,10,5.00,,''-quoted,'@Dinner|Spicy,'apostrophe,\n"
+        ))
+
+        self.run_import(path)
+
+        recipe = Recipe.objects.get(user=self.user)
+        self.assertEqual(recipe.title, '=1+2')
+        self.assertEqual(recipe.description, "'-quoted")
+        self.assertEqual(sorted(recipe.tags.values_list('name', flat=True)), ['@Dinner', 'Spicy'])
+        self.assertEqual(recipe.ingredients.get().name, "'apostrophe")
+
+    def test_resume_from_checkpoint(self):
+        """체크포인트에 기록된 줄 다음부터 이어서 가져옴"""
+        path = self.write_ndjson([recipe_row(f'Recipe {i}') for i in range(5)])
+        checkpoint = os.path.join(self.directory, 'import.ckpt')
+        with open(checkpoint, 'w') as f:
+            f.write('3')
+
+        out, _ = self.run_import(path, '--checkpoint', checkpoint, '--batch-size', '2')
+
+        self.assertIn('resuming after 3 rows', out)
+        self.assertEqual(
+            sorted(Recipe.objects.values_list('title', flat=True)), ['Recipe 3', 'Recipe 4'])
+        with open(checkpoint) as f:
+            self.assertEqual(f.read(), '5')
+
+    def test_known_names_not_queried_again(self):
+        """이전 배치에서 찾은 테그 이름은 다음 배치에서 다시 조회하지 않음"""
+        def tag_queries(tag, batch_size):
+            rows = [recipe_row(f'{tag} {i}', tags=[tag]) for i in range(4)]
+            with CaptureQueriesContext(connection) as queries:
+                self.run_import(self.write_ndjson(rows), '--batch-size', str(batch_size))
+            return [q for q in queries if 'FROM "core_tag"' in q['sql']]
+
+        one_per_batch = tag_queries('Dinner', 1)
+        self.assertTrue(one_per_batch)
+        self.assertEqual(len(one_per_batch), len(tag_queries('Lunch', 4)))
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(Recipe.objects.filter(user=self.user, tags__name='Dinner').count(), 4)
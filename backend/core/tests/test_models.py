@@ -3,6 +3,7 @@ Tests for models.
 """
 from unittest.mock import patch
 from decimal import Decimal
+from django.db import IntegrityError
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -72,6 +73,16 @@ class ModelTests(TestCase):
         tag = models.Tag.objects.create(user=user, name='Tag1')
         self.assertEqual(str(tag), tag.name)
 
+    def test_tag_name_unique_per_user(self):
+        """한 유저는 같은 이름의 테그를 두개 만들 수 없음. 다른 유저는 가능"""
+        user = create_user()
+        other = create_user(email='other@example.com')
+        models.Tag.objects.create(user=user, name='Vegan')
+        models.Tag.objects.create(user=other, name='Vegan')
+
+        with self.assertRaises(IntegrityError):
+            models.Tag.objects.create(user=user, name='Vegan')
+
     # step 1
     def test_create_ingredient(self):
         user = create_user()
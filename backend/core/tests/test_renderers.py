@@ -0,0 +1,107 @@
+"""
+Tests for the orjson renderer and parser.
+"""
+import datetime
+import io
+import json
+import uuid
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+
+SEOUL = datetime.timezone(datetime.timedelta(hours=9))
+
+
+def sample_payload():
+    return {
+        'count': 2,
+        'next': None,
+        'results': [
+            {
+                'id': 1,
+                'title': '김치찌개\u2028',
+                'price': Decimal('5.50'),
+                'tags': [{'id': 3, 'name': 'Dinner'}],
+                'created': datetime.datetime(2024, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc),
+                'updated': datetime.datetime(2024, 1, 2, 12, 0, tzinfo=SEOUL),
+                'naive': datetime.datetime(2024, 1, 2, 3, 4, 5),
+                'day': datetime.date(2024, 1, 2),
+                'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+                'label': gettext_lazy('Recipe'),
+                'ratio': 0.1,
+                'counts': {1: 'one'},
+            },
+        ],
+    }
+
+
+class ORJSONRendererTests(SimpleTestCase):
+
+    def test_same_output_as_json_renderer(self):
+        """Decimal, datetime 등도 JSONRenderer와 바이트까지 같음"""
+        data = sample_payload()
+
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indent_falls_back_to_json_renderer(self):
+        data = sample_payload()
+        media_type = 'application/json; indent=4'
+
+        self.assertEqual(
+            ORJSONRenderer().render(data, media_type),
+            JSONRenderer().render(data, media_type))
+
+    def test_none_renders_empty(self):
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_exponent_float_format_differs(self):
+        """지수 표기는 JSONRenderer와 다르지만 읽으면 같은 값"""
+        data = {'big': 1e16, 'small': 1e-7}
+
+        rendered = ORJSONRenderer().render(data)
+
+        self.assertEqual(rendered, b'{"big":1e16,"small":1e-7}')
+        self.assertEqual(json.loads(rendered), json.loads(JSONRenderer().render(data)))
+
+    def test_nan_renders_null(self):
+        """JSONRenderer(STRICT_JSON)는 NaN을 거부하지만 orjson은 null로"""
+        with self.assertRaises(ValueError):
+            JSONRenderer().render({'ratio': float('nan')})
+
+        self.assertEqual(ORJSONRenderer().render({'ratio': float('nan')}), b'{"ratio":null}')
+
+
+class ORJSONParserTests(SimpleTestCase):
+
+    def parse(self, body):
+        return ORJSONParser().parse(io.BytesIO(body))
+
+    def test_parse(self):
+        body = '{"title": "김치찌개", "price": "5.50", "tags": [{"name": "Dinner"}]}'.encode()
+
+        self.assertEqual(self.parse(body), JSONParser().parse(io.BytesIO(body)))
+
+    def test_invalid_json(self):
+        with self.assertRaisesMessage(ParseError, 'JSON parse error - '):
+            self.parse(b'{"title": ')
+
+    def test_big_integers_parsed_exactly(self):
+        """64비트를 넘는 정수는 float가 되지 않게 JSONParser로 읽음"""
+        for number in (123456789012345678901234567890, -9223372036854775809, 2 ** 64):
+            body = f'{{"id": {number}}}'.encode()
+
+            self.assertEqual(self.parse(body), {'id': number})
+            self.assertIsInstance(self.parse(body)['id'], int)
+
+    def test_nan_rejected(self):
+        """JSONParser(STRICT_JSON)처럼 NaN은 받지 않음"""
+        with self.assertRaises(ParseError):
+            self.parse(b'{"price": NaN}')
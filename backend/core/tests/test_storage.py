@@ -0,0 +1,83 @@
+"""
+Tests for content-addressed storage and image garbage collection.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from core.models import Recipe
+from core.storage import ContentAddressedStorage
+
+
+class ContentAddressedStorageTests(SimpleTestCase):
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.storage = ContentAddressedStorage(location=self.location)
+
+    def tearDown(self):
+        shutil.rmtree(self.location, ignore_errors=True)
+
+    def test_name_is_content_hash(self):
+        """파일 이름은 내용의 해시, 확장자는 소문자"""
+        name = self.storage.save('recipe/upload.JPG', ContentFile(b'photo'))
+
+        self.assertEqual(name, f'recipe/{hashlib.sha256(b"photo").hexdigest()}.jpg')
+        with self.storage.open(name) as f:
+            self.assertEqual(f.read(), b'photo')
+
+    def test_same_content_stored_once(self):
+        first = self.storage.save('recipe/a.jpg', ContentFile(b'photo'))
+        second = self.storage.save('recipe/b.jpg', ContentFile(b'photo'))
+        other = self.storage.save('recipe/c.jpg', ContentFile(b'other photo'))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.location, 'recipe'))), sorted([
+            os.path.basename(first), os.path.basename(other)]))
+
+
+class GarbageCollectCommandTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        override = self.settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+        user = get_user_model().objects.create_user('user@example.com', 'testpass123')
+        self.recipe = Recipe.objects.create(
+            user=user, title='Recipe', time_minutes=5, price=Decimal('1.00'))
+        self.recipe.image.save('used.jpg', ContentFile(b'used'))
+        self.orphan = self.recipe.image.storage.save(
+            'static/recipe/orphan.jpg', ContentFile(b'orphan photo'))
+
+    def test_deletes_unreferenced_files(self):
+        out = StringIO()
+        call_command('gc_recipe_images', '--grace', '0', '--dry-run', stdout=out)
+
+        self.assertIn('Would delete 1 unused files (12 bytes)', out.getvalue())
+        self.assertTrue(self.recipe.image.storage.exists(self.orphan))
+
+        out = StringIO()
+        call_command('gc_recipe_images', '--grace', '0', stdout=out)
+
+        self.assertIn('Deleted 1 unused files (12 bytes reclaimed)', out.getvalue())
+        self.assertFalse(self.recipe.image.storage.exists(self.orphan))
+        self.assertTrue(self.recipe.image.storage.exists(self.recipe.image.name))
+
+    def test_recent_files_kept(self):
+        out = StringIO()
+        call_command('gc_recipe_images', '--grace', '3600', stdout=out)
+
+        self.assertIn('Deleted 0 unused files (0 bytes reclaimed)', out.getvalue())
+        self.assertTrue(self.recipe.image.storage.exists(self.orphan))
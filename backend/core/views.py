@@ -0,0 +1,27 @@
+"""
+core의 뷰 (운영 확인용)
+"""
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework import permissions
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.db import pool
+from user.authentication import CachedTokenAuthentication
+
+
+class DatabaseStatsView(APIView):
+	"""
+	이 프로세스의 DB 연결 통계 (core/db/pool.py). 관리자만
+	opened/closed가 요청 수만큼 늘면 연결을 다시 쓰지 못하고 있는 것이고,
+	wait_seconds/checkouts(평균 대기)가 길면 DB_POOL_SIZE를 늘려야 함
+	"""
+	authentication_classes = [CachedTokenAuthentication, SessionAuthentication]
+	# 관리자 화면에 로그인한 브라우저에서도 볼 수 있게
+	permission_classes = [permissions.IsAdminUser]
+
+	@extend_schema(responses=OpenApiTypes.OBJECT)
+	def get(self, request):
+		return Response(pool.snapshot())
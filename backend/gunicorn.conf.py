@@ -0,0 +1,73 @@
+"""
+운영용 서버 설정 (gunicorn). docker-compose의 backend는 runserver 대신 이걸로 뜹니다.
+
+    gunicorn -c gunicorn.conf.py                     # app.wsgi, 스레드 워커 (기본)
+    SERVER_MODE=asgi gunicorn -c gunicorn.conf.py    # app.asgi, uvicorn 워커
+
+워커 수/스레드 수는 CPU 수에서 정하고 환경변수로 바꿀 수 있습니다.
+- WEB_CONCURRENCY: 워커 프로세스 수 (기본 CPU * 2 + 1, asgi는 CPU + 1)
+  2 이상이면 공용 캐시(CACHE_BACKEND)가 있어야 워커가 뜸 (core.E002)
+- GUNICORN_THREADS: 워커당 스레드 수 (wsgi만, 기본 4). 요청 대부분이 DB/파일을 기다리므로
+  프로세스를 늘리는 것보다 메모리를 적게 쓰고 동시에 처리하는 요청 수를 늘림
+  DB 연결 풀(DB_POOL_SIZE)을 쓰면 풀 크기를 스레드 수 이상으로
+- BIND: 기본 0.0.0.0:8000
+- FORWARDED_ALLOW_IPS: X-Forwarded-* 헤더를 믿을 프록시(nginx) 주소, 쉼표로 구분 (기본 127.0.0.1)
+
+코드를 배포하거나 설정을 바꾼 뒤에는 `docker compose kill -s HUP backend`
+(마스터에 SIGHUP)로 받은 요청을 끊지 않고 워커를 새로 띄웁니다.
+그래서 preload_app은 쓰지 않음 (미리 읽은 코드는 HUP으로 바뀌지 않음)
+"""
+import multiprocessing
+import os
+
+cpus = multiprocessing.cpu_count()
+mode = os.environ.get('SERVER_MODE', 'wsgi')
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+if mode == 'asgi':
+    wsgi_app = 'app.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    workers = int(os.environ.get('WEB_CONCURRENCY', cpus + 1))
+    # 이벤트 루프가 동시 요청을 처리하므로 워커는 CPU 수만큼.
+    # Django 3.2에서 동기 뷰는 워커마다 스레드 하나에서 차례로 돌기 때문에 기본은 wsgi
+else:
+    wsgi_app = 'app.wsgi:application'
+    worker_class = 'gthread'
+    workers = int(os.environ.get('WEB_CONCURRENCY', cpus * 2 + 1))
+    threads = int(os.environ.get('GUNICORN_THREADS', 4))
+os.environ['WEB_CONCURRENCY'] = str(workers)
+# settings.WEB_CONCURRENCY. 워커가 2개 이상이면 공용 캐시(CACHE_BACKEND)가 있어야 함
+
+keepalive = 75
+# nginx upstream의 keepalive_timeout(60초)보다 길게. 짧으면 nginx가 쓰려던 연결을 서버가 먼저 닫음
+timeout = 60
+graceful_timeout = 30
+# 종료/HUP 때 처리 중인 요청(내보내기 등)을 기다리는 시간. docker-compose의 stop_grace_period보다 짧게
+max_requests = 2000
+max_requests_jitter = 200
+# 메모리가 조금씩 늘어나는 것을 막기 위해 워커를 가끔 새로 띄움. 한꺼번에 재시작하지 않도록 jitter
+
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+    # 워커 heartbeat 파일. 도커의 overlay 파일시스템에 쓰면 가끔 멈춰서 워커가 죽음
+forwarded_allow_ips = os.environ.get('FORWARDED_ALLOW_IPS', '127.0.0.1')
+# X-Forwarded-* 를 믿는 주소 (nginx). 다른 곳에서 바로 온 요청의 헤더는 믿지 않음 (https 여부, 서명한 사진 URL 등)
+# docker-compose는 nginx 컨테이너의 고정 주소를 넘겨줌
+accesslog = '-'
+errorlog = '-'
+
+
+def post_worker_init(worker):
+    # gunicorn은 manage.py와 달리 시스템 체크를 돌리지 않으므로 캐시 설정은 여기서 확인.
+    # 여기서 예외가 나면 워커가 뜨지 못하고 마스터도 멈춤
+    from django.core import checks
+    errors = [e for e in checks.run_checks(tags=[checks.Tags.caches]) if e.is_serious()]
+    if errors:
+        raise RuntimeError('\n'.join(str(error) for error in errors))
+
+    # 이전 워커가 끝나면서 잃어버린 사진 처리 작업을 다시 예약 (recipe/images.py)
+    from recipe import images
+    try:
+        images.requeue_stale()
+    except Exception:
+        worker.log.exception('Could not requeue pending recipe images')
@@ -0,0 +1,68 @@
+"""
+ASGI(app.asgi, SERVER_MODE=asgi)용 레시피 읽기 뷰.
+
+sync 뷰를 ASGI로 띄우면 Django가 워커마다 스레드 하나에서 요청을 차례로 처리하므로
+DB/사진을 기다리는 요청 하나가 그 워커의 다른 요청을 모두 막습니다.
+여기서는 레시피 목록/상세, 테그/재료 목록을 async 뷰로 두고, 요청 하나의 DB 조회와 직렬화를
+RECIPE_ASYNC_THREADS개짜리 스레드 풀에서 실행합니다. 이벤트 루프는 그동안 다른 요청과
+느린 클라이언트의 송수신을 처리함.
+
+Django 3.2에는 async ORM(aget, async for)이 없으므로 ORM은 스레드에서 씁니다.
+뷰는 views.py의 것을 그대로 실행하므로 인증, 필터, 캐시, ETag 등 응답은 sync 뷰와 같음.
+
+그래서 워커 하나가 동시에 처리하는 요청은 RECIPE_ASYNC_THREADS개(기본 DB_POOL_SIZE, 없으면 8)까지이고,
+나머지는 연결만 받아 둔 채 스레드 풀의 큐에서 기다립니다. 서버 전체로는 워커 수 * 스레드 수.
+DB를 기다리는 시간이 길 때만 이득이고(쿼리 20ms에서 sync 58 -> async 74 req/s),
+그보다 빠르면 스레드를 오가는 만큼 sync 뷰보다 느려서(쿼리 5ms 90 -> 78, 지연 없음 105 -> 80)
+RECIPE_ASYNC_VIEWS=1로 켤 때만 씁니다. sync/async 비교:
+
+    SERVER_MODE=asgi gunicorn -c gunicorn.conf.py
+    SERVER_MODE=asgi RECIPE_ASYNC_VIEWS=1 gunicorn -c gunicorn.conf.py
+    python manage.py loadtest --concurrency 64 --duration 20
+"""
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import re_path
+
+ASYNC_ROUTES = ['recipe-list', 'recipe-detail', 'tag-list', 'ingredient-list']
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.RECIPE_ASYNC_THREADS, thread_name_prefix='recipe-async')
+# 스레드마다 DB 연결을 하나씩 쓰므로 기본은 DB_POOL_SIZE. 워커 수 * 스레드 수가 MySQL max_connections보다 작게
+
+
+def _run(view, request, *args, **kwargs):
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render') and not response.is_rendered:
+            response.render()
+            # 직렬화한 결과를 JSON으로 바꾸는 것까지 스레드에서
+        return response
+    finally:
+        close_old_connections()
+        # 요청이 끝날 때 sync 뷰에서 하듯 이 스레드의 연결을 정리 (CONN_MAX_AGE, 풀에 돌려줌)
+
+
+def as_async(view):
+    """sync 뷰(DRF as_view)를 스레드 풀에서 실행하는 async 뷰로"""
+    run = sync_to_async(_run, thread_sensitive=False, executor=_executor)
+
+    async def async_view(request, *args, **kwargs):
+        return await run(view, request, *args, **kwargs)
+
+    functools.update_wrapper(async_view, view)
+    # csrf_exempt, cls, actions 등을 그대로 (스키마 생성, CSRF 검사)
+    return async_view
+
+
+def async_urls(urls):
+    """라우터의 url 중 ASYNC_ROUTES만 같은 경로/이름의 async 뷰로 바꿈"""
+    return [
+        re_path(url.pattern.regex.pattern, as_async(url.callback), name=url.name)
+        if url.name in ASYNC_ROUTES else url
+        for url in urls
+    ]
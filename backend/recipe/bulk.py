@@ -0,0 +1,232 @@
+"""
+여러 개를 한꺼번에 처리하는 함수들.
+- 테그/재료를 이름으로 한꺼번에 찾거나 만들기 (resolve_by_name)
+  하나씩 get_or_create 하면 항목 수 만큼 DB를 왕복하기 때문에
+  조회 1번 + 없는 것 bulk_create 1번 + 재조회 1번으로 끝냅니다.
+- 레시피 여러 개 생성/수정/삭제 (/recipes/bulk/, 가져오기 작업용)
+  레시피와 through 테이블을 bulk_create로 넣고, 시그널이 레시피마다 하던 일
+  (변경 기록, 캐시 무효화, 비트맵 인덱스)은 끝에 한번에 합니다.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from core.models import Ingredient, Recipe, RecipeChange, Tag
+from recipe import facets
+from recipe.cache import bump_generation
+from recipe.sync import record_changes
+
+BATCH_SIZE = 1000
+RELATION_MODELS = {'tags': Tag, 'ingredients': Ingredient}
+
+
+class BulkConflict(Exception):
+    """
+    같은 유저의 레시피가 동시에 만들어져서 새 id를 알아낼 수 없음. 다시 시도하면 됨.
+    API로 만드는 레시피는 lock_recipe_inserts로 차례로 들어가므로 admin 등에서 만들 때만 생김
+    """
+
+
+def lock_recipe_inserts(user):
+    """
+    유저 행을 잠가서 같은 유저의 레시피 INSERT를 트랜잭션이 끝날 때까지 차례로 하게 합니다.
+    MySQL에서 bulk INSERT의 id를 '넣기 전 마지막 id보다 큰 이 유저의 레시피'로 알아내기 위함.
+    Django의 MySQL 연결은 READ COMMITTED라서 잠그지 않으면 그 사이 커밋된 레시피도 보임.
+    id를 돌려주는 DB(PostgreSQL, SQLite)에서는 필요 없으므로 아무것도 안함
+    """
+    if not connection.features.can_return_rows_from_bulk_insert:
+        list(get_user_model().objects.select_for_update().filter(pk=user.pk).values_list('pk'))
+
+
+def _index_by_name(objs):
+    """
+    이름 -> 객체 사전을 만듭니다. 같은 이름이 여러 개면 먼저 만들어진(id 작은) 것.
+    MySQL은 대소문자를 구분하지 않고 비교하므로 casefold 한 이름으로도 찾을 수 있게 함.
+    """
+    exact = {}
+    folded = {}
+    for obj in sorted(objs, key=lambda o: o.id):
+        exact.setdefault(obj.name, obj)
+        folded.setdefault(obj.name.casefold(), obj)
+    return exact, folded
+
+
+def _lookup(index, name):
+    exact, folded = index
+    return exact.get(name) or folded.get(name.casefold())
+
+
+def resolve_by_name(model, user, items):
+    """
+    items([{'name': 'Thai'}, ...])에 해당하는 model(Tag, Ingredient) 객체 목록을 반환합니다.
+    없는 이름은 새로 만들고, 중복된 이름은 한번만 반환합니다. (입력 순서 유지)
+    """
+    names = list(dict.fromkeys(item['name'] for item in items))
+    if not names:
+        return []
+
+    manager = model._default_manager
+    index = _index_by_name(manager.filter(user=user, name__in=names))
+    missing = [name for name in names if _lookup(index, name) is None]
+
+    if missing:
+        # 동시에 같은 이름을 만드는 요청이 있어도 에러 없이 넘어가고 다시 조회
+        manager.bulk_create(
+            [model(user=user, name=name) for name in missing],
+            ignore_conflicts=True,
+        )
+        index = _index_by_name(manager.filter(user=user, name__in=names))
+
+    resolved = []
+    for name in names:
+        obj = _lookup(index, name)
+        if obj not in resolved:
+            resolved.append(obj)
+    return resolved
+
+
+def _through(relation):
+    field = Recipe._meta.get_field(relation)
+    return field.remote_field.through, f'{field.m2m_reverse_field_name()}_id'
+
+
+def _insert_recipes(user, recipes):
+    """recipes를 bulk_create하고 id를 채움"""
+    if connection.features.can_return_rows_from_bulk_insert:
+        return Recipe.objects.bulk_create(recipes, batch_size=BATCH_SIZE)
+
+    # MySQL은 여러 줄 INSERT의 id를 돌려주지 않음.
+    # 한 INSERT 안의 id는 넣은 순서대로 커지므로 넣기 전 마지막 id보다 큰 이 유저의 레시피 = 방금 넣은 레시피.
+    # 레시피 하나 만들기(RecipeSerializer.create)도 같은 잠금을 잡으므로 그 사이에 끼어들 수 없음.
+    # 잠그지 않고 만드는 곳(admin 등)에서 끼어들었으면 개수가 달라지므로 롤백
+    lock_recipe_inserts(user)
+    last_id = Recipe.objects.filter(user=user).aggregate(last=Max('id'))['last'] or 0
+    Recipe.objects.bulk_create(recipes, batch_size=BATCH_SIZE)
+    ids = list(
+        Recipe.objects.filter(user=user, id__gt=last_id)
+        .order_by('id').values_list('id', flat=True)
+    )
+    if len(ids) != len(recipes):
+        raise BulkConflict('Recipes were created concurrently; retry the request.')
+    for recipe, pk in zip(recipes, ids):
+        recipe.pk = pk
+    return recipes
+
+
+def _resolve_ids(user, relation, names, known):
+    """
+    이름 -> id 사전. known(이전 배치에서 찾은 이름 -> id)에 있는 이름은 DB에서 찾지 않고,
+    새로 찾거나 만든 이름은 known에 넣어둠
+    """
+    missing = [{'name': name} for name in dict.fromkeys(names) if name not in known]
+    if missing:
+        index = _index_by_name(resolve_by_name(RELATION_MODELS[relation], user, missing))
+        for item in missing:
+            known[item['name']] = _lookup(index, item['name']).pk
+    return known
+
+
+def _set_relations(user, relation, changes, created=False, known=None):
+    """
+    changes([(레시피, [{'name': ...}, ...]), ...])대로 레시피들의 relation 연결을 맞춤.
+    이름은 한번에 찾거나 만들고, 연결은 바뀐 것만 지우고 bulk_create.
+    created면 방금 만든 레시피라 지금 연결은 읽지 않음
+    """
+    if not changes:
+        return
+    Through, target = _through(relation)
+    ids = _resolve_ids(
+        user, relation,
+        [item['name'] for _, items in changes for item in items],
+        {} if known is None else known,
+    )
+    desired = {
+        (recipe.pk, ids[item['name']])
+        for recipe, items in changes for item in items
+    }
+
+    current = {} if created else {
+        (recipe_id, target_id): pk
+        for pk, recipe_id, target_id in Through.objects.filter(
+            recipe_id__in=[recipe.pk for recipe, _ in changes],
+        ).values_list('pk', 'recipe_id', target)
+    }
+    removed = [pk for pair, pk in current.items() if pair not in desired]
+    if removed:
+        Through.objects.filter(pk__in=removed).delete()
+    Through.objects.bulk_create(
+        [Through(recipe_id=recipe_id, **{target: target_id})
+         for recipe_id, target_id in sorted(desired) if (recipe_id, target_id) not in current],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def _changed(user, recipe_ids, kind=RecipeChange.UPSERT):
+    # 시그널 대신: 변경 기록 + 응답 캐시 무효화 + 비트맵 인덱스는 버리고 다시 만듦
+    record_changes(user.pk, recipe_ids, kind)
+    bump_generation(user.pk)
+    facets.update(user.pk)
+
+
+@transaction.atomic
+def create_recipes(user, items, known_names=None):
+    """
+    items(시리얼라이저의 validated_data 목록)로 레시피를 만들고 만든 레시피 목록을 반환.
+    테그/재료 이름 조회와 INSERT가 항목 수와 상관없이 몇 번으로 끝남.
+    known_names({'tags': {이름: id}, 'ingredients': {...}})를 주면 여러 번 호출할 때
+    이미 찾은 이름은 다시 조회하지 않음 (import_recipes 명령)
+    """
+    known_names = {} if known_names is None else known_names
+    recipes = [
+        Recipe(user=user, **{
+            key: value for key, value in data.items() if key not in RELATION_MODELS})
+        for data in items
+    ]
+    _insert_recipes(user, recipes)
+
+    for relation in RELATION_MODELS:
+        _set_relations(user, relation, [
+            (recipe, data[relation])
+            for recipe, data in zip(recipes, items) if data.get(relation)
+        ], created=True, known=known_names.setdefault(relation, {}))
+    _changed(user, [recipe.pk for recipe in recipes])
+    return recipes
+
+
+@transaction.atomic
+def update_recipes(user, changes):
+    """
+    changes([(레시피, validated_data), ...])대로 수정. 보낸 필드만 바꿈(PATCH).
+    tags/ingredients를 보내면 그 목록으로 맞춤
+    """
+    now = timezone.now()
+    fields = {'updated_at'}
+    for recipe, data in changes:
+        for attr, value in data.items():
+            if attr not in RELATION_MODELS:
+                setattr(recipe, attr, value)
+                fields.add(attr)
+        recipe.updated_at = now
+        # bulk_update는 auto_now를 채우지 않음
+    recipes = [recipe for recipe, _ in changes]
+    Recipe.objects.bulk_update(recipes, sorted(fields), batch_size=BATCH_SIZE)
+
+    for relation in RELATION_MODELS:
+        _set_relations(user, relation, [
+            (recipe, data[relation]) for recipe, data in changes if relation in data
+        ])
+    _changed(user, [recipe.pk for recipe in recipes])
+    return recipes
+
+
+@transaction.atomic
+def delete_recipes(user, recipe_ids):
+    """
+    user의 레시피 중 recipe_ids를 지우고 지운 id 목록을 반환.
+    사진 파일 정리 등은 시그널(recipe/signals.py)에서 레시피마다 처리됨
+    """
+    queryset = Recipe.objects.filter(user=user, pk__in=recipe_ids)
+    deleted = list(queryset.values_list('pk', flat=True))
+    queryset.delete()
+    return deleted
@@ -0,0 +1,112 @@
+"""
+레시피 조회 응답 캐시와 조건부 요청(ETag, Last-Modified) 처리.
+유저마다 세대(generation) 번호를 두고, 그 유저의 레시피/테그/재료가 바뀌면
+번호를 올립니다. 캐시 키에 번호가 들어가므로 예전 응답은 자연스럽게 안 쓰이게 됩니다.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max
+from django.utils.cache import parse_etags
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def _cache():
+    return caches[settings.RECIPE_CACHE]
+
+
+def _generation_key(user_id):
+    return f'recipe:gen:{user_id}'
+
+
+def _new_generation():
+    # 캐시에서 번호가 지워졌다가 다시 만들어져도 예전 번호와 겹치지 않게 시간으로 시작
+    return int(time.time() * 1000)
+
+
+def get_generation(user_id):
+    cache = _cache()
+    generation = cache.get(_generation_key(user_id))
+    if generation is None:
+        cache.add(_generation_key(user_id), _new_generation(), None)
+        generation = cache.get(_generation_key(user_id))
+    return generation
+
+
+def bump_generation(user_id):
+    """user_id의 캐시된 응답을 모두 무효화"""
+    cache = _cache()
+    try:
+        cache.incr(_generation_key(user_id))
+    except ValueError:
+        # 아직 번호가 없으면 새로 만듦
+        cache.set(_generation_key(user_id), _new_generation(), None)
+
+
+class CachedReadMixin:
+    """
+    list/retrieve 응답을 유저별로 캐시하고 ETag/Last-Modified를 붙여주는 뷰셋 믹스인.
+    ETag는 조회 대상의 MAX(updated_at)과 개수로 만들기 때문에, 집계 쿼리 한번으로
+    바뀌었는지 알 수 있습니다. 바뀌지 않았으면 조회/직렬화 없이 304를 반환합니다.
+    """
+    last_modified_field = 'updated_at'
+
+    def _conditional_stats(self):
+        """(마지막 수정 시각, 개수). 상세 조회면 그 객체 하나만 집계"""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            queryset = queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        stats = queryset.order_by().aggregate(
+            last_modified=Max(self.last_modified_field),
+            count=Count('pk'),
+        )
+        return stats['last_modified'], stats['count']
+
+    def _not_modified_since(self, request, last_modified):
+        if last_modified is None or 'HTTP_IF_NONE_MATCH' in request.META:
+            # If-None-Match가 있으면 If-Modified-Since는 무시 (RFC 7232)
+            return False
+        since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+        return since is not None and int(last_modified.timestamp()) <= since
+
+    def cached_response(self, request, build_response):
+        detail = (self.lookup_url_kwarg or self.lookup_field) in self.kwargs
+        last_modified, count = self._conditional_stats()
+        # 같은 주소라도 호스트/응답형식(json, api)이 다르면 다른 응답
+        digest = hashlib.sha1('|'.join([
+            request.build_absolute_uri(),
+            request.accepted_media_type,
+            last_modified.isoformat() if last_modified else '',
+            str(count),
+        ]).encode()).hexdigest()
+        etag = f'"{digest[:32]}"'
+
+        headers = {'ETag': etag}
+        if detail and last_modified is not None:
+            # 목록은 삭제되어도 MAX(updated_at)이 그대로일 수 있어서 ETag(개수 포함)만 사용
+            headers['Last-Modified'] = http_date(last_modified.timestamp())
+
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')) or (
+                detail and self._not_modified_since(request, last_modified)):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        user_id = request.user.pk
+        key = f'recipe:resp:{user_id}:{get_generation(user_id)}:{digest}'
+        data = _cache().get(key)
+        if data is None:
+            response = build_response()
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            _cache().set(key, response.data, settings.RECIPE_CACHE_TIMEOUT)
+        else:
+            response = Response(data)
+
+        for header, value in headers.items():
+            response[header] = value
+        return response
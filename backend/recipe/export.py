@@ -0,0 +1,110 @@
+"""
+레시피 전체 내보내기 (/recipes/export/?format=ndjson|csv).
+전체 목록을 메모리에서 한번에 직렬화하지 않고, id 순으로 CHUNK_SIZE개씩(keyset) 읽어서
+직렬화한 만큼 바로 보냅니다. 청크마다 테그/재료를 prefetch 하므로 쿼리는 청크당 3번이고,
+메모리는 레시피 수와 상관없이 청크 하나만큼만 씁니다.
+
+ASGI(SERVER_MODE=asgi)에서는 스트리밍하지 않고 spool()로 임시 파일에 다 만든 뒤 보냅니다.
+Django 3.2의 ASGI 핸들러는 스트리밍 응답을 이벤트 루프에서 동기로 읽어서, 청크를 읽는 ORM 쿼리가
+SynchronousOnlyOperation으로 실패하기 때문 (async 스트리밍은 Django 4.2부터)
+"""
+import csv
+import io
+import json
+import tempfile
+
+from rest_framework.utils.encoders import JSONEncoder
+
+CHUNK_SIZE = 500
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+# spool()에서 이 크기까지는 메모리, 넘으면 디스크의 임시 파일
+
+CSV_FIELDS = [
+    'id', 'title', 'time_minutes', 'price', 'link', 'description',
+    'tags', 'ingredients', 'image',
+]
+CSV_LIST_SEPARATOR = '|'
+# 테그/재료 이름은 한 칸에 | 로 이어서 씀
+CSV_TEXT_FIELDS = ('title', 'link', 'description', 'tags', 'ingredients')
+# 유저가 쓴 글자가 들어가는 칸. 스프레드시트가 수식으로 실행하지 않게 csv_escape
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def iter_chunks(queryset, chunk_size=None):
+    """queryset을 id 순으로 chunk_size개씩. OFFSET 없이 마지막 id 다음부터 읽음"""
+    chunk_size = chunk_size or CHUNK_SIZE
+    queryset = queryset.order_by('id')
+    last_id = 0
+    while True:
+        chunk = list(queryset.filter(id__gt=last_id)[:chunk_size])
+        if chunk:
+            yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1].pk
+
+
+def _serialized(queryset, serializer_class, context):
+    for chunk in iter_chunks(queryset):
+        yield serializer_class(chunk, many=True, context=context).data
+
+
+def ndjson_lines(queryset, serializer_class, context):
+    """한 줄에 레시피 하나 (JSON). 청크마다 한번에 보냄"""
+    for data in _serialized(queryset, serializer_class, context):
+        yield ''.join(
+            json.dumps(item, cls=JSONEncoder, ensure_ascii=False) + '\n' for item in data)
+
+
+def csv_escape(value):
+    """
+    =, +, -, @, 탭, CR로 시작하는 칸은 앞에 '를 붙여서 스프레드시트가 수식으로 실행하지 않게 함 (CSV injection).
+    '로 시작하고 그 뒤가 수식인 칸에도 붙여서 csv_unescape로 원래 값을 그대로 되돌릴 수 있음
+    """
+    if value.lstrip("'").startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_unescape(value):
+    """csv_escape의 반대. 가져오기(import_recipes)에서 씀"""
+    if value.startswith("'") and value.lstrip("'").startswith(FORMULA_PREFIXES):
+        return value[1:]
+    return value
+
+
+def csv_lines(queryset, serializer_class, context):
+    """첫 줄은 헤더. 헤더는 쿼리 전에 바로 보냄"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_FIELDS)
+    yield buffer.getvalue()
+
+    for data in _serialized(queryset, serializer_class, context):
+        buffer.seek(0)
+        buffer.truncate()
+        for item in data:
+            row = dict(item)
+            for relation in ('tags', 'ingredients'):
+                row[relation] = CSV_LIST_SEPARATOR.join(obj['name'] for obj in item[relation])
+            for field in CSV_TEXT_FIELDS:
+                if row.get(field):
+                    row[field] = csv_escape(row[field])
+            writer.writerow([
+                '' if row.get(field) is None else row[field] for field in CSV_FIELDS])
+        yield buffer.getvalue()
+
+
+def spool(lines):
+    """lines를 끝까지 만들어서 처음으로 되감은 임시 파일(바이너리, UTF-8)로 반환"""
+    f = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    for chunk in lines:
+        f.write(chunk.encode())
+    f.seek(0)
+    return f
+
+
+FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson', ndjson_lines),
+    'csv': ('text/csv', 'csv', csv_lines),
+}
@@ -0,0 +1,334 @@
+"""
+유저별 테그/재료 비트맵 인덱스.
+테그(재료) id마다 그 테그를 가진 레시피를 비트로 표시한 비트맵(파이썬 int)을 만들어 두고,
+필터할 때 비트맵끼리 AND/OR 해서 레시피 id를 구합니다. through 테이블을 매번 읽지 않아도 됨.
+
+- 비트 위치는 레시피 id가 아니라 유저의 레시피마다 0부터 붙인 번호(slot).
+  전체 레시피 id가 커도 비트맵 크기는 그 유저의 레시피 수에 비례함
+- 프로세스 메모리에 유저별로 보관하고, 캐시(RECIPE_CACHE)에는 zlib로 압축해서 저장.
+  압축은 바뀐 비트맵만 다시 함
+- m2m_changed 등의 시그널(recipe/signals.py)에서 버전을 올리고, 커밋된 뒤에 바뀐 비트만 고침.
+  롤백되면 인덱스는 바뀌지 않음
+- 유저마다 버전 번호를 두고, 다른 프로세스가 고쳤으면(번호가 다르면) 캐시나 DB에서 다시 읽음
+"""
+import pickle
+import re
+import threading
+import time
+import zlib
+from array import array
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+
+from core.models import Recipe
+from recipe.filters import MATCH_ALL
+
+RELATIONS = ('tags', 'ingredients')
+_NONZERO_RE = re.compile(b'[^\x00]')
+
+
+def ids_to_bitmap(ids):
+    ids = list(ids)
+    if not ids:
+        return 0
+    bits = bytearray((max(ids) >> 3) + 1)
+    for pk in ids:
+        bits[pk >> 3] |= 1 << (pk & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def bitmap_to_ids(bitmap):
+    """비트맵에서 켜진 비트 번호들 (오름차순)"""
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) >> 3, 'little')
+    ids = []
+    for match in _NONZERO_RE.finditer(data):
+        offset = match.start() << 3
+        byte = data[match.start()]
+        ids.extend(offset + bit for bit in range(8) if byte >> bit & 1)
+    return ids
+
+
+def _compress(bitmap):
+    return zlib.compress(bitmap.to_bytes((bitmap.bit_length() + 7) >> 3, 'little'))
+
+
+def _through(relation):
+    field = Recipe._meta.get_field(relation)
+    return (
+        field.remote_field.through,
+        f'{field.m2m_reverse_field_name()}_id',
+    )
+
+
+def _cache():
+    return caches[settings.RECIPE_CACHE]
+
+
+class FacetIndex:
+    """
+    한 유저의 {relation: {테그/재료 id: 비트맵}}.
+    recipe_ids[slot]이 비트 slot의 레시피 id. 새 레시피는 뒤에 slot을 붙이고,
+    지운 레시피의 slot은 비트만 끄고 다음에 DB에서 다시 만들 때 정리됨
+    """
+
+    def __init__(self, version, bitmaps=None, recipe_ids=()):
+        self.version = version
+        self.bitmaps = bitmaps or {relation: {} for relation in RELATIONS}
+        self.recipe_ids = list(recipe_ids)
+        self.slots = {pk: slot for slot, pk in enumerate(self.recipe_ids)}
+        self.loaded_at = time.monotonic()
+        self._blobs = {}
+        # 압축한 비트맵 {(relation, 테그/재료 id): bytes}. 바뀐 비트맵은 지워서 dumps()에서 다시 압축
+
+    @classmethod
+    def build(cls, user_id, version):
+        """through 테이블에서 relation마다 쿼리 한번으로 만듦"""
+        grouped = {}
+        for relation in RELATIONS:
+            Through, target = _through(relation)
+            grouped[relation] = defaultdict(list)
+            rows = Through.objects.filter(recipe__user_id=user_id).values_list(
+                target, 'recipe_id')
+            for item_id, recipe_id in rows.iterator():
+                grouped[relation][item_id].append(recipe_id)
+
+        index = cls(version, recipe_ids=sorted({
+            recipe_id
+            for items in grouped.values()
+            for recipe_ids in items.values()
+            for recipe_id in recipe_ids
+        }))
+        index.bitmaps = {
+            relation: {
+                item_id: ids_to_bitmap(index.slots[pk] for pk in recipe_ids)
+                for item_id, recipe_ids in items.items()
+            }
+            for relation, items in grouped.items()
+        }
+        return index
+
+    def dumps(self):
+        blobs = {}
+        for relation, bitmaps in self.bitmaps.items():
+            blobs[relation] = {}
+            for item_id, bitmap in bitmaps.items():
+                blob = self._blobs.get((relation, item_id))
+                if blob is None:
+                    blob = self._blobs[(relation, item_id)] = _compress(bitmap)
+                blobs[relation][item_id] = blob
+        recipe_ids = self._blobs.get('recipe_ids')
+        if recipe_ids is None:
+            recipe_ids = self._blobs['recipe_ids'] = zlib.compress(
+                array('q', self.recipe_ids).tobytes())
+        return pickle.dumps((self.version, recipe_ids, blobs))
+
+    @classmethod
+    def loads(cls, data):
+        version, recipe_ids, compressed = pickle.loads(data)
+        index = cls(version, {
+            relation: {
+                item_id: int.from_bytes(zlib.decompress(blob), 'little')
+                for item_id, blob in bitmaps.items()
+            }
+            for relation, bitmaps in compressed.items()
+        }, array('q', zlib.decompress(recipe_ids)))
+        index._blobs = {
+            (relation, item_id): blob
+            for relation, bitmaps in compressed.items()
+            for item_id, blob in bitmaps.items()
+        }
+        index._blobs['recipe_ids'] = recipe_ids
+        return index
+
+    def _mask(self, recipe_ids, create=False):
+        """레시피 id들의 slot 비트맵. create면 처음 보는 레시피에 slot을 붙임"""
+        if create:
+            for pk in recipe_ids:
+                if pk not in self.slots:
+                    self.slots[pk] = len(self.recipe_ids)
+                    self.recipe_ids.append(pk)
+                    self._blobs.pop('recipe_ids', None)
+        return ids_to_bitmap(self.slots[pk] for pk in recipe_ids if pk in self.slots)
+
+    def _set(self, relation, item_id, bitmap):
+        self.bitmaps[relation][item_id] = bitmap
+        self._blobs.pop((relation, item_id), None)
+
+    def add(self, relation, item_ids, recipe_ids):
+        mask = self._mask(recipe_ids, create=True)
+        bitmaps = self.bitmaps[relation]
+        for item_id in item_ids:
+            self._set(relation, item_id, bitmaps.get(item_id, 0) | mask)
+
+    def remove(self, relation, item_ids, recipe_ids):
+        mask = self._mask(recipe_ids)
+        bitmaps = self.bitmaps[relation]
+        for item_id in item_ids:
+            if bitmaps.get(item_id, 0) & mask:
+                self._set(relation, item_id, bitmaps[item_id] & ~mask)
+
+    def clear_item(self, relation, item_id):
+        self.bitmaps[relation].pop(item_id, None)
+        self._blobs.pop((relation, item_id), None)
+
+    def clear_recipes(self, recipe_ids, relations=RELATIONS):
+        for relation in relations:
+            self.remove(relation, list(self.bitmaps[relation]), recipe_ids)
+
+    def resolve(self, filters, match):
+        """
+        filters: {relation: [id, ...]}. relation 안에서는 any면 OR, all이면 AND,
+        relation끼리는 AND (테그 조건과 재료 조건을 모두 만족).
+        반환값은 slot 비트맵 (to_ids로 레시피 id로 바꿈)
+        """
+        result = None
+        for relation, item_ids in filters.items():
+            bitmaps = [self.bitmaps[relation].get(pk, 0) for pk in set(item_ids)]
+            combined = bitmaps[0] if bitmaps else 0
+            for bitmap in bitmaps[1:]:
+                if match == MATCH_ALL:
+                    combined &= bitmap
+                else:
+                    combined |= bitmap
+            result = combined if result is None else result & combined
+        return result or 0
+
+    def to_ids(self, bitmap):
+        """slot 비트맵 -> 레시피 id 목록 (최신순)"""
+        return sorted((self.recipe_ids[slot] for slot in bitmap_to_ids(bitmap)), reverse=True)
+
+
+_indexes = OrderedDict()
+_MAX_INDEXES = 32
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def _pending():
+    """이 스레드의 트랜잭션에서 인덱스에 들어갈 것을 바꾸고 아직 커밋하지 않은 유저 id들"""
+    pending = getattr(_local, 'pending', None)
+    if pending is None:
+        pending = _local.pending = set()
+    if pending and not connection.in_atomic_block:
+        pending.clear()
+        # 트랜잭션이 끝났는데 남아있으면 롤백된 것 (롤백되면 on_commit이 오지 않음)
+    return pending
+
+
+def _version_key(user_id):
+    return f'recipe:facets:version:{user_id}'
+
+
+def _index_key(user_id):
+    return f'recipe:facets:{user_id}'
+
+
+def _current_version(user_id):
+    cache = _cache()
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        cache.add(_version_key(user_id), int(time.time() * 1000), None)
+        version = cache.get(_version_key(user_id))
+    return version
+
+
+def _remember(user_id, index):
+    with _lock:
+        _indexes[user_id] = index
+        _indexes.move_to_end(user_id)
+        while len(_indexes) > _MAX_INDEXES:
+            _indexes.popitem(last=False)
+
+
+def get_index(user_id):
+    """
+    유저의 최신 인덱스. 메모리 -> 캐시 -> DB 순서로 찾음.
+    이 트랜잭션에서 바꾼 것이 있으면 DB에서 바로 만들고 저장하지 않음 (롤백될 수 있으므로)
+    """
+    if user_id in _pending():
+        return FacetIndex.build(user_id, None)
+    version = _current_version(user_id)
+    with _lock:
+        index = _indexes.get(user_id)
+    if (index is not None and index.version == version
+            and time.monotonic() - index.loaded_at < settings.RECIPE_FACET_INDEX_TTL):
+        return index
+
+    data = _cache().get(_index_key(user_id))
+    index = FacetIndex.loads(data) if data is not None else None
+    if index is None or index.version != version:
+        index = FacetIndex.build(user_id, version)
+        _cache().set(_index_key(user_id), index.dumps(), settings.RECIPE_FACET_INDEX_TTL)
+    _remember(user_id, index)
+    return index
+
+
+def update(user_id, apply=None):
+    """
+    유저의 인덱스에 들어갈 것이 바뀌었을 때 (시그널에서) 호출합니다.
+    지금은 버전만 올려서 다른 프로세스가 예전 인덱스를 쓰지 않게 하고,
+    커밋된 뒤에 apply(index)로 고쳐서 저장함. 롤백되면 고치지 않음
+    """
+    if not settings.RECIPE_FACET_INDEX:
+        return
+    _bump(user_id)
+    if connection.in_atomic_block:
+        _pending().add(user_id)
+    transaction.on_commit(lambda: _apply(user_id, apply))
+
+
+def _bump(user_id):
+    """
+    커밋 전: 버전만 올림. 커밋된 내용은 그대로이므로 메모리에 있는 바로 전 버전의 인덱스는
+    새 버전으로 계속 씀. 그 사이 다른 프로세스가 DB에서 만드는 인덱스도 커밋된 내용이라 맞음
+    """
+    cache = _cache()
+    with _lock:
+        index = _indexes.pop(user_id, None)
+    try:
+        version = cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.delete(_index_key(user_id))
+        return
+    if index is not None and index.version == version - 1:
+        index.version = version
+        _remember(user_id, index)
+
+
+def _apply(user_id, apply):
+    """
+    커밋된 뒤: 버전을 한번 더 올리고, 메모리에 있는 인덱스가 바로 전 버전일 때만
+    (그 사이 다른 커밋이 없었을 때) 고쳐서 저장. 아니거나 apply가 없으면 다음 조회 때 DB에서 만듦
+    """
+    _pending().discard(user_id)
+    cache = _cache()
+    with _lock:
+        index = _indexes.pop(user_id, None)
+    try:
+        version = cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.delete(_index_key(user_id))
+        return
+    if apply is None or index is None or index.version != version - 1:
+        cache.delete(_index_key(user_id))
+        return
+    apply(index)
+    index.version = version
+    cache.set(_index_key(user_id), index.dumps(), settings.RECIPE_FACET_INDEX_TTL)
+    _remember(user_id, index)
+
+
+def resolve(user_id, filters, match, limit):
+    """
+    조건에 맞는 레시피 id 목록 (최신순). limit개보다 많으면 None을 반환해서
+    호출하는 쪽이 SQL(EXISTS) 필터를 쓰게 합니다. 결과가 많으면 id 목록을 IN으로 넘기는 것보다
+    id 역순 인덱스를 따라 읽다가 한 페이지가 차면 멈추는 쪽이 빠르기 때문
+    """
+    index = get_index(user_id)
+    bitmap = index.resolve(filters, match)
+    if bitmap.bit_count() > limit:
+        return None
+    return index.to_ids(bitmap)
@@ -0,0 +1,45 @@
+"""
+레시피 테그/재료 필터.
+tags__id__in 으로 JOIN 하면 레시피가 테그 수만큼 늘어나서 DISTINCT가 필요했는데,
+through 테이블에 대한 EXISTS(세미조인) 서브쿼리로 바꿔서 행이 늘어나지 않게 합니다.
+"""
+from django.db.models import Count, Exists, OuterRef
+
+from core.models import Recipe
+
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+MATCH_CHOICES = (MATCH_ANY, MATCH_ALL)
+MAX_EXISTS_TERMS = 8
+# match=all에서 id가 이 개수 이하면 id마다 EXISTS를 하나씩 (through의 (recipe_id, tag_id) 유니크 인덱스로 바로 찾음),
+# 더 많으면 GROUP BY ... HAVING COUNT 서브쿼리 하나로
+
+
+def filter_by_relation(queryset, relation, ids, match=MATCH_ANY):
+    """
+    relation('tags' 또는 'ingredients')이 ids 중
+    하나라도 있는(any) / 모두 있는(all) 레시피만 남깁니다.
+    """
+    field = Recipe._meta.get_field(relation)
+    Through = field.remote_field.through
+    source = f'{field.m2m_field_name()}_id'          # recipe_id
+    target = f'{field.m2m_reverse_field_name()}_id'  # tag_id, ingredient_id
+    ids = set(ids)
+
+    if match == MATCH_ALL and len(ids) <= MAX_EXISTS_TERMS:
+        for pk in ids:
+            queryset = queryset.filter(Exists(
+                Through.objects.filter(**{source: OuterRef('pk'), target: pk})))
+        return queryset
+
+    links = Through.objects.filter(**{source: OuterRef('pk'), f'{target}__in': ids})
+    if match == MATCH_ALL:
+        # EXISTS (SELECT ... WHERE recipe_id = 바깥 id AND tag_id IN (...)
+        #         GROUP BY recipe_id HAVING COUNT(tag_id) = 개수)
+        links = (
+            links.order_by()
+            .values(source)
+            .annotate(matched=Count(target))
+            .filter(matched=len(ids))
+        )
+    return queryset.filter(Exists(links))
@@ -0,0 +1,302 @@
+"""
+레시피 사진 처리 작업 관리.
+업로드 요청은 파일을 저장만 하고 바로 응답하고, 검사/EXIF 제거/축소본 생성(recipe/imaging.py)은
+프로세스 풀에서 합니다. 끝나면 EXIF를 지운 사본을 새 사진 파일로 저장하고
+결과(image, image_status, image_renditions)를 DB에 저장합니다.
+별도 브로커(Celery 등) 없이 웹 서버 프로세스 안에서 동작합니다.
+작업은 프로세스 메모리에만 있으므로 워커가 끝나면(max_requests 재시작, HUP, OOM, 배포) 잃어버립니다.
+그래서 오래 pending인 레시피는 requeue_stale()로 다시 처리함 (워커 시작 때, gc_recipe_images)
+
+사진 파일 이름은 내용의 해시(core/storage.py)라서 여러 레시피가 같은 파일을 쓸 수 있습니다.
+그래서 저장된 파일은 고치지 않음 (올린 원본은 처리가 끝나면 쓰는 레시피가 없어서 지워짐)
+사진이 바뀌거나 레시피가 지워지면 release()로 그 파일을 쓰는 레시피가 더 없는지 확인하고 지웁니다.
+
+RECIPE_IMAGE_PROCESSING
+- 'process': 프로세스 풀 (기본값. Pillow 작업이 GIL을 오래 잡으므로 요청 처리와 분리)
+  풀은 gunicorn 워커마다 하나라서 크기(RECIPE_IMAGE_WORKERS)는 CPU 수를 워커 수로 나눈 값이 기본
+- 'thread': 스레드 풀
+- 'sync': 요청 안에서 바로 처리 (테스트용)
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.models import Recipe
+from recipe import imaging
+from recipe.cache import bump_generation
+from recipe.sync import record_changes
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_writer = None
+_lock = threading.Lock()
+
+
+def _executors():
+    global _executor, _writer
+    with _lock:
+        if _executor is None:
+            if settings.RECIPE_IMAGE_PROCESSING == 'process':
+                # fork는 스레드가 있는 프로세스에서 안전하지 않으므로 spawn
+                _executor = ProcessPoolExecutor(
+                    max_workers=settings.RECIPE_IMAGE_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+            else:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.RECIPE_IMAGE_WORKERS,
+                    thread_name_prefix='recipe-image',
+                )
+            _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='recipe-image-db')
+            # 결과를 DB에 저장하는 스레드. 풀의 콜백 스레드에서 DB 연결을 열지 않기 위함
+    return _executor, _writer
+
+
+def _reset(broken):
+    global _executor
+    with _lock:
+        if _executor is broken:
+            _executor = None
+            broken.shutdown(wait=False)
+
+
+def rendition_dir(name):
+    """사진 파일 이름(storage 기준) -> 축소본을 둘 디렉토리 이름"""
+    return os.path.join(os.path.dirname(name), 'renditions')
+
+
+def attach(recipe, file):
+    """
+    recipe의 사진을 file로 바꾸고 처리를 예약.
+    예전 사진은 다른 레시피가 같은 파일을 쓰고 있지 않으면 지워짐
+    """
+    old_image, old_renditions = recipe.image.name, recipe.image_renditions
+    recipe.image = file
+    recipe.image_status = Recipe.IMAGE_PENDING
+    recipe.image_renditions = {}
+    # 파일만 저장하고 바로 응답. 검사/EXIF 제거/축소본은 백그라운드에서 만들고
+    # 끝나면 image_status가 ready(또는 failed)가 되고 image_renditions가 채워짐
+    recipe.save()
+    schedule(recipe)
+    release(old_image, old_renditions)
+
+
+def schedule(recipe):
+    """
+    recipe.image 처리를 트랜잭션이 커밋된 뒤에 시작.
+    같은 사진(같은 파일)이 다른 레시피에서 이미 처리되었으면 그 결과를 그대로 씀
+    """
+    name = recipe.image.name
+    processed = Recipe.objects.filter(
+        image=name, image_status=Recipe.IMAGE_READY,
+    ).exclude(pk=recipe.pk).values_list('image_renditions', flat=True).first()
+    if processed is not None:
+        recipe.image_status = Recipe.IMAGE_READY
+        recipe.image_renditions = processed
+        recipe.save(update_fields=['image_status', 'image_renditions', 'updated_at'])
+        return
+
+    transaction.on_commit(partial(_start, name, _job(name)))
+
+
+def requeue_stale(older_than=None, run_now=False):
+    """
+    older_than초(RECIPE_IMAGE_REQUEUE_AFTER) 넘게 pending인 사진을 다시 처리합니다.
+    처리하던 워커가 끝나서 작업을 잃어버린 경우. run_now면 이 프로세스에서 바로 처리하고
+    (관리 명령어용), 아니면 작업 풀에 넣음. 반환값: 다시 처리한 사진 수
+    """
+    if older_than is None:
+        older_than = settings.RECIPE_IMAGE_REQUEUE_AFTER
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    stale = Recipe.objects.filter(image_status=Recipe.IMAGE_PENDING, updated_at__lt=cutoff)
+    requeued = 0
+    for name in set(stale.values_list('image', flat=True)):
+        if not stale.filter(image=name).update(updated_at=timezone.now()):
+            continue
+            # 여러 워커가 같이 시작해도 updated_at을 먼저 바꾼 곳에서만 다시 처리
+        requeued += 1
+        logger.warning('Requeued pending recipe image %s', name)
+        if run_now:
+            job = _job(name)
+            _save_result(name, job['dest'], partial(imaging.process_image, **job))
+        else:
+            _start(name, _job(name))
+    return requeued
+
+
+def _job(name):
+    directory, ext = os.path.dirname(name), os.path.splitext(name)[1]
+    return {
+        'path': default_storage.path(name),
+        'dest': default_storage.path(os.path.join(directory, f'{uuid.uuid4().hex}.processed{ext}')),
+        # EXIF를 지운 사본을 둘 임시 파일. 저장소에 저장한 뒤 지움
+        'rendition_dir': default_storage.path(rendition_dir(name)),
+        'widths': settings.RECIPE_IMAGE_WIDTHS,
+        'formats': imaging.available_formats(settings.RECIPE_IMAGE_FORMATS),
+        'max_pixels': settings.RECIPE_IMAGE_MAX_PIXELS,
+    }
+
+
+def _start(name, job):
+    if settings.RECIPE_IMAGE_PROCESSING == 'sync':
+        _save_result(name, job['dest'], partial(imaging.process_image, **job))
+        return
+
+    executor, writer = _executors()
+    try:
+        future = executor.submit(imaging.process_image, **job)
+    except BrokenProcessPool:
+        # 작업 프로세스가 죽으면(메모리 부족 등) 풀을 쓸 수 없게 되므로 새로 만듦
+        _reset(executor)
+        executor, writer = _executors()
+        future = executor.submit(imaging.process_image, **job)
+
+    def done(future):
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            _reset(executor)
+            # 다음 작업은 새 풀에서. 이 사진은 pending으로 남고 requeue_stale()이 다시 처리
+        writer.submit(_save_result_in_thread, name, job['dest'], future.result)
+
+    future.add_done_callback(done)
+
+
+def _store(name, dest):
+    """처리한 사본(dest)을 name과 같은 디렉토리에 저장하고 (내용의 해시) 이름을 반환. dest는 지움"""
+    try:
+        with open(dest, 'rb') as f:
+            return default_storage.save(
+                os.path.join(os.path.dirname(name), os.path.basename(dest)), File(f))
+    finally:
+        os.remove(dest)
+
+
+def _discard(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _save_result_in_thread(*args):
+    try:
+        _save_result(*args)
+    finally:
+        connection.close()
+
+
+def _save_result(name, dest, run):
+    """
+    run()이 만든 사본(dest)을 새 사진 파일로 저장하고, 그 이름과 축소본 파일 이름들을
+    name 사진을 쓰는 처리 대기중인 레시피 모두에 저장.
+    사진이 잘못되었으면(InvalidImage) failed로 하고 파일을 지움.
+    그 외의 에러(작업 프로세스가 죽음, 풀 종료, 메모리 부족 등)는 사진 탓이 아니므로
+    pending과 파일을 그대로 두고 requeue_stale()이 다시 처리하게 함
+    """
+    try:
+        renditions = run()
+        image = _store(name, dest)
+    except imaging.InvalidImage as exc:
+        logger.warning('Rejected recipe image %s: %s', name, exc)
+        _discard(dest)
+        fields = {'image': None, 'image_status': Recipe.IMAGE_FAILED, 'image_renditions': {}}
+    except Exception:
+        logger.exception('Recipe image processing failed, will retry: %s', name)
+        _discard(dest)
+        return
+    else:
+        directory = rendition_dir(name)
+        fields = {
+            'image': image,
+            'image_status': Recipe.IMAGE_READY,
+            'image_renditions': {
+                fmt: {width: os.path.join(directory, filename)
+                      for width, filename in files.items()}
+                for fmt, files in renditions.items()
+            },
+        }
+
+    targets = list(Recipe.objects.filter(
+        image=name, image_status=Recipe.IMAGE_PENDING).values_list('pk', 'user_id'))
+    updated = Recipe.objects.filter(
+        pk__in=[pk for pk, _ in targets], image=name,
+    ).update(updated_at=timezone.now(), **fields)
+    # 처리하는 동안 다른 사진으로 바뀌었거나 레시피가 지워졌으면 아무것도 안함
+    # (만든 축소본은 이제 쓰는 레시피가 없으면 지움)
+    if not updated:
+        release(fields['image'] or name, fields['image_renditions'])
+        return
+    if fields['image_status'] == Recipe.IMAGE_FAILED:
+        delete_unused(name, [name], grace=0)
+    elif fields['image'] != name:
+        release(name, {})
+        # 올린 원본. 같은 파일을 방금 다시 올린 레시피가 있을 수 있으므로 grace 뒤에 지움
+    # update()는 시그널을 보내지 않으므로 직접 변경 기록 + 캐시 무효화
+    recipe_ids = {}
+    for pk, user_id in targets:
+        recipe_ids.setdefault(user_id, []).append(pk)
+    for user_id, pks in recipe_ids.items():
+        record_changes(user_id, pks)
+        bump_generation(user_id)
+
+
+def image_files(name, renditions):
+    """사진 원본과 축소본 파일 이름 목록"""
+    return [name] + [
+        filename for files in renditions.values() for filename in files.values()]
+
+
+def release(name, renditions):
+    """
+    name 사진(과 축소본)을 더 이상 어떤 레시피도 쓰지 않으면 트랜잭션이 커밋된 뒤에 지움.
+    사진을 바꾸거나 레시피를 지울 때 호출
+    """
+    if name:
+        transaction.on_commit(partial(delete_unused, name, image_files(name, renditions)))
+
+
+def delete_unused(name, files, grace=None):
+    """
+    name 사진을 쓰는 레시피가 없으면 files를 지우고 지운 바이트 수를 반환.
+    방금 저장되거나 다시 참조된(중복 제거로) 파일은 grace초 동안 지우지 않음.
+    그 사이에 올라온 같은 사진의 레시피가 아직 커밋되지 않았을 수 있기 때문
+    """
+    if grace is None:
+        grace = settings.RECIPE_IMAGE_GC_GRACE
+    if Recipe.objects.filter(image=name).exists():
+        return 0
+    try:
+        if time.time() - os.path.getmtime(default_storage.path(name)) < grace:
+            return 0
+    except FileNotFoundError:
+        pass
+    reclaimed = delete_files(files)
+    if reclaimed:
+        logger.info('Deleted unused recipe image %s (%d bytes)', name, reclaimed)
+    return reclaimed
+
+
+def delete_files(names):
+    """storage의 파일들을 지우고 지운 바이트 수를 반환 (없는 파일은 건너뜀)"""
+    reclaimed = 0
+    for name in names:
+        try:
+            size = default_storage.size(name)
+        except FileNotFoundError:
+            continue
+        default_storage.delete(name)
+        reclaimed += size
+    return reclaimed
@@ -0,0 +1,169 @@
+"""
+레시피 사진 처리 (Pillow만 사용).
+별도 프로세스(recipe/images.py의 ProcessPoolExecutor)에서 실행되므로
+장고를 import 하지 않고 파일 경로만 주고받습니다.
+"""
+import hashlib
+import os
+import uuid
+
+from PIL import Image, ImageOps, features
+
+# 원본으로 받을 수 있는 형식 -> 다시 저장할 형식 (MPO는 아이폰 등의 JPEG)
+SUPPORTED = {
+    'JPEG': 'JPEG',
+    'MPO': 'JPEG',
+    'PNG': 'PNG',
+    'WEBP': 'WEBP',
+    'GIF': 'GIF',
+}
+
+# 파일 앞부분(매직 바이트)으로 형식 추측. 전체를 읽기 전에 사진이 아닌 파일을 거르기 위함
+SIGNATURES = (
+    (b'\xff\xd8\xff', 'JPEG'),
+    (b'\x89PNG\r\n\x1a\n', 'PNG'),
+    (b'GIF87a', 'GIF'),
+    (b'GIF89a', 'GIF'),
+)
+SNIFF_BYTES = 12
+
+# 축소본 형식: (Pillow 형식, 확장자, 저장 옵션, features.check 이름)
+RENDITION_FORMATS = {
+    'webp': ('WEBP', '.webp', {'quality': 80, 'method': 4}, 'webp'),
+    'jpeg': ('JPEG', '.jpg', {'quality': 82, 'optimize': True, 'progressive': True}, 'jpg'),
+}
+
+ORIGINAL_OPTIONS = {
+    'JPEG': {'quality': 95},
+    'WEBP': {'quality': 95},
+}
+
+KEEP_INFO = ('icc_profile', 'transparency')
+# 다시 저장할 때 남기는 정보. EXIF(위치, 기기 정보 등)는 버림
+
+
+class InvalidImage(Exception):
+    pass
+
+
+def sniff_format(head):
+    """파일의 처음 몇 바이트로 형식을 추측. 모르는 형식이면 None"""
+    for signature, name in SIGNATURES:
+        if head.startswith(signature):
+            return name
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'WEBP'
+    return None
+
+
+def available_formats(formats):
+    """formats 중 설치된 Pillow가 저장할 수 있는 것만 (WebP는 libwebp가 있어야 함)"""
+    return [fmt for fmt in formats if features.check(RENDITION_FORMATS[fmt][3])]
+
+
+def _clean(img):
+    img.info = {key: img.info[key] for key in KEEP_INFO if key in img.info}
+    return img
+
+
+def _rgb(img):
+    if img.mode in ('RGB', 'L'):
+        return img
+    if img.mode in ('RGBA', 'LA', 'P'):
+        # 투명한 부분은 흰 배경으로
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel('A'))
+        return background
+    return img.convert('RGB')
+
+
+def _save(img, path, fmt, options):
+    # 다 쓴 다음에 이름을 바꿔서, 읽는 쪽이 반쯤 쓰인 파일을 보지 않게 함
+    # (같은 파일을 여러 프로세스가 동시에 만들어도 임시 파일은 겹치지 않게)
+    tmp = f'{path}.{uuid.uuid4().hex}.tmp'
+    img.save(tmp, format=fmt, **options)
+    os.replace(tmp, path)
+
+
+def process_image(path, dest, rendition_dir, widths, formats, max_pixels):
+    """
+    path의 사진을 검사하고, 회전 정보를 적용하고 EXIF를 지운 사본을 dest에 저장합니다.
+    path는 내용의 해시로 이름이 정해진 파일(core/storage.py)이라서 고치지 않음.
+    그리고 widths 너비마다 formats 형식의 축소본을 rendition_dir에 만듭니다.
+    축소본 이름은 사본 내용의 해시로 시작함 (저장소가 사본에 붙일 이름과 같음)
+    반환값: {'jpeg': {'320': 파일이름, ...}, 'webp': {...}}
+    """
+    try:
+        with Image.open(path) as img:
+            img.verify()
+            # 손상된 파일 검사. verify() 다음에는 다시 열어야 함
+        with Image.open(path) as img:
+            if img.format not in SUPPORTED:
+                raise InvalidImage(f'Unsupported image format: {img.format}')
+            if img.width * img.height > max_pixels:
+                raise InvalidImage(f'Image is too large: {img.width}x{img.height}')
+            fmt = SUPPORTED[img.format]
+            img = ImageOps.exif_transpose(img)
+            img.load()
+    except InvalidImage:
+        raise
+    except Exception as exc:
+        raise InvalidImage(str(exc)) from exc
+
+    img = _clean(img)
+    if fmt == 'JPEG':
+        img = _rgb(img)
+    _save(img, dest, fmt, ORIGINAL_OPTIONS.get(fmt, {}))
+
+    os.makedirs(rendition_dir, exist_ok=True)
+    stem = _file_hash(dest)
+    rgb = _rgb(img)
+    renditions = {fmt_key: {} for fmt_key in formats}
+    for width in sorted({min(width, img.width) for width in widths}):
+        # 원본보다 크게 늘리지는 않음
+        resized = _resize(rgb, width)
+        for fmt_key in formats:
+            filename = f'{stem}-{width}{RENDITION_FORMATS[fmt_key][1]}'
+            _save_rendition(resized, os.path.join(rendition_dir, filename), fmt_key)
+            renditions[fmt_key][str(width)] = filename
+
+    return renditions
+
+
+def _file_hash(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _resize(img, width):
+    resized = img.copy()
+    resized.thumbnail((width, img.height), Image.LANCZOS)
+    return resized
+
+
+def _save_rendition(img, dest, fmt_key):
+    pil_format, _, options, _ = RENDITION_FORMATS[fmt_key]
+    _save(img, dest, pil_format, options)
+
+
+def render(source, dest, width, fmt_key, max_pixels):
+    """
+    source 사진을 width 너비(원본보다 크게 늘리지는 않음)의 fmt_key 형식으로 dest에 저장.
+    읽을 수 없거나 max_pixels보다 크면 InvalidImage (디코딩하기 전에 크기부터 확인)
+    """
+    try:
+        with Image.open(source) as img:
+            if img.width * img.height > max_pixels:
+                raise InvalidImage(f'Image is too large: {img.width}x{img.height}')
+            img = ImageOps.exif_transpose(img)
+            img.load()
+    except (InvalidImage, FileNotFoundError):
+        raise
+    except Exception as exc:
+        raise InvalidImage(str(exc)) from exc
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    _save_rendition(_resize(_rgb(_clean(img)), min(width, img.width)), dest, fmt_key)
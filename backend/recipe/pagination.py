@@ -0,0 +1,110 @@
+"""
+레시피/테그/재료 목록 페이지네이션.
+OFFSET 대신 마지막으로 본 값(커서) 다음부터 읽는 keyset 방식이라
+아무리 뒤쪽 페이지로 가도 인덱스 탐색 한번으로 시작 위치를 찾습니다.
+"""
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+class BaseCursorPagination(CursorPagination):
+    """?cursor=...&page_size=... 로 조회"""
+    page_size_query_param = 'page_size'
+
+    def __init__(self):
+        # 요청마다 새로 만들어지므로 설정값을 여기서 읽음
+        self.page_size = settings.API_PAGE_SIZE
+
+    @property
+    def max_page_size(self):
+        # 클라이언트가 page_size를 아무리 크게 줘도 이 값까지만
+        return settings.API_MAX_PAGE_SIZE
+
+
+class RecipeCursorPagination(BaseCursorPagination):
+    """
+    레시피는 최신순(-id). 검색(?search=)할 때는 관련도순(-relevance, -id)
+
+    DRF CursorPagination은 ordering의 첫 필드만 커서 위치로 쓰는데
+    관련도는 겹치는 값이 많아서, 검색할 때는 (관련도, id) 두 값을 커서에 넣고
+    (relevance, id) < (r, i) 조건으로 이어서 읽습니다.
+    """
+    ordering = '-id'
+    search_ordering = ('-relevance', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        if 'relevance' in queryset.query.annotations:
+            return self.search_ordering
+        return super().get_ordering(request, queryset, view)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.get_ordering(request, queryset, view) != self.search_ordering:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.search_ordering
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, position = 0, False, None
+        else:
+            offset, reverse, position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(position, reverse))
+
+        # 한개 더 읽어서 다음 페이지가 있는지 확인
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        following = None
+        if len(results) > len(self.page):
+            following = self._get_position_from_instance(results[-1], self.ordering)
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None or offset > 0
+            self.has_previous = following is not None
+            self.next_position = position
+            self.previous_position = following
+        else:
+            self.has_next = following is not None
+            self.has_previous = position is not None or offset > 0
+            self.next_position = following
+            self.previous_position = position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def _get_position_from_instance(self, instance, ordering):
+        if ordering != self.search_ordering:
+            return super()._get_position_from_instance(instance, ordering)
+        # 관련도(float)는 repr로 넣어야 DB 값과 정확히 같게 돌아옴
+        return json.dumps([repr(float(instance.relevance)), instance.pk])
+
+    def _after(self, position, reverse):
+        """커서 위치 (관련도, id) 다음(reverse면 이전) 레시피만 남기는 조건"""
+        try:
+            relevance, pk = json.loads(position)
+            relevance, pk = float(relevance), int(pk)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if reverse:
+            return Q(relevance__gt=relevance) | Q(relevance=relevance, id__gt=pk)
+        return Q(relevance__lt=relevance) | Q(relevance=relevance, id__lt=pk)
+
+
+class RecipeAttrCursorPagination(BaseCursorPagination):
+    """테그/재료는 이름 역순(-name). 이름은 유저별로 유일해서 커서 위치로 충분함"""
+    ordering = '-name'
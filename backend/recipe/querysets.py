@@ -0,0 +1,86 @@
+"""
+시리얼라이저를 보고 필요한 select_related / prefetch_related / only()를
+쿼리셋에 붙여주는 모듈.
+중첩 시리얼라이저(TagSerializer(many=True) 등) 때문에 레시피마다
+쿼리가 추가로 나가는 N+1 문제를 막기 위해 사용합니다.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def _plan(model, serializer, prefix=''):
+    """
+    serializer의 필드를 훑어서 (only, select_related, prefetch) 목록을 만듭니다.
+    prefix는 select_related로 따라 들어간 관계의 경로입니다. 예: 'user__'
+    """
+    only = [prefix + model._meta.pk.name]
+    select = []
+    prefetch = []
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*' or '.' in field.source:
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            # SerializerMethodField 같은 모델에 없는 필드
+            continue
+
+        if not model_field.is_relation:
+            only.append(prefix + field.source)
+            continue
+
+        many = model_field.many_to_many or model_field.one_to_many
+        if many:
+            # 다대다/역참조는 prefetch_related로 한번에 가져옴
+            child = getattr(field, 'child', None) or getattr(
+                field, 'child_relation', None)
+            related_model = model_field.related_model
+            queryset = related_model._default_manager.all()
+            if isinstance(child, serializers.BaseSerializer):
+                # 역참조는 부모와 연결할 FK 컬럼이 필요하므로 컬럼을 줄이지 않음
+                queryset = optimize_queryset(
+                    queryset,
+                    child,
+                    defer_unused=model_field.many_to_many,
+                )
+            elif model_field.many_to_many:
+                queryset = queryset.only(related_model._meta.pk.name)
+            prefetch.append(Prefetch(prefix + field.source, queryset=queryset))
+        elif isinstance(field, serializers.BaseSerializer):
+            # FK/OneToOne에 중첩 시리얼라이저면 JOIN으로 가져옴
+            select.append(prefix + field.source)
+            sub_only, sub_select, sub_prefetch = _plan(
+                model_field.related_model,
+                field,
+                prefix=f'{prefix}{field.source}__',
+            )
+            only.extend(sub_only)
+            select.extend(sub_select)
+            prefetch.extend(sub_prefetch)
+        else:
+            # PrimaryKeyRelatedField 등은 FK 컬럼(user_id)만 있으면 됨
+            only.append(prefix + field.source)
+
+    return only, select, prefetch
+
+
+def optimize_queryset(queryset, serializer, defer_unused=True):
+    """
+    serializer(클래스 또는 인스턴스)를 직렬화하는데 필요한 관계를 미리 불러오도록
+    queryset을 바꿔서 반환합니다.
+    defer_unused=True이면 시리얼라이저에서 쓰지 않는 컬럼은 only()로 제외합니다.
+    (저장에 쓰일 인스턴스라면 False로 두어야 모든 컬럼이 저장됩니다)
+    """
+    if isinstance(serializer, type):
+        serializer = serializer()
+    only, select, prefetch = _plan(queryset.model, serializer)
+
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    if defer_unused:
+        queryset = queryset.only(*only)
+    return queryset
@@ -0,0 +1,147 @@
+"""
+요청할 때 만드는 레시피 사진 축소본과 디스크 캐시.
+캐시 파일 이름은 (원본 내용의 해시, 너비, 형식)의 해시라서 원본이 바뀌면 자연스럽게 새 파일이 되고,
+전체 크기가 RECIPE_RENDITION_CACHE_MAX_BYTES를 넘으면 가장 오래 안 쓴 파일부터 지웁니다(LRU).
+쓸 때마다 파일의 수정 시각을 지금으로 바꿔서, 수정 시각이 곧 마지막으로 쓴 시각이 됩니다.
+"""
+import bisect
+import hashlib
+import os
+import threading
+
+from django.conf import settings
+from django.core import signing
+
+from recipe import imaging
+
+_SIGNER_SALT = 'recipe.renditions'
+
+_hashes = {}
+_MAX_HASHES = 10000
+# (경로, 수정 시각, 크기) -> 원본 내용 해시. 원본을 매번 다시 읽지 않기 위함
+_lock = threading.Lock()
+_cache_bytes = None
+# 이 프로세스가 알고있는 캐시 디렉토리 전체 크기 (대략). 넘으면 디렉토리를 훑어서 정리
+
+
+def snap_width(width):
+    """요청한 너비 이상인 가장 작은 허용 너비 (캐시 파일 수를 제한하기 위함)"""
+    widths = sorted(settings.RECIPE_IMAGE_SERVE_WIDTHS)
+    index = bisect.bisect_left(widths, width)
+    return widths[min(index, len(widths) - 1)]
+
+
+def negotiate_format(requested, accept):
+    """format 파라미터(없으면 Accept 헤더)로 축소본 형식 결정"""
+    available = imaging.available_formats(settings.RECIPE_IMAGE_FORMATS)
+    if requested in available:
+        return requested
+    if requested and requested != 'auto':
+        return None
+    if 'webp' in available and 'image/webp' in accept:
+        return 'webp'
+    return 'jpeg'
+
+
+def sign(recipe_id, image_name):
+    """로그인 헤더를 보낼 수 없는 <img> 태그용 서명. 사진이 바뀌면 서명도 바뀜"""
+    return signing.Signer(salt=_SIGNER_SALT).signature(f'{recipe_id}:{image_name}')
+
+
+def check_signature(recipe_id, image_name, signature):
+    return signing.constant_time_compare(sign(recipe_id, image_name), signature or '')
+
+
+def content_hash(path):
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        digest = _hashes.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        with _lock:
+            if len(_hashes) >= _MAX_HASHES:
+                _hashes.clear()
+            _hashes[key] = digest
+    return digest
+
+
+def _cache_path(source_hash, width, fmt):
+    key = hashlib.sha256(f'{source_hash}:{width}:{fmt}'.encode()).hexdigest()
+    ext = imaging.RENDITION_FORMATS[fmt][1]
+    return key, os.path.join(settings.RECIPE_RENDITION_CACHE_DIR, key[:2], f'{key}{ext}')
+
+
+def open_rendition(source, width, fmt):
+    """
+    source 사진의 축소본을 열어서 (파일, 캐시 키)를 반환합니다. 키는 ETag로 사용.
+    캐시에 없으면 Pillow로 만들어서 저장합니다. 읽을 수 없는 사진이면 imaging.InvalidImage
+    경로가 아니라 열린 파일을 주므로, 보내는 도중에 다른 프로세스가 정리해서 지워도 괜찮음
+    """
+    key, path = _cache_path(content_hash(source), width, fmt)
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        imaging.render(source, path, width, fmt, settings.RECIPE_IMAGE_MAX_PIXELS)
+        _added(os.path.getsize(path))
+        return open(path, 'rb'), key
+
+    try:
+        os.utime(path)
+        # 최근에 쓴 파일로 표시 (LRU)
+    except FileNotFoundError:
+        pass
+    return f, key
+
+
+def _scan():
+    entries = []
+    for root, _, files in os.walk(settings.RECIPE_RENDITION_CACHE_DIR):
+        for name in files:
+            if name.endswith('.tmp'):
+                continue
+                # 만드는 중인 파일
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+    return entries
+
+
+def _added(size):
+    global _cache_bytes
+    with _lock:
+        if _cache_bytes is None:
+            _cache_bytes = sum(size for _, size, _ in _scan())
+        else:
+            _cache_bytes += size
+        if _cache_bytes > settings.RECIPE_RENDITION_CACHE_MAX_BYTES:
+            _cache_bytes = evict()
+
+
+def evict(max_bytes=None):
+    """
+    캐시 전체 크기가 max_bytes의 90% 이하가 될 때까지 오래 안 쓴 파일부터 지움.
+    여러 프로세스가 같은 디렉토리를 쓰므로 크기는 디렉토리를 훑어서 다시 셈.
+    남은 크기를 반환합니다.
+    """
+    if max_bytes is None:
+        max_bytes = settings.RECIPE_RENDITION_CACHE_MAX_BYTES
+    entries = sorted(_scan())
+    total = sum(size for _, size, _ in entries)
+    target = max_bytes * 0.9
+    for _, size, path in entries:
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+    return total
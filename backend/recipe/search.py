@@ -0,0 +1,137 @@
+"""
+레시피 제목/설명 검색.
+MySQL에서는 FULLTEXT 인덱스(MATCH ... AGAINST)를 사용하고,
+다른 DB(테스트용 SQLite 등)에서는 파이썬으로 만든 역색인(inverted index)으로 대신합니다.
+"""
+import math
+import re
+import threading
+from collections import Counter, OrderedDict, defaultdict
+
+from django.db import connection
+from django.db.models import Case, FloatField, Value, When
+from django.db.models.expressions import RawSQL
+
+from core.models import Recipe
+from recipe.cache import get_generation
+
+TOKEN_RE = re.compile(r'\w+')
+FALLBACK_MAX_RESULTS = 500
+# 파이썬 역색인 검색은 관련도 상위 몇개까지만 (관련도를 CASE WHEN으로 넘기므로 너무 크면 느려짐)
+# 테그/재료 필터를 통과한 레시피 중에서 자르므로 필터한 검색이 비어서 나오지는 않음
+
+
+def tokenize(text):
+    """소문자로 바꾸고 단어 단위로 자름 (한글 포함)"""
+    return TOKEN_RE.findall(text.lower())
+
+
+class InvertedIndex:
+    """
+    단어 -> {레시피 id: 등장 횟수} 역색인. BM25로 점수를 매깁니다.
+    MySQL 자연어 검색처럼 검색어 중 하나라도 들어간 문서를 점수순으로 반환.
+    """
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, documents=()):
+        self.postings = defaultdict(dict)
+        self.lengths = {}
+        for doc_id, text in documents:
+            self.add(doc_id, text)
+
+    def add(self, doc_id, text):
+        tokens = tokenize(text)
+        self.lengths[doc_id] = len(tokens)
+        for token, count in Counter(tokens).items():
+            self.postings[token][doc_id] = count
+
+    def search(self, query):
+        """[(문서 id, 점수), ...]를 점수 높은 순으로 반환"""
+        if not self.lengths:
+            return []
+        total = len(self.lengths)
+        average = sum(self.lengths.values()) / total or 1
+
+        scores = defaultdict(float)
+        for token in set(tokenize(query)):
+            posting = self.postings.get(token)
+            if not posting:
+                continue
+            idf = math.log(1 + (total - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, count in posting.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / average)
+                scores[doc_id] += idf * count * (self.k1 + 1) / (count + norm)
+
+        return sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+
+
+_indexes = OrderedDict()
+_MAX_INDEXES = 32
+_indexes_lock = threading.Lock()
+# 유저별 역색인을 프로세스 메모리에 보관. 레시피가 바뀌면(캐시 세대가 바뀌면) 다시 만듦
+
+
+def _user_index(user_id):
+    generation = get_generation(user_id)
+    with _indexes_lock:
+        cached = _indexes.get(user_id)
+        if cached is not None and cached[0] == generation:
+            _indexes.move_to_end(user_id)
+            return cached[1]
+
+    rows = Recipe.objects.filter(user_id=user_id).values_list('id', 'title', 'description')
+    index = InvertedIndex(
+        (pk, f'{title} {description}') for pk, title, description in rows.iterator())
+    with _indexes_lock:
+        _indexes[user_id] = (generation, index)
+        while len(_indexes) > _MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def _filter_ranked(queryset, ranked):
+    """
+    관련도순 후보를 FALLBACK_MAX_RESULTS개씩 IN 쿼리로 queryset에 통과시켜서
+    통과한 것만 관련도 상위 FALLBACK_MAX_RESULTS개까지 반환합니다.
+    유저의 레시피 id를 전부 읽지 않고, 보통은 쿼리 한번으로 끝남
+    """
+    result = []
+    for start in range(0, len(ranked), FALLBACK_MAX_RESULTS):
+        batch = ranked[start:start + FALLBACK_MAX_RESULTS]
+        allowed = set(
+            queryset.filter(pk__in=[pk for pk, _ in batch])
+            .order_by().values_list('pk', flat=True))
+        result.extend(item for item in batch if item[0] in allowed)
+        if len(result) >= FALLBACK_MAX_RESULTS:
+            break
+    return result[:FALLBACK_MAX_RESULTS]
+
+
+def search_recipes(queryset, user, query):
+    """
+    queryset을 query와 관련있는 레시피로 거르고 relevance(관련도) 컬럼을 붙여서 반환합니다.
+    정렬은 호출하는 쪽에서 ('-relevance', '-id')로 합니다.
+    """
+    if connection.vendor == 'mysql':
+        table = connection.ops.quote_name(Recipe._meta.db_table)
+        relevance = RawSQL(
+            f'MATCH ({table}.`title`, {table}.`description`) '
+            'AGAINST (%s IN NATURAL LANGUAGE MODE)',
+            [query],
+            output_field=FloatField(),
+        )
+        return queryset.annotate(relevance=relevance).filter(relevance__gt=0)
+
+    ranked = _user_index(user.pk).search(query)
+    if len(ranked) > FALLBACK_MAX_RESULTS:
+        # 자르기 전에 queryset(테그/재료 필터)에 있는 레시피만 남김
+        ranked = _filter_ranked(queryset, ranked)
+    if not ranked:
+        return queryset.none().annotate(relevance=Value(0.0, output_field=FloatField()))
+    relevance = Case(
+        *[When(pk=pk, then=Value(score)) for pk, score in ranked],
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    return queryset.filter(pk__in=[pk for pk, _ in ranked]).annotate(relevance=relevance)
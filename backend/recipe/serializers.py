@@ -1,9 +1,20 @@
+from django.conf import settings
+import os
+
+from django.core.validators import get_available_image_extensions, validate_image_file_extension
+from django.db import transaction
+from django.urls import reverse
+from django.utils.http import urlencode
 from rest_framework import serializers
 from core.models import (
+    ImageUpload,
     Recipe,
     Tag,
     Ingredient,
 )
+from recipe import bulk
+from recipe import imaging
+from recipe import renditions
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -21,41 +32,99 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ['id', 'name'] # 직렬화할 필드들을 지정
         read_only_fields = ['id'] # 읽기 전용
 
+class IngredientCountSerializer(IngredientSerializer):
+    """?with_counts=1 일 때. recipe_count는 뷰에서 annotate"""
+    recipe_count = serializers.IntegerField(read_only=True)
+
+    class Meta(IngredientSerializer.Meta):
+        fields = IngredientSerializer.Meta.fields + ['recipe_count']
+
+
+class TagCountSerializer(TagSerializer):
+    recipe_count = serializers.IntegerField(read_only=True)
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ['recipe_count']
+
+
+class ThumbnailField(serializers.ReadOnlyField):
+    """
+    목록용 작은 사진 주소 (/recipes/{id}/image/?w=...). 사진이 없으면 None
+    서명(s)이 들어있어서 토큰 없이 <img> 태그로 불러올 수 있음
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = 'image'
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        recipe_id = value.instance.pk
+        url = '{}?{}'.format(
+            reverse('recipe:recipe-image', args=[recipe_id]),
+            urlencode({
+                'w': settings.RECIPE_THUMBNAIL_WIDTH,
+                's': renditions.sign(recipe_id, value.name),
+            }),
+        )
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+
 class RecipeSerializer(serializers.ModelSerializer):
     tags = TagSerializer(many=True, required=False)
     ingredients = IngredientSerializer(many=True, required=False)
+    thumbnail = ThumbnailField()
 
     class Meta:
         model = Recipe
-        fields = ['id', 'title', 'time_minutes', 'price', 'link', 'tags', 'ingredients']
+        fields = [
+            'id', 'title', 'time_minutes', 'price', 'link', 'tags', 'ingredients', 'thumbnail']
         read_only_fields = ['id']
 
     def _get_or_create_tags(self, tags, recipe):
         auth_user = self.context['request'].user
         # 현재 요청을 보낸 인증된 사용자를 가져옵니다
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create( # 이미 있으면 get없으면 create.
-                # tag_obj: 가져오거나 생성된 태그 객체
-                # created: 태그가 새로 생성되었는지 여부를 나타내는 불리언 값입니다
-                user=auth_user,
-                **tag, # name=tag['name']할수도있지만 나중에 필드가 추가될수있으니까
-            )
-            recipe.tags.add(tag_obj)
-            # recipe.tags.add(tag_obj) 부분은 태그 객체(tag_obj)를 레시피 객체(recipe)의 tags 필드에 추가하기 위해 사용됩니다.
-            # 이 과정은 다대다 관계(Many-to-Many)를 설정하기 위한 것입니다
+        tag_objs = bulk.resolve_by_name(Tag, auth_user, tags)
+        # 테그 이름들을 한번에 조회하고, 없는 것만 한번에 생성
+        recipe.tags.add(*tag_objs)
+        # recipe.tags.add(*tag_objs) 부분은 태그 객체들을 레시피 객체(recipe)의 tags 필드에 한번에 추가하기 위해 사용됩니다.
+        # 이 과정은 다대다 관계(Many-to-Many)를 설정하기 위한 것입니다
 
     def _get_or_create_ingredients(self, ingredients, recipe):
         auth_user = self.context['request'].user
-        for ingredient in ingredients:
-            ingredient_obj, create = Ingredient.objects.get_or_create(
-                user=auth_user,
-                **ingredient,
-            )
-            recipe.ingredients.add(ingredient_obj)
+        ingredient_objs = bulk.resolve_by_name(Ingredient, auth_user, ingredients)
+        recipe.ingredients.add(*ingredient_objs)
+
+    def _sync_relation(self, model, items, manager):
+        """
+        manager(recipe.tags 등)의 연결을 items와 같게 맞춥니다.
+        이미 연결된 건 그대로 두고, 빠진 것만 remove / 새로운 것만 add.
+        """
+        current = {obj.id: obj for obj in manager.all()}
+        # get_queryset에서 prefetch 해두었으면 쿼리 없이 가져옴
+        if {item['name'] for item in items} == {obj.name for obj in current.values()}:
+            return
+            # 이름이 모두 같으면 바뀐게 없으니 아무것도 안함
+
+        auth_user = self.context['request'].user
+        desired = bulk.resolve_by_name(model, auth_user, items)
+        desired_ids = {obj.id for obj in desired}
+
+        removed = [pk for pk in current if pk not in desired_ids]
+        added = [obj for obj in desired if obj.id not in current]
+        if removed:
+            manager.remove(*removed)
+        if added:
+            manager.add(*added)
 
+    @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop('tags', []) #tag에 있는거를 제거하고 tags에 저장.
         ingredients = validated_data.pop('ingredients', [])
+        bulk.lock_recipe_inserts(validated_data['user'])
+        # 같은 유저의 bulk INSERT가 새 id를 알아내는 동안 끼어들지 않게 (MySQL)
         recipe = Recipe.objects.create(**validated_data)
         # 따로따로 다른 model에 저장해야 하니까 분리함. 
         self._get_or_create_tags(tags, recipe)
@@ -63,6 +132,7 @@ class RecipeSerializer(serializers.ModelSerializer):
 
         return recipe
     
+    @transaction.atomic
     def update(self, instance, validated_data):
         # instance는 업데이트할 모델 객체를 나타냄.
         # instance : 예전데이터 
@@ -71,13 +141,12 @@ class RecipeSerializer(serializers.ModelSerializer):
         tags = validated_data.pop('tags', None)
         ingredients = validated_data.pop('ingredients', None)
 
+        # 전부 지우고 다시 넣지 않고, 바뀐 것만 through 테이블에 넣고 지움
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+            self._sync_relation(Tag, tags, instance.tags)
 
         if ingredients is not None:
-            instance.ingredients.clear()
-            self._get_or_create_ingredients(ingredients, instance)
+            self._sync_relation(Ingredient, ingredients, instance.ingredients)
 
       
         for attr, value in validated_data.items():
@@ -87,21 +156,88 @@ class RecipeSerializer(serializers.ModelSerializer):
         return instance
 
 
+class RenditionsField(serializers.ReadOnlyField):
+    """image_renditions의 파일 이름을 URL로 {'jpeg': {'320': url}, ...}"""
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        storage = Recipe._meta.get_field('image').storage
+        result = {}
+        for fmt, files in value.items():
+            result[fmt] = {}
+            for width, name in files.items():
+                url = storage.url(name)
+                result[fmt][width] = request.build_absolute_uri(url) if request else url
+        return result
+
+
 class RecipeDetailSerializer(RecipeSerializer):
     # 이 클래스는 RecipeSerializer를 상속받아 추가 필드를 포함하도록 확장된 직렬화 클래스
+    image_renditions = RenditionsField()
+
     class Meta(RecipeSerializer.Meta):
-        fields = RecipeSerializer.Meta.fields + ['description', 'image']
+        fields = RecipeSerializer.Meta.fields + [
+            'description', 'image', 'image_status', 'image_renditions']
+        read_only_fields = RecipeSerializer.Meta.read_only_fields + ['image_status']
         
 
+class RecipeBulkSerializer(RecipeDetailSerializer):
+    """/recipes/bulk/ 항목 검사용. 저장은 recipe/bulk.py에서 한번에"""
+
+    class Meta(RecipeDetailSerializer.Meta):
+        fields = [
+            'id', 'title', 'time_minutes', 'price', 'link', 'description', 'tags', 'ingredients']
+        read_only_fields = ['id']
+
+
 class RecipeImageSerializer(serializers.ModelSerializer):
     """레시피 생성 시리얼라이저"""
+    image = serializers.FileField(validators=[validate_image_file_extension])
+    # 사진 전체를 Pillow로 여는 검사는 업로드 뒤에 백그라운드에서 (recipe/images.py)
+    # 여기서는 크기와 파일 앞부분(매직 바이트)만 보고 바로 거름
+
     class Meta:
         model=Recipe
-        fields=['id', 'image']
+        fields=['id', 'image', 'image_status']
         # 이 시리얼라이저를 통해 Recipe 모델의 id와 image 필드만 직렬화되거나 역직렬화됩니다
-        read_only_fields = ['id']
+        read_only_fields = ['id', 'image_status']
         # 이 필드는 읽기 전용으로 설정됩니다.
         # 즉, 클라이언트가 id 필드를 수정할 수 없으며, 응답에서만 이 필드를 볼 수 있습니다.
         extra_kwargs = {'image': {'required': 'True'}}
         # {'required': 'True'}는 image 필드가 필수임을 나타냅니다. 
         # 따라서 이미지가 업로드되지 않으면 유효성 검사에서 오류가 발생합니다
+
+    def validate_image(self, image):
+        if image.size > settings.RECIPE_IMAGE_MAX_UPLOAD_SIZE:
+            raise serializers.ValidationError(
+                f'Image is larger than {settings.RECIPE_IMAGE_MAX_UPLOAD_SIZE} bytes.')
+        head = image.read(imaging.SNIFF_BYTES)
+        image.seek(0)
+        if imaging.sniff_format(head) is None:
+            raise serializers.ValidationError('Upload a JPEG, PNG, GIF or WebP image.')
+        return image
+
+
+class ImageUploadSerializer(serializers.ModelSerializer):
+    """나눠서 올리는 사진 업로드 (recipe/uploads.py). offset = 지금까지 받은 크기"""
+    offset = serializers.IntegerField(source='received', read_only=True)
+
+    class Meta:
+        model = ImageUpload
+        fields = ['id', 'filename', 'size', 'offset']
+        read_only_fields = ['id']
+
+    def validate_filename(self, filename):
+        ext = os.path.splitext(filename)[1][1:].lower()
+        if ext not in get_available_image_extensions():
+            raise serializers.ValidationError(f'File extension "{ext}" is not allowed.')
+        return filename
+
+    def validate_size(self, size):
+        # 조각을 받기 전에 전체 크기로 먼저 거름
+        if size <= 0:
+            raise serializers.ValidationError('Size must be positive.')
+        if size > settings.RECIPE_IMAGE_MAX_UPLOAD_SIZE:
+            raise serializers.ValidationError(
+                f'Image is larger than {settings.RECIPE_IMAGE_MAX_UPLOAD_SIZE} bytes.')
+        return size
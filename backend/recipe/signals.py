@@ -0,0 +1,154 @@
+"""
+레시피/테그/재료가 바뀌었을 때 처리하는 시그널.
+- 그 유저의 응답 캐시를 무효화 (recipe/cache.py)
+- 레시피 응답 내용이 바뀌는 경우(테그/재료 연결, 테그/재료 이름) 레시피의 updated_at 갱신
+- 동기화용 변경 기록 (recipe/sync.py)
+- 테그/재료 필터용 비트맵 인덱스 갱신 (recipe/facets.py)
+- 지운 레시피의 사진 파일, 지운 업로드의 임시 파일 정리 (recipe/images.py, recipe/uploads.py)
+뷰(perform_create, update, destroy, upload_image, 테그/재료 수정)뿐 아니라
+어드민이나 다른 코드에서 저장해도 같이 처리됩니다.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models import ImageUpload, Ingredient, Recipe, RecipeChange, Tag
+from recipe import facets, images, uploads
+from recipe.cache import bump_generation
+from recipe.sync import record_changes
+
+
+def touch_recipes(user_id, recipe_ids):
+    """레시피들의 updated_at을 지금으로 (save() 없이 UPDATE 한번) + 변경 기록"""
+    if recipe_ids:
+        Recipe.objects.filter(pk__in=recipe_ids).update(updated_at=timezone.now())
+        record_changes(user_id, recipe_ids)
+
+
+@receiver(post_save, sender=Recipe)
+def record_recipe_saved(sender, instance, **kwargs):
+    record_changes(instance.user_id, [instance.pk])
+
+
+@receiver(post_delete, sender=Recipe)
+def record_recipe_deleted(sender, instance, **kwargs):
+    record_changes(instance.user_id, [instance.pk], RecipeChange.DELETE)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_owner_cache(sender, instance, **kwargs):
+    bump_generation(instance.user_id)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def touch_recipes_on_rename(sender, instance, created, **kwargs):
+    # 테그 이름이 바뀌면 그 테그를 가진 레시피 응답도 바뀜
+    if not created:
+        touch_recipes(
+            instance.user_id,
+            list(instance.recipe_set.values_list('pk', flat=True)),
+        )
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def touch_recipes_on_delete(sender, instance, **kwargs):
+    # 삭제될 때 through row는 CASCADE로 지워져서 m2m_changed가 오지 않음
+    touch_recipes(
+        instance.user_id,
+        list(instance.recipe_set.values_list('pk', flat=True)),
+    )
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def relation_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove') and not pk_set:
+        return
+        # 이미 연결된 것만 add 한 경우 등 실제로 바뀐게 없음
+
+    if reverse:
+        # tag.recipe_set.add(...) 처럼 테그 쪽에서 바꾼 경우 instance는 Tag/Ingredient
+        if action == 'pre_clear':
+            touch_recipes(
+                instance.user_id,
+                list(instance.recipe_set.values_list('pk', flat=True)),
+            )
+        elif action in ('post_add', 'post_remove'):
+            touch_recipes(instance.user_id, pk_set)
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        instance.updated_at = timezone.now()
+        Recipe.objects.filter(pk=instance.pk).update(updated_at=instance.updated_at)
+        record_changes(instance.user_id, [instance.pk])
+
+    if action.startswith('post_'):
+        bump_generation(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_facet_index(sender, instance, action, reverse, pk_set, **kwargs):
+    relation = 'tags' if sender is Recipe.tags.through else 'ingredients'
+    if action in ('post_add', 'post_remove'):
+        if not pk_set:
+            return
+        # 정방향이면 instance는 Recipe, pk_set은 테그 id / 역방향이면 반대
+        item_ids, recipe_ids = (
+            ([instance.pk], pk_set) if reverse else (pk_set, [instance.pk]))
+        if action == 'post_add':
+            facets.update(
+                instance.user_id, lambda index: index.add(relation, item_ids, recipe_ids))
+        else:
+            facets.update(
+                instance.user_id, lambda index: index.remove(relation, item_ids, recipe_ids))
+    elif action == 'post_clear':
+        pk = instance.pk
+        # 인덱스는 커밋된 뒤에 고치므로 id를 지금 읽어 둠
+        if reverse:
+            facets.update(instance.user_id, lambda index: index.clear_item(relation, pk))
+        else:
+            facets.update(
+                instance.user_id, lambda index: index.clear_recipes([pk], (relation,)))
+
+
+@receiver(post_delete, sender=Recipe)
+def clear_deleted_recipe_facets(sender, instance, **kwargs):
+    # through row는 CASCADE로 지워져서 m2m_changed가 오지 않음
+    # 커밋된 뒤에는 instance.pk가 None이므로 id를 지금 읽어 둠
+    pk = instance.pk
+    facets.update(instance.user_id, lambda index: index.clear_recipes([pk]))
+
+
+@receiver(post_delete, sender=Recipe)
+def release_deleted_recipe_image(sender, instance, **kwargs):
+    # 같은 사진을 쓰는 다른 레시피가 없으면 커밋 뒤에 파일을 지움
+    images.release(instance.image.name, instance.image_renditions)
+
+
+@receiver(post_delete, sender=ImageUpload)
+def remove_upload_file(sender, instance, **kwargs):
+    # 취소/만료되거나 레시피와 같이 지워진 업로드의 받던 파일
+    uploads.remove_partial_file(instance.pk)
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def clear_deleted_item_facets(sender, instance, **kwargs):
+    relation = 'tags' if sender is Tag else 'ingredients'
+    pk = instance.pk
+    facets.update(instance.user_id, lambda index: index.clear_item(relation, pk))
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_new_user_cache(sender, instance, created, **kwargs):
+    # 삭제된 유저와 같은 id를 받은 새 유저가 예전 캐시를 보지 않게
+    if created:
+        bump_generation(instance.pk)
+        facets.update(instance.pk)
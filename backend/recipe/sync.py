@@ -0,0 +1,120 @@
+"""
+모바일 동기화용 레시피 변경 기록.
+시그널에서 record_changes로 기록하고, changes_since로 토큰 이후의 변경만 읽습니다.
+전체 목록을 다시 받지 않고 바뀐 만큼만 받으므로 비용이 레시피 수가 아니라 변경 수에 비례합니다.
+
+변경 id는 INSERT 순서대로 정해지지만 커밋 순서는 다를 수 있습니다.
+(트랜잭션 A가 100번을 받고 아직 안 끝났는데 이미지 스레드가 101번을 커밋하면,
+101까지 읽은 클라이언트는 나중에 커밋된 100번을 못 받음)
+그래서 토큰은 RECIPE_SYNC_OVERLAP초보다 오래된 변경까지만 올리고, 그 뒤의 변경은
+응답에는 넣되 다음 동기화에서 다시 보냅니다. 클라이언트는 레시피 id로 덮어쓰면 됨.
+
+토큰은 '<safe>' 또는 '<safe>.<cursor>' 문자열입니다.
+has_more로 이어 읽는 동안에는 cursor로 다음 페이지를 읽고, safe는 다음 동기화를 시작할 위치.
+오래된 기록은 prune_changes(prune_recipe_changes 명령)로 지우고, 그보다 오래된 토큰은
+TokenExpired(410)로 처음부터(since=0) 다시 받게 합니다.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from core.models import RecipeChange
+
+PRUNE_BATCH_SIZE = 1000
+
+
+class TokenExpired(Exception):
+    """토큰 이후의 기록 일부가 지워졌음. since=0으로 처음부터 다시 받아야 함"""
+
+
+def record_changes(user_id, recipe_ids, kind=RecipeChange.UPSERT):
+    """recipe_ids의 변경을 INSERT 한번으로 기록"""
+    if recipe_ids:
+        RecipeChange.objects.bulk_create([
+            RecipeChange(user_id=user_id, recipe_id=recipe_id, kind=kind)
+            for recipe_id in recipe_ids
+        ])
+
+
+def parse_token(token):
+    """'<safe>' 또는 '<safe>.<cursor>' -> (safe, cursor). 형식이 틀리면 ValueError"""
+    safe, _, cursor = str(token).partition('.')
+    safe = int(safe)
+    cursor = int(cursor) if cursor else safe
+    if safe < 0 or cursor < safe:
+        raise ValueError(token)
+    return safe, cursor
+
+
+def _retention_cutoff():
+    return timezone.now() - timedelta(days=settings.RECIPE_SYNC_RETENTION_DAYS)
+
+
+def _expired(safe):
+    """
+    safe는 이 유저의 변경 id이므로(0 제외) 그 기록이 보관 기간 안이면
+    그 뒤의 기록도 지워지지 않았음
+    """
+    created_at = RecipeChange.objects.filter(id=safe).values_list(
+        'created_at', flat=True).first()
+    return created_at is None or created_at < _retention_cutoff()
+
+
+def changes_since(user, token, limit):
+    """
+    토큰 이후의 변경 limit개를 읽어서 레시피별 마지막 상태로 정리합니다.
+    반환값: (upsert된 레시피 id 목록, 삭제된 레시피 id 목록, 다음 토큰, 더 있는지)
+    """
+    safe, cursor = parse_token(token)
+    if safe and _expired(safe):
+        raise TokenExpired('Sync token expired; sync again from since=0.')
+
+    rows = list(
+        RecipeChange.objects.filter(user=user, id__gt=cursor)
+        .order_by('id')
+        .values_list('id', 'recipe_id', 'kind', 'created_at')[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    settled = timezone.now() - timedelta(seconds=settings.RECIPE_SYNC_OVERLAP)
+    frozen = safe < cursor
+    # 이번 동기화에서 이미 최근 변경을 만났으면 safe는 그대로
+    latest = {}
+    for change_id, recipe_id, kind, created_at in rows:
+        latest[recipe_id] = kind
+        # 같은 레시피가 여러번 바뀌었으면 마지막 것만
+        if not frozen and created_at <= settled:
+            safe = change_id
+        else:
+            frozen = True
+        cursor = change_id
+
+    upserted = [pk for pk, kind in latest.items() if kind == RecipeChange.UPSERT]
+    deleted = [pk for pk, kind in latest.items() if kind == RecipeChange.DELETE]
+    next_token = f'{safe}.{cursor}' if has_more and safe < cursor else str(safe)
+    return upserted, deleted, next_token, has_more
+
+
+def prune_changes(days=None):
+    """
+    보관 기간보다 오래된 기록 중 삭제 기록과, 같은 레시피의 더 새 기록이 있는 기록을 지웁니다.
+    남는 것은 지금 있는 레시피마다 마지막 기록 하나이므로 since=0으로 처음부터 받아도 빠짐없음.
+    반환값: 지운 개수
+    """
+    if days is None:
+        days = settings.RECIPE_SYNC_RETENTION_DAYS
+    cutoff = timezone.now() - timedelta(days=days)
+    newer = RecipeChange.objects.filter(
+        user_id=OuterRef('user_id'), recipe_id=OuterRef('recipe_id'), id__gt=OuterRef('id'))
+    old = RecipeChange.objects.filter(created_at__lt=cutoff)
+    ids = list(
+        old.filter(kind=RecipeChange.DELETE).values_list('id', flat=True)
+        .union(old.filter(Exists(newer)).values_list('id', flat=True))
+    )
+    # MySQL은 DELETE하는 테이블을 서브쿼리에서 읽을 수 없으므로 id를 먼저 읽어서 나눠 지움
+    for start in range(0, len(ids), PRUNE_BATCH_SIZE):
+        RecipeChange.objects.filter(id__in=ids[start:start + PRUNE_BATCH_SIZE]).delete()
+    return len(ids)
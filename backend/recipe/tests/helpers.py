@@ -0,0 +1,30 @@
+"""
+테스트에서 같이 쓰는 도우미
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryCountAssertionsMixin:
+    """엔드포인트의 쿼리 수가 데이터 양과 상관없이 일정한지 검사"""
+
+    def assertConstantQueries(self, request, grow, sizes=(1, 5, 20)):
+        """
+        grow(n): 데이터를 n개 더 만들어주는 함수
+        request(): 엔드포인트를 호출하고 응답을 반환하는 함수
+        sizes만큼 데이터를 늘려가면서 매번 쿼리 수를 세고, 모두 같아야 통과.
+        통과하면 그 쿼리 수를 반환합니다.
+        """
+        counts = []
+        for size in sizes:
+            grow(size)
+            with CaptureQueriesContext(connection) as ctx:
+                res = request()
+            self.assertLess(res.status_code, 400)
+            counts.append(len(ctx.captured_queries))
+
+        self.assertEqual(
+            len(set(counts)), 1,
+            f'Query count grows with data size: {dict(zip(sizes, counts))}',
+        )
+        return counts[0]
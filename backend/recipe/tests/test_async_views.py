@@ -0,0 +1,98 @@
+"""
+async 레시피 읽기 뷰 테스트 (ASGI, RECIPE_ASYNC_VIEWS)
+"""
+import asyncio
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TransactionTestCase, override_settings
+from django.urls import include, path, reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from core.models import Recipe, Tag
+from recipe import async_views
+from recipe.urls import router
+
+urlpatterns = [
+    path('api/recipe/', include((async_views.async_urls(router.urls), 'recipe'))),
+]
+
+
+class AsyncUrlsTests(TransactionTestCase):
+
+    def test_only_read_routes_are_async(self):
+        views = {url.name: url.callback for url in async_views.async_urls(router.urls)}
+
+        for name in async_views.ASYNC_ROUTES:
+            self.assertTrue(asyncio.iscoroutinefunction(views[name]), name)
+        self.assertFalse(asyncio.iscoroutinefunction(views['recipe-bulk']))
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncRecipeApiTests(TransactionTestCase):
+    # 뷰가 다른 스레드(다른 DB 연결)에서 돌기 때문에 TestCase의 트랜잭션 대신 실제로 커밋
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('user@example.com', 'testpass123')
+        token = Token.objects.create(user=self.user)
+        self.client = AsyncClient()
+        self.headers = {'authorization': f'Token {token.key}'}
+        # Django 3.2의 AsyncClient는 헤더를 요청마다 소문자 이름으로 받음
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='Curry', time_minutes=10, price=Decimal('5.00'))
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name='Dinner'))
+
+    def request(self, method, url, client=None, **kwargs):
+        async def send():
+            return await getattr(client or self.client, method)(url, **kwargs)
+        return async_to_sync(send)()
+
+    def get(self, url):
+        return self.request('get', url, **self.headers)
+
+    def test_list_and_detail(self):
+        res = self.get(reverse('recipe:recipe-list'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['title'] for item in res.json()['results']], ['Curry'])
+
+        res = self.get(reverse('recipe:recipe-detail', args=[self.recipe.id]))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['tags'], [{'id': self.recipe.tags.get().id, 'name': 'Dinner'}])
+
+    def test_tag_list(self):
+        res = self.get(reverse('recipe:tag-list'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([tag['name'] for tag in res.json()['results']], ['Dinner'])
+
+    def test_auth_required(self):
+        res = self.request('get', reverse('recipe:recipe-list'), client=AsyncClient())
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_concurrent_requests(self):
+        """여러 요청을 동시에 보내도 모두 처리됨"""
+        url = reverse('recipe:recipe-list')
+
+        async def get_many():
+            return await asyncio.gather(
+                *(self.client.get(url, **self.headers) for _ in range(10)))
+
+        responses = async_to_sync(get_many)()
+
+        self.assertEqual({res.status_code for res in responses}, {status.HTTP_200_OK})
+
+    def test_create_still_works(self):
+        """같은 주소의 쓰기(POST)도 sync 뷰와 같이 동작"""
+        payload = {'title': 'Soup', 'time_minutes': 5, 'price': '2.00'}
+
+        res = self.request(
+            'post', reverse('recipe:recipe-list'), data=payload,
+            content_type='application/json', **self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Recipe.objects.filter(user=self.user, title='Soup').exists())
@@ -0,0 +1,175 @@
+"""
+테그/재료 비트맵 인덱스 테스트
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase
+
+from core.models import Ingredient, Recipe, Tag
+from recipe import facets
+from recipe.facets import FacetIndex, bitmap_to_ids, ids_to_bitmap
+
+
+class BitmapTests(SimpleTestCase):
+    def test_round_trip(self):
+        ids = [0, 1, 7, 8, 63, 64, 1000, 123457]
+
+        self.assertEqual(bitmap_to_ids(ids_to_bitmap(reversed(ids))), ids)
+        self.assertEqual(bitmap_to_ids(ids_to_bitmap([])), [])
+
+    def test_resolve_any_all(self):
+        index = FacetIndex(1, recipe_ids=[10, 11, 12, 13])
+        index.add('tags', [1], [10, 11])
+        index.add('tags', [2], [11, 12])
+        index.add('ingredients', [5], [11, 12, 13])
+
+        self.assertEqual(index.to_ids(index.resolve({'tags': [1, 2]}, 'any')), [12, 11, 10])
+        self.assertEqual(index.to_ids(index.resolve({'tags': [1, 2]}, 'all')), [11])
+        self.assertEqual(index.to_ids(index.resolve({'tags': [1, 99]}, 'all')), [])
+        self.assertEqual(
+            index.to_ids(index.resolve({'tags': [1, 2], 'ingredients': [5]}, 'any')),
+            [12, 11],
+        )
+
+    def test_bitmap_size_follows_user_recipes(self):
+        """레시피 id가 커도 비트맵은 그 유저의 레시피 수만큼"""
+        index = FacetIndex(1)
+        index.add('tags', [1], [10_000_000, 10_000_004])
+
+        self.assertLess(index.bitmaps['tags'][1].bit_length(), 8)
+        self.assertEqual(
+            index.to_ids(index.resolve({'tags': [1]}, 'any')), [10_000_004, 10_000_000])
+
+    def test_dumps_loads(self):
+        index = FacetIndex(7)
+        index.add('tags', [1], [3, 5000])
+
+        loaded = FacetIndex.loads(index.dumps())
+
+        self.assertEqual(loaded.version, 7)
+        self.assertEqual(loaded.bitmaps, index.bitmaps)
+        self.assertEqual(loaded.recipe_ids, [3, 5000])
+
+    def test_dumps_compresses_changed_bitmaps_only(self):
+        index = FacetIndex(1)
+        index.add('tags', [1], [3])
+        index.add('tags', [2], [4])
+        index.dumps()
+        unchanged = index._blobs[('tags', 2)]
+
+        index.add('tags', [1], [4])
+        index.dumps()
+
+        self.assertIs(index._blobs[('tags', 2)], unchanged)
+        self.assertEqual(FacetIndex.loads(index.dumps()).bitmaps, index.bitmaps)
+
+
+class FacetIndexSignalTests(TestCase):
+    """시그널로 고친 인덱스가 DB에서 새로 만든 인덱스와 같은지"""
+
+    def setUp(self):
+        with self.committed():
+            self.user = get_user_model().objects.create_user(
+                email='user@example.com', password='test123')
+            self.tags = [Tag.objects.create(user=self.user, name=f'Tag {i}') for i in range(3)]
+            self.ingredient = Ingredient.objects.create(user=self.user, name='Tofu')
+            self.recipes = [
+                Recipe.objects.create(
+                    user=self.user, title=f'Recipe {i}', time_minutes=5, price=Decimal('1.00'))
+                for i in range(3)
+            ]
+            self.recipes[0].tags.add(*self.tags[:2])
+        facets.get_index(self.user.pk)
+        # 여기서부터는 메모리에 있는 인덱스를 시그널이 (커밋된 뒤에) 고침
+
+    def assertIndexInSync(self):
+        with self.assertNumQueries(0):
+            # DB에서 다시 만들지 않고 시그널이 고친 인덱스를 그대로 씀
+            index = facets.get_index(self.user.pk)
+        built = FacetIndex.build(self.user.pk, index.version)
+        for relation in facets.RELATIONS:
+            self.assertEqual(
+                {pk: index.to_ids(bitmap) for pk, bitmap in index.bitmaps[relation].items()
+                 if bitmap},
+                {pk: built.to_ids(bitmap) for pk, bitmap in built.bitmaps[relation].items()},
+            )
+
+    def committed(self):
+        """인덱스는 커밋된 뒤에 고쳐지므로, 블록이 끝날 때 on_commit 콜백을 실행"""
+        return self.captureOnCommitCallbacks(execute=True)
+
+    def test_forward_add_remove_clear(self):
+        recipe = self.recipes[1]
+        with self.committed():
+            recipe.tags.add(self.tags[2])
+            recipe.ingredients.add(self.ingredient)
+        self.assertIndexInSync()
+
+        with self.committed():
+            self.recipes[0].tags.remove(self.tags[0])
+        self.assertIndexInSync()
+
+        with self.committed():
+            self.recipes[0].tags.clear()
+        self.assertIndexInSync()
+
+    def test_reverse_add_remove_clear(self):
+        tag = self.tags[2]
+        with self.committed():
+            tag.recipe_set.add(self.recipes[1], self.recipes[2])
+        self.assertIndexInSync()
+
+        with self.committed():
+            tag.recipe_set.remove(self.recipes[1])
+        self.assertIndexInSync()
+
+        with self.committed():
+            self.tags[0].recipe_set.clear()
+        self.assertIndexInSync()
+
+    def test_delete_recipe_and_tag(self):
+        with self.committed():
+            self.recipes[0].delete()
+        self.assertIndexInSync()
+
+        with self.committed():
+            self.recipes[1].tags.add(self.tags[1])
+            self.tags[1].delete()
+        self.assertIndexInSync()
+
+    def test_resolve_limit(self):
+        with self.committed():
+            self.recipes[1].tags.add(self.tags[0])
+
+        tag_id = self.tags[0].pk
+        self.assertEqual(
+            facets.resolve(self.user.pk, {'tags': [tag_id]}, 'any', 10),
+            [self.recipes[1].pk, self.recipes[0].pk],
+        )
+        self.assertIsNone(facets.resolve(self.user.pk, {'tags': [tag_id]}, 'any', 1))
+
+    def test_stale_index_rebuilt(self):
+        """다른 프로세스가 인덱스를 고쳤으면(버전이 다르면) 메모리에 있는 것을 쓰지 않음"""
+        facets._indexes.clear()
+        with self.committed():
+            self.recipes[2].tags.add(self.tags[0])
+        # 메모리에 인덱스가 없는 상태에서 바뀜 = 다른 프로세스에서 바뀐 것과 같음
+
+        ids = facets.resolve(self.user.pk, {'tags': [self.tags[0].pk]}, 'any', 10)
+
+        self.assertEqual(ids, [self.recipes[2].pk, self.recipes[0].pk])
+
+    def test_rolled_back_change_not_applied(self):
+        """롤백된 테그 연결은 인덱스에 남지 않음"""
+        with self.committed() as callbacks:
+            try:
+                with transaction.atomic():
+                    self.recipes[2].tags.add(self.tags[2])
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(callbacks, [])
+
+        self.assertEqual(facets.resolve(self.user.pk, {'tags': [self.tags[2].pk]}, 'any', 10), [])
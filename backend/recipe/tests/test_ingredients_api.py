@@ -55,7 +55,7 @@ class PrivateIngredientsApiTests(TestCase):
         ingredients = Ingredient.objects.all().order_by('-name')
         serializer = IngredientSerializer(ingredients, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_ingredients_limited_to_user(self):
         user2 = create_user(email='user2@example.com')
@@ -65,9 +65,9 @@ class PrivateIngredientsApiTests(TestCase):
 
         res = self.client.get(INGREDIENTS_URL) #로그인한 유저의 모든 재료를 get
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], ingredient.name)
-        self.assertEqual(res.data[0]['id'], ingredient.id)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], ingredient.name)
+        self.assertEqual(res.data['results'][0]['id'], ingredient.id)
 
 
     # 재료 수정하는 기능 테스트
@@ -113,8 +113,8 @@ class PrivateIngredientsApiTests(TestCase):
 
         s1 = IngredientSerializer(in1)
         s2 = IngredientSerializer(in2)
-        self.assertIn(s1.data, res.data)
-        self.assertNotIn(s2.data, res.data) # s2는 아무 레시피에도 할당되어있지 않음.
+        self.assertIn(s1.data, res.data['results'])
+        self.assertNotIn(s2.data, res.data['results']) # s2는 아무 레시피에도 할당되어있지 않음.
         
     
     def test_filtered_ingredients_unique(self):
@@ -138,8 +138,26 @@ class PrivateIngredientsApiTests(TestCase):
 
         res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
         # 재료중에 레시피에 이어져있는것은 ing(계란)만 나오는지 확인
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
 
 
 
 
+
+    def test_ingredients_with_counts(self):
+        """with_counts=1이면 재료마다 레시피 수가 같이 오는지 테스트"""
+        eggs = Ingredient.objects.create(user=self.user, name='Eggs')
+        milk = Ingredient.objects.create(user=self.user, name='Milk')
+        for title in ('Omelette', 'Custard'):
+            recipe = Recipe.objects.create(
+                title=title, time_minutes=5, price=Decimal('2.00'), user=self.user)
+            recipe.ingredients.add(eggs)
+        recipe.ingredients.add(milk)
+
+        res = self.client.get(
+            INGREDIENTS_URL, {'with_counts': 1, 'search': 'custard'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        counts = {i['id']: i['recipe_count'] for i in res.data['results']}
+        self.assertEqual(counts, {eggs.id: 1, milk.id: 1})
+        self.assertNotIn('recipe_count', self.client.get(INGREDIENTS_URL).data['results'][0])
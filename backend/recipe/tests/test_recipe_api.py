@@ -1,24 +1,46 @@
+from datetime import timedelta
+import base64
 from decimal import Decimal
+import csv
+import hashlib
+import io
+import json
 import tempfile
 import os
+import shutil
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import Mock, patch
 
+from asgiref.sync import async_to_sync
 from PIL import Image
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.files.storage import default_storage
+from django.core.handlers.asgi import ASGIHandler
+from django.core.signals import request_finished
+from django.db import close_old_connections, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
 from rest_framework import status
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 
-from core.models import (Recipe, Tag, Ingredient) # Tag도 시리얼라이저 해주기위해 추가함
+from core.models import (ImageUpload, Recipe, RecipeChange, Tag, Ingredient) # Tag도 시리얼라이저 해주기위해 추가함
 
 from recipe.serializers import (
     RecipeSerializer,
     RecipeDetailSerializer,
 )
+from recipe import images, renditions, sync, uploads
+from recipe.tests.helpers import QueryCountAssertionsMixin
 
 RECIPES_URL = reverse('recipe:recipe-list')
+CHANGES_URL = reverse('recipe:recipe-changes')
 
 
 def detail_url(recipe_id):
@@ -76,7 +98,7 @@ class PrivateRecipeApiTests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipe_list_limited_to_user(self):
         other_user = create_user(
@@ -91,7 +113,7 @@ class PrivateRecipeApiTests(TestCase):
         recipes = Recipe.objects.filter(user = self.user)
         serializer = RecipeSerializer(recipes, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_get_recipe_detail(self):
         recipe = create_recipe(user=self.user)
@@ -237,6 +259,21 @@ class PrivateRecipeApiTests(TestCase):
             self.assertTrue(exists)
 
 
+    def test_create_recipe_with_repeated_tag_names(self):
+        """같은 테그 이름을 여러번 보내도 한번만 연결"""
+        payload = {
+            'title': 'Bibimbap',
+            'time_minutes': 20,
+            'price': Decimal('7.00'),
+            'tags': [{'name': 'Korean'}, {'name': 'Korean'}],
+        }
+        res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertEqual(recipe.tags.count(), 1)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+
     def test_create_tag_on_update(self):
         recipe = create_recipe(user=self.user)
 
@@ -275,6 +312,44 @@ class PrivateRecipeApiTests(TestCase):
         self.assertEqual(recipe.tags.count(), 0)
 
 
+    def test_update_same_tags_no_writes(self):
+        """테그가 그대로면 through 테이블에 쓰지 않음"""
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(
+            Tag.objects.create(user=self.user, name='Lunch'),
+            Tag.objects.create(user=self.user, name='Dinner'),
+        )
+
+        payload = {'tags': [{'name': 'Dinner'}, {'name': 'Lunch'}]}
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.patch(detail_url(recipe.id), payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        through = Recipe.tags.through._meta.db_table
+        writes = [
+            q['sql'] for q in ctx.captured_queries
+            if through in q['sql'] and not q['sql'].startswith('SELECT')
+        ]
+        self.assertEqual(writes, [])
+        self.assertEqual(recipe.tags.count(), 2)
+
+    def test_update_tags_keeps_unchanged_rows(self):
+        """바뀌지 않은 테그의 through row는 지우고 다시 만들지 않음"""
+        lunch = Tag.objects.create(user=self.user, name='Lunch')
+        dinner = Tag.objects.create(user=self.user, name='Dinner')
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(lunch, dinner)
+        Through = Recipe.tags.through
+        kept_row = Through.objects.get(recipe=recipe, tag=lunch)
+
+        payload = {'tags': [{'name': 'Lunch'}, {'name': 'Brunch'}]}
+        res = self.client.patch(detail_url(recipe.id), payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(Through.objects.filter(id=kept_row.id).exists())
+        names = sorted(recipe.tags.values_list('name', flat=True))
+        self.assertEqual(names, ['Brunch', 'Lunch'])
+
     def test_create_recipe_with_new_ingredients(self):
         payload = {
             'title': 'Cauliflower Tacos',
@@ -382,9 +457,9 @@ class PrivateRecipeApiTests(TestCase):
         s1 = RecipeSerializer(r1)
         s2 = RecipeSerializer(r2)
         s3 = RecipeSerializer(r3)
-        self.assertIn(s1.data, res.data)
-        self.assertIn(s2.data, res.data)
-        self.assertNotIn(s3.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertIn(s2.data, res.data['results'])
+        self.assertNotIn(s3.data, res.data['results'])
 
     def test_filter_by_ingreidents(self):
         """재료로 필터링 테스트"""
@@ -403,12 +478,534 @@ class PrivateRecipeApiTests(TestCase):
         s1 = RecipeSerializer(r1)
         s2 = RecipeSerializer(r2)
         s3 = RecipeSerializer(r3)
-        self.assertIn(s1.data, res.data)
-        self.assertIn(s2.data, res.data)
-        self.assertNotIn(s3.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertIn(s2.data, res.data['results'])
+        self.assertNotIn(s3.data, res.data['results'])
         # Feta Cheese와 Chicekn로 검색하면 s1, s2는 나오고 s3는 나오지 말아야 한다.
 
+    def test_filter_match_any_no_duplicates(self):
+        """여러 테그를 가진 레시피도 한번만 나오는지 테스트"""
+        recipe = create_recipe(user=self.user)
+        tag1 = Tag.objects.create(user=self.user, name='Vegan')
+        tag2 = Tag.objects.create(user=self.user, name='Vegetarian')
+        recipe.tags.add(tag1, tag2)
+
+        res = self.client.get(RECIPES_URL, {'tags': f'{tag1.id},{tag2.id}'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in res.data['results']], [recipe.id])
+
+    def test_filter_match_all(self):
+        """match=all이면 테그를 모두 가진 레시피만 나오는지 테스트"""
+        tag1 = Tag.objects.create(user=self.user, name='Vegan')
+        tag2 = Tag.objects.create(user=self.user, name='Dinner')
+        both = create_recipe(user=self.user, title='Tofu Stew')
+        both.tags.add(tag1, tag2)
+        only_one = create_recipe(user=self.user, title='Salad')
+        only_one.tags.add(tag1)
+
+        res = self.client.get(
+            RECIPES_URL, {'tags': f'{tag1.id},{tag2.id}', 'match': 'all'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in res.data['results']], [both.id])
+
+        with patch('recipe.filters.MAX_EXISTS_TERMS', 1), \
+                self.settings(RECIPE_FACET_INDEX=False):
+            # id가 많을 때 쓰는 GROUP BY ... HAVING 경로도 같은 결과
+            res = self.client.get(
+                RECIPES_URL, {'tags': f'{tag1.id},{tag2.id}', 'match': 'all'})
+
+        self.assertEqual([r['id'] for r in res.data['results']], [both.id])
+
+    def test_filter_match_all_tags_and_ingredients(self):
+        """match=all을 테그와 재료에 같이 적용하는지 테스트"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        in1 = Ingredient.objects.create(user=self.user, name='Tofu')
+        in2 = Ingredient.objects.create(user=self.user, name='Kimchi')
+        r1 = create_recipe(user=self.user, title='Kimchi Tofu')
+        r1.tags.add(tag)
+        r1.ingredients.add(in1, in2)
+        r2 = create_recipe(user=self.user, title='Tofu Salad')
+        r2.tags.add(tag)
+        r2.ingredients.add(in1)
+
+        res = self.client.get(RECIPES_URL, {
+            'tags': f'{tag.id}',
+            'ingredients': f'{in1.id},{in2.id}',
+            'match': 'all',
+        })
+
+        self.assertEqual([r['id'] for r in res.data['results']], [r1.id])
+
+    def test_filter_invalid_match(self):
+        """match에 any, all 외의 값을 넣으면 400인지 테스트"""
+        res = self.client.get(RECIPES_URL, {'match': 'some'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('match', res.data)
+
+class RecipePaginationTests(TestCase):
+    """커서 페이지네이션 테스트"""
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+
+    def test_follow_cursor_returns_every_recipe_once(self):
+        """next를 따라가면 모든 레시피가 최신순으로 한번씩 나옴"""
+        recipes = [create_recipe(user=self.user) for _ in range(7)]
+
+        ids = []
+        res = self.client.get(RECIPES_URL, {'page_size': 3})
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data['results']), 3)
+            ids.extend(r['id'] for r in res.data['results'])
+            if not res.data['next']:
+                break
+            res = self.client.get(res.data['next'])
+
+        expected = sorted((r.id for r in recipes), reverse=True)
+        self.assertEqual(ids, expected)
+
+    @override_settings(API_MAX_PAGE_SIZE=2)
+    def test_page_size_capped(self):
+        for _ in range(3):
+            create_recipe(user=self.user)
+
+        res = self.client.get(RECIPES_URL, {'page_size': 100})
+
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertIsNotNone(res.data['next'])
+
+
+class RecipeResponseCacheTests(TestCase):
+    """레시피 조회 응답 캐시/ETag 테스트"""
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+
+    def test_repeated_list_served_from_cache(self):
+        create_recipe(user=self.user)
+        first = self.client.get(RECIPES_URL)
+
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get(RECIPES_URL)
+
+        # 바뀌었는지 확인하는 집계 쿼리 하나만
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(second.data, first.data)
+
+    def test_write_invalidates_list(self):
+        """레시피를 만들면 다음 목록 조회에 바로 나옴"""
+        self.client.get(RECIPES_URL)
+        payload = {'title': 'New', 'time_minutes': 5, 'price': Decimal('1.00')}
+        self.client.post(RECIPES_URL, payload)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_tag_rename_invalidates_detail(self):
+        tag = Tag.objects.create(user=self.user, name='Lunch')
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(tag)
+        self.client.get(detail_url(recipe.id))
+
+        self.client.patch(reverse('recipe:tag-detail', args=[tag.id]), {'name': 'Brunch'})
+        res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.data['tags'][0]['name'], 'Brunch')
+
+    def test_if_none_match_returns_304(self):
+        recipe = create_recipe(user=self.user)
+        res = self.client.get(detail_url(recipe.id))
+        etag = res['ETag']
+
+        res = self.client.get(detail_url(recipe.id), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.patch(detail_url(recipe.id), {'title': 'Changed'})
+        res = self.client.get(detail_url(recipe.id), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_if_modified_since_returns_304(self):
+        recipe = create_recipe(user=self.user)
+        res = self.client.get(detail_url(recipe.id))
+        last_modified = res['Last-Modified']
+
+        res = self.client.get(
+            detail_url(recipe.id), HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_tag_change_updates_recipe_timestamp(self):
+        """테그 연결이 바뀌면 레시피 updated_at도 바뀜"""
+        recipe = create_recipe(user=self.user)
+        before = recipe.updated_at
+
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+
+        recipe.refresh_from_db()
+        self.assertGreater(recipe.updated_at, before)
+
+    def test_delete_changes_list_etag(self):
+        """가장 최근 수정된 레시피가 아니어도 삭제되면 ETag가 바뀜"""
+        old = create_recipe(user=self.user)
+        create_recipe(user=self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        Recipe.objects.filter(id=old.id).delete()
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_cache_not_shared_between_users(self):
+        create_recipe(user=self.user)
+        self.client.get(RECIPES_URL)
+        other = create_user(email='other@example.com', password='test123')
+        self.client.force_authenticate(other)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.data['results'], [])
+
+
+class RecipeSearchApiTests(TestCase):
+    """제목/설명 검색 테스트"""
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+
+    def test_search_title_and_description(self):
+        r1 = create_recipe(user=self.user, title='Kimchi Stew', description='Spicy')
+        r2 = create_recipe(user=self.user, title='Fried rice', description='With kimchi')
+        create_recipe(user=self.user, title='Pancakes', description='Sweet')
+
+        res = self.client.get(RECIPES_URL, {'search': 'kimchi'})
+
+        ids = {r['id'] for r in res.data['results']}
+        self.assertEqual(ids, {r1.id, r2.id})
+
+    def test_search_ordered_by_relevance(self):
+        """검색어가 더 많이 들어간 레시피가 먼저"""
+        weak = create_recipe(
+            user=self.user, title='Soup', description='garlic onion carrot potato leek')
+        strong = create_recipe(
+            user=self.user, title='Garlic bread', description='lots of garlic')
+
+        res = self.client.get(RECIPES_URL, {'search': 'garlic'})
+
+        self.assertEqual([r['id'] for r in res.data['results']], [strong.id, weak.id])
+
+    def test_search_paginated(self):
+        recipes = [create_recipe(user=self.user, title='Tofu') for _ in range(5)]
+
+        ids = []
+        res = self.client.get(RECIPES_URL, {'search': 'tofu', 'page_size': 2})
+        while True:
+            ids.extend(r['id'] for r in res.data['results'])
+            if not res.data['next']:
+                break
+            res = self.client.get(res.data['next'])
+
+        self.assertEqual(sorted(ids), sorted(r.id for r in recipes))
+
+    def test_search_previous_pages_with_same_relevance(self):
+        """관련도가 모두 같아도 previous로 되돌아가면 같은 페이지가 나옴"""
+        recipes = [create_recipe(user=self.user, title='Tofu') for _ in range(5)]
+
+        pages = []
+        res = self.client.get(RECIPES_URL, {'search': 'tofu', 'page_size': 2})
+        while True:
+            pages.append([r['id'] for r in res.data['results']])
+            if not res.data['next']:
+                break
+            res = self.client.get(res.data['next'])
+        back = []
+        while res.data['previous']:
+            res = self.client.get(res.data['previous'])
+            back.insert(0, [r['id'] for r in res.data['results']])
+
+        self.assertEqual(sum(pages, []), sorted((r.id for r in recipes), reverse=True))
+        self.assertEqual(back, pages[:-1])
+
+    def test_search_invalid_cursor(self):
+        """검색 커서 위치가 (관련도, id) 꼴이 아니면 404"""
+        cursor = base64.b64encode(b'p=1.5').decode()
+        res = self.client.get(RECIPES_URL, {'search': 'tofu', 'cursor': cursor})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_search_sees_new_recipe(self):
+        self.client.get(RECIPES_URL, {'search': 'bulgogi'})
+        recipe = create_recipe(user=self.user, title='Bulgogi')
+
+        res = self.client.get(RECIPES_URL, {'search': 'bulgogi'})
+
+        self.assertEqual([r['id'] for r in res.data['results']], [recipe.id])
+
+    def test_search_limited_to_user(self):
+        other = create_user(email='other@example.com', password='test123')
+        create_recipe(user=other, title='Bibimbap')
+
+        res = self.client.get(RECIPES_URL, {'search': 'bibimbap'})
+
+        self.assertEqual(res.data['results'], [])
+
+    @patch('recipe.search.FALLBACK_MAX_RESULTS', 2)
+    def test_search_limit_applied_after_filters(self):
+        """검색 결과를 자르기 전에 테그 필터를 적용 (관련도가 낮아도 필터에 맞으면 나옴)"""
+        for _ in range(3):
+            create_recipe(user=self.user, title='Noodle noodle soup', description='')
+        tagged = create_recipe(user=self.user, title='Noodle salad', description='cold')
+        tag = Tag.objects.create(user=self.user, name='Summer')
+        tagged.tags.add(tag)
+
+        res = self.client.get(RECIPES_URL, {'search': 'noodle', 'tags': tag.id})
+
+        self.assertEqual([r['id'] for r in res.data['results']], [tagged.id])
+
+
+@override_settings(RECIPE_SYNC_OVERLAP=0)
+class RecipeChangesApiTests(TestCase):
+    """변경분 동기화 api 테스트 (다시 보내는 구간 없이)"""
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+
+    def test_changes_since_token(self):
+        """토큰 이후에 바뀐 레시피와 삭제된 레시피만 나옴"""
+        kept = create_recipe(user=self.user, title='Kept')
+        edited = create_recipe(user=self.user, title='Edited')
+        removed = create_recipe(user=self.user, title='Removed')
+        token = self.client.get(CHANGES_URL).data['next']
+
+        edited.title = 'Edited again'
+        edited.save()
+        removed_id = removed.id
+        removed.delete()
+        added = create_recipe(user=self.user, title='Added')
+        res = self.client.get(CHANGES_URL, {'since': token})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = sorted(r['id'] for r in res.data['updated'])
+        self.assertEqual(ids, sorted([edited.id, added.id]))
+        self.assertNotIn(kept.id, ids)
+        self.assertEqual(res.data['deleted'], [removed_id])
+        self.assertFalse(res.data['has_more'])
+
+        res = self.client.get(CHANGES_URL, {'since': res.data['next']})
+        self.assertEqual(res.data['updated'], [])
+        self.assertEqual(res.data['deleted'], [])
+
+    def test_tag_change_reported(self):
+        recipe = create_recipe(user=self.user)
+        token = self.client.get(CHANGES_URL).data['next']
+
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        res = self.client.get(CHANGES_URL, {'since': token})
+
+        self.assertEqual([r['id'] for r in res.data['updated']], [recipe.id])
+        self.assertEqual(res.data['updated'][0]['tags'][0]['name'], 'Vegan')
+
+    def test_changes_paged(self):
+        for _ in range(5):
+            create_recipe(user=self.user)
+
+        res = self.client.get(CHANGES_URL, {'page_size': 2})
+        self.assertTrue(res.data['has_more'])
+
+        seen = [r['id'] for r in res.data['updated']]
+        while res.data['has_more']:
+            res = self.client.get(
+                CHANGES_URL, {'since': res.data['next'], 'page_size': 2})
+            seen.extend(r['id'] for r in res.data['updated'])
+        self.assertEqual(len(set(seen)), 5)
+
+    def test_changes_limited_to_user(self):
+        other = create_user(email='other@example.com', password='test123')
+        create_recipe(user=other)
+
+        res = self.client.get(CHANGES_URL)
+
+        self.assertEqual(res.data['updated'], [])
+
+    def test_invalid_since_error(self):
+        res = self.client.get(CHANGES_URL, {'since': 'abc'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_expired_token(self):
+        """보관 기간이 지난 토큰은 410, since=0으로 다시 받으면 지금 있는 레시피가 모두 옴"""
+        kept = create_recipe(user=self.user)
+        removed = create_recipe(user=self.user)
+        token = self.client.get(CHANGES_URL).data['next']
+        removed.delete()
+        RecipeChange.objects.update(
+            created_at=timezone.now() - timedelta(days=settings.RECIPE_SYNC_RETENTION_DAYS + 1))
+        self.assertEqual(sync.prune_changes(), 2)
+        # 삭제 기록과, 같은 레시피의 더 새 기록이 있는 기록
+
+        res = self.client.get(CHANGES_URL, {'since': token})
+        self.assertEqual(res.status_code, status.HTTP_410_GONE)
+
+        res = self.client.get(CHANGES_URL, {'since': 0})
+        self.assertEqual([r['id'] for r in res.data['updated']], [kept.id])
+        self.assertEqual(res.data['deleted'], [])
+
+    def test_unknown_token_expired(self):
+        res = self.client.get(CHANGES_URL, {'since': 12345})
+
+        self.assertEqual(res.status_code, status.HTTP_410_GONE)
+
+
+class RecipeChangesOverlapTests(TestCase):
+    """최근 변경은 토큰을 넘기지 않고 다음 동기화에서 다시 보냄 (커밋 순서가 id 순서와 다를 때)"""
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+
+    def test_recent_changes_sent_again(self):
+        recipe = create_recipe(user=self.user)
+
+        res = self.client.get(CHANGES_URL)
+        self.assertEqual([r['id'] for r in res.data['updated']], [recipe.id])
+        self.assertEqual(res.data['next'], '0')
+
+        res = self.client.get(CHANGES_URL, {'since': res.data['next']})
+        self.assertEqual([r['id'] for r in res.data['updated']], [recipe.id])
+
+    def test_late_commit_not_missed(self):
+        """먼저 id를 받고 나중에 커밋된 변경도 다음 동기화에서 받음"""
+        old = create_recipe(user=self.user)
+        RecipeChange.objects.update(created_at=timezone.now() - timedelta(hours=1))
+        late = create_recipe(user=self.user)
+        recent = create_recipe(user=self.user)
+        late_change = RecipeChange.objects.get(recipe_id=late.id)
+        late_id = late_change.id
+        late_change.delete()
+        # 아직 커밋되지 않은 트랜잭션의 기록
+
+        res = self.client.get(CHANGES_URL)
+        self.assertEqual(
+            sorted(r['id'] for r in res.data['updated']), [old.id, recent.id])
+
+        late_change.id = late_id
+        late_change.save(force_insert=True)
+        res = self.client.get(CHANGES_URL, {'since': res.data['next']})
+        self.assertEqual(
+            sorted(r['id'] for r in res.data['updated']), [late.id, recent.id])
+
+    def test_paging_through_recent_changes(self):
+        """최근 변경이 한 페이지보다 많아도 cursor로 끝까지 읽음"""
+        for _ in range(5):
+            create_recipe(user=self.user)
+
+        res = self.client.get(CHANGES_URL, {'page_size': 2})
+        seen = [r['id'] for r in res.data['updated']]
+        while res.data['has_more']:
+            res = self.client.get(
+                CHANGES_URL, {'since': res.data['next'], 'page_size': 2})
+            seen.extend(r['id'] for r in res.data['updated'])
+
+        self.assertEqual(len(set(seen)), 5)
+        self.assertEqual(res.data['next'], '0')
+
+
+class RecipeQueryCountTests(QueryCountAssertionsMixin, TestCase):
+    """레시피 수, 테그/재료 수가 늘어나도 쿼리 수는 그대로인지 (N+1 방지)"""
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+
+    def _create_recipes(self, n):
+        for i in range(n):
+            recipe = create_recipe(user=self.user)
+            recipe.tags.add(
+                Tag.objects.create(user=self.user, name=f'Tag {recipe.id}'))
+            recipe.ingredients.add(
+                Ingredient.objects.create(user=self.user, name=f'Ing {recipe.id}'))
+
+    def test_list_query_count_constant(self):
+        self.assertConstantQueries(
+            lambda: self.client.get(RECIPES_URL),
+            self._create_recipes,
+        )
+
+    def test_filtered_list_query_count_constant(self):
+        tag = Tag.objects.create(user=self.user, name='Shared')
+
+        def grow(n):
+            self._create_recipes(n)
+            for recipe in Recipe.objects.filter(user=self.user):
+                recipe.tags.add(tag)
+
+        # 처음 한번은 비트맵 인덱스(recipe/facets.py)를 만드는 쿼리가 더 나감
+        self.client.get(RECIPES_URL, {'tags': f'{tag.id}'})
+        self.assertConstantQueries(
+            lambda: self.client.get(RECIPES_URL, {'tags': f'{tag.id}'}),
+            grow,
+        )
+
+    def test_detail_query_count_constant(self):
+        recipe = create_recipe(user=self.user)
+
+        def grow(n):
+            for i in range(n):
+                recipe.tags.add(Tag.objects.create(user=self.user, name=f'T{i}-{n}'))
+                recipe.ingredients.add(
+                    Ingredient.objects.create(user=self.user, name=f'I{i}-{n}'))
+
+        self.assertConstantQueries(
+            lambda: self.client.get(detail_url(recipe.id)),
+            grow,
+        )
+
+    def test_create_query_count_constant(self):
+        """테그/재료 개수와 상관없이 레시피 생성 쿼리 수는 일정"""
+        sizes = {}
+
+        def request():
+            n = sizes['n']
+            payload = {
+                'title': 'Bulk',
+                'time_minutes': 5,
+                'price': Decimal('1.00'),
+                'tags': [{'name': f'Tag {i}'} for i in range(n)],
+                'ingredients': [{'name': f'Ing {i}'} for i in range(n)],
+            }
+            return self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertConstantQueries(request, lambda n: sizes.update(n=n))
+        recipe = Recipe.objects.filter(user=self.user).order_by('-id')[0]
+        self.assertEqual(recipe.tags.count(), 20)
+        self.assertEqual(recipe.ingredients.count(), 20)
+
+    def test_list_prefetch_matches_serializer(self):
+        """prefetch 해도 응답 내용은 그대로"""
+        self._create_recipes(3)
+
+        res = self.client.get(RECIPES_URL)
+
+        recipes = Recipe.objects.filter(user=self.user).order_by('-id')
+        serializer = RecipeSerializer(recipes, many=True)
+        self.assertEqual(res.data['results'], serializer.data)
+
+
 # 사진업로드 테스트
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(RECIPE_IMAGE_PROCESSING='sync', MEDIA_ROOT=MEDIA_ROOT)
 class ImageUploadTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -420,23 +1017,173 @@ class ImageUploadTests(TestCase):
         self.recipe = create_recipe(user=self.user)
 
     def tearDown(self):
-        self.recipe.image.delete()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def _upload(self, img, **save_kwargs):
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            img.save(image_file, format='JPEG', **save_kwargs)
+            image_file.seek(0)
+            with self.captureOnCommitCallbacks(execute=True):
+                # 커밋된 뒤에 처리가 시작됨 (테스트에서는 sync라서 그 자리에서 끝남)
+                res = self.client.post(url, {'image': image_file}, format='multipart')
+        self.recipe.refresh_from_db()
+        return res
 
     def test_upload_image(self):
         """이미지 업로드 테스트"""
+        res = self._upload(Image.new('RGB', (10, 10))) # 샘플이미지 생성
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertIn('image', res.data)
+        self.assertEqual(res.data['image_status'], Recipe.IMAGE_PENDING)
+        self.assertTrue(os.path.exists(self.recipe.image.path))
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_READY)
+
+    def test_upload_image_renditions(self):
+        """원본보다 작은 너비마다 축소본이 만들어지는지 테스트"""
+        self._upload(Image.new('RGB', (1000, 500)))
+
+        renditions = self.recipe.image_renditions['jpeg']
+        self.assertEqual(sorted(renditions, key=int), ['320', '640', '1000'])
+        with Image.open(default_storage.path(renditions['320'])) as img:
+            self.assertEqual(img.size, (320, 160))
+
+        res = self.client.get(detail_url(self.recipe.id))
+        self.assertEqual(res.data['image_status'], Recipe.IMAGE_READY)
+        self.assertTrue(res.data['image_renditions']['jpeg']['320'].startswith('http'))
+
+    def test_processed_image_stored_under_its_own_hash(self):
+        """올린 파일은 고치지 않고, EXIF를 지운 사본을 그 내용의 해시 이름으로 저장"""
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera maker'
+        buffer = io.BytesIO()
+        Image.new('RGB', (40, 20)).save(buffer, format='JPEG', exif=exif.tobytes())
+        uploaded = hashlib.sha256(buffer.getvalue()).hexdigest()
+
+        self._upload(Image.new('RGB', (40, 20)), exif=exif.tobytes())
+
+        with self.recipe.image.open('rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        self.assertEqual(os.path.basename(self.recipe.image.name), f'{digest}.jpg')
+        self.assertNotEqual(digest, uploaded)
+        self.assertTrue(all(
+            os.path.basename(name).startswith(digest)
+            for files in self.recipe.image_renditions.values() for name in files.values()))
+
+        other = create_recipe(user=self.user, title='Other', image=self.recipe.image.name)
+        with patch('recipe.images.imaging.process_image') as process_image, \
+                self.captureOnCommitCallbacks(execute=True):
+            images.schedule(other)
+        process_image.assert_not_called()
+        self.assertEqual(other.image_renditions, self.recipe.image_renditions)
+        # 처리한 파일을 다시 쓰는 레시피는 처리 결과를 그대로 씀
+
+    def test_upload_image_strips_exif(self):
+        """EXIF를 지우고 회전 정보는 적용해서 저장하는지 테스트"""
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: 90도 회전
+        exif[0x010F] = 'Camera maker'
+        self._upload(Image.new('RGB', (40, 20)), exif=exif.tobytes())
+
+        with Image.open(self.recipe.image.path) as img:
+            self.assertEqual(img.size, (20, 40))
+            self.assertEqual(len(img.getexif()), 0)
+
+    def test_upload_corrupt_image_fails(self):
+        """앞부분만 사진인 깨진 파일은 처리에 실패하고 지워지는지 테스트"""
         url = image_upload_url(self.recipe.id)
         with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
-            img = Image.new('RGB', (10, 10)) # 샘플이미지 생성
-            img.save(image_file, format='JPEG') # 샘플이미지 저장
+            image_file.write(b'\xff\xd8\xff' + b'\x00' * 100)
             image_file.seek(0)
-            payload = {'image': image_file}
-            res = self.client.post(url, payload, format='multipart')
+            with self.assertLogs('recipe.images', 'WARNING'), \
+                    self.captureOnCommitCallbacks(execute=True):
+                res = self.client.post(url, {'image': image_file}, format='multipart')
 
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
         self.recipe.refresh_from_db()
-        self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertIn('image', res.data)
-        self.assertTrue(os.path.exists(self.recipe.image.path))
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_FAILED)
+        self.assertFalse(self.recipe.image)
+        self.assertEqual(os.listdir(default_storage.path('static/recipe')), [])
+
+    def test_upload_same_image_shared(self):
+        """같은 사진은 처리한 파일 하나를 같이 씀"""
+        self._upload(Image.new('RGB', (400, 200)))
+        other = create_recipe(user=self.user, title='Other')
+        self.recipe, first = other, self.recipe
+
+        self._upload(Image.new('RGB', (400, 200)))
+
+        first.refresh_from_db()
+        self.assertEqual(self.recipe.image.name, first.image.name)
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_READY)
+        self.assertEqual(self.recipe.image_renditions, first.image_renditions)
+
+    @override_settings(RECIPE_IMAGE_GC_GRACE=0)
+    def test_replaced_image_deleted_when_unused(self):
+        """사진을 바꾸면 예전 사진과 축소본은 다른 레시피가 쓰지 않을 때만 지움"""
+        self._upload(Image.new('RGB', (400, 200), 'red'))
+        old_files = images.image_files(self.recipe.image.name, self.recipe.image_renditions)
+        shared = create_recipe(user=self.user, title='Shared')
+        shared.image, shared.image_status = self.recipe.image.name, Recipe.IMAGE_READY
+        shared.image_renditions = self.recipe.image_renditions
+        shared.save()
+
+        self._upload(Image.new('RGB', (400, 200), 'blue'))
+        self.assertTrue(all(default_storage.exists(name) for name in old_files))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            shared.delete()
+        self.assertFalse(any(default_storage.exists(name) for name in old_files))
+        self.assertTrue(default_storage.exists(self.recipe.image.name))
+
+    def test_lost_job_requeued(self):
+        """워커가 끝나서 처리 작업을 잃어버린 사진은 오래 pending이면 다시 처리"""
+        with patch('recipe.images._start'):
+            self._upload(Image.new('RGB', (400, 200)))
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_PENDING)
+
+        self.assertEqual(images.requeue_stale(), 0)
+        # 아직 처리 중일 수 있는 최근 사진은 그대로
+        Recipe.objects.filter(pk=self.recipe.pk).update(
+            updated_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(images.requeue_stale(), 1)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_READY)
+        self.assertIn('320', self.recipe.image_renditions['jpeg'])
+        self.assertEqual(images.requeue_stale(), 0)
+
+    def test_processing_error_keeps_image_pending(self):
+        """작업 프로세스가 죽는 등 사진 탓이 아닌 에러면 파일을 지우지 않고 다시 처리할 수 있게 둠"""
+        with patch('recipe.images.imaging.process_image', side_effect=BrokenProcessPool), \
+                self.assertLogs('recipe.images', 'ERROR'):
+            self._upload(Image.new('RGB', (400, 200)))
+
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_PENDING)
+        self.assertTrue(default_storage.exists(self.recipe.image.name))
+
+        Recipe.objects.filter(pk=self.recipe.pk).update(
+            updated_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(images.requeue_stale(), 1)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_READY)
+
+    def test_broken_pool_reset_after_job(self):
+        """작업 중에 풀이 망가지면 다음 작업을 위해 풀을 새로 만듦"""
+        future = Future()
+        future.set_exception(BrokenProcessPool())
+        executor, writer = Mock(), Mock()
+        executor.submit.return_value = future
 
+        with override_settings(RECIPE_IMAGE_PROCESSING='process'), \
+                patch('recipe.images._executor', executor), \
+                patch('recipe.images._executors', return_value=(executor, writer)):
+            images._start('static/recipe/lost.jpg', {'dest': 'lost.processed.jpg'})
+            self.assertIsNone(images._executor)
+
+        executor.shutdown.assert_called_once_with(wait=False)
+        writer.submit.assert_called_once()
 
     def test_upload_image_bad_request(self):
         url = image_upload_url(self.recipe.id)
@@ -444,3 +1191,603 @@ class ImageUploadTests(TestCase):
         res = self.client.post(url, payload, format='multipart')
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_upload_not_an_image_rejected_early(self):
+        """사진이 아닌 파일은 파일 앞부분만 보고 400"""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            image_file.write(b'%PDF-1.4 not an image')
+            image_file.seek(0)
+            res = self.client.post(url, {'image': image_file}, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+
+def recipe_image_url(recipe_id, **params):
+    url = reverse('recipe:recipe-image', args=[recipe_id])
+    if params:
+        url += '?' + '&'.join(f'{key}={value}' for key, value in params.items())
+    return url
+
+
+RENDITION_CACHE_DIR = tempfile.mkdtemp()
+
+
+@override_settings(
+    RECIPE_IMAGE_PROCESSING='sync',
+    MEDIA_ROOT=MEDIA_ROOT,
+    RECIPE_RENDITION_CACHE_DIR=RENDITION_CACHE_DIR,
+)
+class RecipeImageRenditionTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='password123')
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(user=self.user)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            Image.new('RGB', (1000, 500)).save(image_file, format='JPEG')
+            image_file.seek(0)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(
+                    image_upload_url(self.recipe.id), {'image': image_file}, format='multipart')
+        self.recipe.refresh_from_db()
+
+    def tearDown(self):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(RENDITION_CACHE_DIR, ignore_errors=True)
+
+    def _open(self, res):
+        return Image.open(io.BytesIO(b''.join(res.streaming_content)))
+
+    def test_resize_on_demand(self):
+        """요청한 너비를 허용 너비로 올려서 줄이고, 같은 ETag면 304"""
+        res = self.client.get(recipe_image_url(self.recipe.id, w=100, format='jpeg'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertIn('private', res['Cache-Control'])
+        with self._open(res) as img:
+            self.assertEqual(img.size, (160, 80))
+
+        res = self.client.get(
+            recipe_image_url(self.recipe.id, w=100, format='jpeg'),
+            HTTP_IF_NONE_MATCH=res['ETag'],
+        )
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_pregenerated_rendition_used(self):
+        """업로드할 때 만든 축소본이 있으면 그것을 보내고 캐시 디렉토리에는 만들지 않음"""
+        res = self.client.get(recipe_image_url(self.recipe.id, w=320, format='jpeg'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        with self._open(res) as img:
+            self.assertEqual(img.size, (320, 160))
+        self.assertFalse(os.path.exists(RENDITION_CACHE_DIR))
+
+    def test_signed_thumbnail_url_public(self):
+        """목록의 thumbnail 주소는 로그인 없이 열리고, 서명이 없거나 틀리면 404"""
+        res = self.client.get(RECIPES_URL)
+        thumbnail = res.data['results'][0]['thumbnail']
+        self.assertIn(f'w={settings.RECIPE_THUMBNAIL_WIDTH}', thumbnail)
+
+        anonymous = APIClient()
+        res = anonymous.get(thumbnail)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('immutable', res['Cache-Control'])
+
+        res = anonymous.get(recipe_image_url(self.recipe.id))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        res = anonymous.get(recipe_image_url(self.recipe.id, s='bad'))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_other_users_image_not_found(self):
+        other = create_user(email='other@example.com', password='password123')
+        self.client.force_authenticate(other)
+
+        res = self.client.get(recipe_image_url(self.recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_params(self):
+        res = self.client.get(recipe_image_url(self.recipe.id, format='png'))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(recipe_image_url(self.recipe.id, w='big'))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unprocessed_image_not_rendered(self):
+        """검사가 끝나지 않은(pending) 사진은 409, 실패한 사진은 404. 원본을 열지 않음"""
+        Recipe.objects.filter(pk=self.recipe.pk).update(image_status=Recipe.IMAGE_PENDING)
+
+        with patch('recipe.renditions.open_rendition') as open_rendition:
+            res = self.client.get(recipe_image_url(self.recipe.id, w=100, format='jpeg'))
+            self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+
+            Recipe.objects.filter(pk=self.recipe.pk).update(image_status=Recipe.IMAGE_FAILED)
+            res = self.client.get(recipe_image_url(self.recipe.id, w=100, format='jpeg'))
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        open_rendition.assert_not_called()
+
+    def test_unreadable_original_not_found(self):
+        """원본을 읽을 수 없으면 500이 아니라 404"""
+        with open(self.recipe.image.path, 'wb') as f:
+            f.write(b'\xff\xd8\xff' + b'\x00' * 100)
+
+        res = self.client.get(recipe_image_url(self.recipe.id, w=100, format='jpeg'))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(RECIPE_IMAGE_MAX_PIXELS=1000)
+    def test_render_too_many_pixels_not_found(self):
+        """max_pixels보다 큰 사진은 디코딩하지 않음"""
+        with patch('PIL.ImageFile.ImageFile.load') as load:
+            res = self.client.get(recipe_image_url(self.recipe.id, w=100, format='jpeg'))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        load.assert_not_called()
+
+    def test_thumbnail_none_without_image(self):
+        create_recipe(user=self.user, title='No image')
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertIsNone(res.data['results'][0]['thumbnail'])
+
+    def test_evict_oldest_first(self):
+        """캐시가 가득 차면 가장 오래 안 쓴(수정 시각이 오래된) 파일부터 지움"""
+        for i, name in enumerate(['old', 'middle', 'new']):
+            path = os.path.join(RENDITION_CACHE_DIR, 'ab', f'{name}.jpg')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(b'x' * 100)
+            os.utime(path, (1000 + i, 1000 + i))
+
+        remaining = renditions.evict(max_bytes=250)
+
+        self.assertEqual(remaining, 200)
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(RENDITION_CACHE_DIR, 'ab'))),
+            ['middle.jpg', 'new.jpg'],
+        )
+
+
+def uploads_url(recipe_id):
+    return reverse('recipe:recipe-uploads', args=[recipe_id])
+
+
+def upload_url(recipe_id, upload_id):
+    return reverse('recipe:recipe-upload', args=[recipe_id, upload_id])
+
+
+def finalize_url(recipe_id, upload_id):
+    return reverse('recipe:recipe-upload-finalize', args=[recipe_id, upload_id])
+
+
+@override_settings(RECIPE_IMAGE_PROCESSING='sync', MEDIA_ROOT=MEDIA_ROOT)
+class ChunkedImageUploadTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='password123')
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(user=self.user)
+        buffer = io.BytesIO()
+        Image.new('RGB', (200, 100)).save(buffer, format='JPEG')
+        self.content = buffer.getvalue()
+
+    def tearDown(self):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def _start(self, size=None, filename='photo.jpg'):
+        res = self.client.post(
+            uploads_url(self.recipe.id),
+            {'filename': filename, 'size': len(self.content) if size is None else size},
+        )
+        return res
+
+    def _put(self, upload_id, offset, chunk):
+        return self.client.put(
+            upload_url(self.recipe.id, upload_id), chunk,
+            content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def test_chunked_upload(self):
+        """조각으로 나눠 올리고 finalize하면 upload-image와 같이 처리됨"""
+        res = self._start()
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['offset'], 0)
+        upload_id = res.data['id']
+
+        middle = len(self.content) // 2
+        res = self._put(upload_id, 0, self.content[:middle])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Upload-Offset'], str(middle))
+        res = self._put(upload_id, middle, self.content[middle:])
+        self.assertEqual(res.data['offset'], len(self.content))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(finalize_url(self.recipe.id, upload_id))
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_READY)
+        with self.recipe.image.open('rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        self.assertEqual(self.recipe.image.name, os.path.join('static', 'recipe', f'{digest}.jpg'))
+        self.assertFalse(ImageUpload.objects.exists())
+        self.assertFalse(os.path.exists(uploads.partial_path(upload_id)))
+
+    def test_resume_after_wrong_offset(self):
+        """보낸 위치가 받은 크기와 다르면 409와 함께 다시 보낼 위치를 알려줌"""
+        upload_id = self._start().data['id']
+        self._put(upload_id, 0, self.content[:100])
+
+        res = self._put(upload_id, 50, self.content[50:])
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data['offset'], 100)
+
+        res = self.client.get(upload_url(self.recipe.id, upload_id))
+        self.assertEqual(res['Upload-Offset'], '100')
+        res = self._put(upload_id, 100, self.content[100:])
+        self.assertEqual(res.data['offset'], len(self.content))
+
+    def test_limits_checked_early(self):
+        """전체 크기와 확장자는 시작할 때, 형식은 첫 조각에서 거절"""
+        with self.settings(RECIPE_IMAGE_MAX_UPLOAD_SIZE=100):
+            self.assertEqual(self._start().status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            self._start(filename='photo.exe').status_code, status.HTTP_400_BAD_REQUEST)
+
+        upload_id = self._start().data['id']
+        res = self._put(upload_id, 0, b'%PDF-1.4 not an image')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ImageUpload.objects.exists())
+        self.assertFalse(os.path.exists(uploads.partial_path(upload_id)))
+
+    def test_chunk_limits(self):
+        upload_id = self._start().data['id']
+
+        res = self._put(upload_id, 0, self.content + b'extra')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with self.settings(RECIPE_IMAGE_UPLOAD_CHUNK_SIZE=10):
+            res = self._put(upload_id, 0, self.content[:11])
+        self.assertEqual(res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    def test_chunk_requires_content_length(self):
+        """Content-Length가 없거나 0이면 아무것도 쓰지 않고 400"""
+        upload_id = self._start().data['id']
+
+        res = self._put(upload_id, 0, b'')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Content-Length', res.data)
+
+    def test_short_chunk_keeps_received_bytes(self):
+        """Content-Length보다 적게 오면(연결 끊김) 받은 만큼 기록하고 offset을 알려줌"""
+        upload = ImageUpload.objects.get(pk=self._start().data['id'])
+
+        with self.assertRaises(uploads.IncompleteChunk) as ctx:
+            uploads.append(upload, 0, io.BytesIO(self.content[:100]), len(self.content))
+
+        self.assertEqual(ctx.exception.offset, 100)
+        upload.refresh_from_db()
+        self.assertEqual(upload.received, 100)
+        with open(uploads.partial_path(upload.pk), 'rb') as f:
+            self.assertEqual(f.read(), self.content[:100])
+
+    def test_concurrent_chunk_at_same_offset(self):
+        """받는 동안 같은 위치의 다른 조각이 먼저 붙으면 늦은 조각은 버리고 409"""
+        upload = ImageUpload.objects.get(pk=self._start().data['id'])
+        content = self.content
+
+        class RacingStream(io.BytesIO):
+            # 이 조각을 받는 도중에 다른 요청이 같은 위치에 조각을 붙임
+            raced = False
+
+            def read(self, size=-1):
+                if not self.raced:
+                    self.raced = True
+                    uploads.append(upload, 0, io.BytesIO(content[:100]), 100)
+                return super().read(size)
+
+        with self.assertRaises(uploads.OffsetMismatch) as ctx:
+            uploads.append(upload, 0, RacingStream(b'\x00' * 50), 50)
+
+        self.assertEqual(ctx.exception.offset, 100)
+        with open(uploads.partial_path(upload.pk), 'rb') as f:
+            self.assertEqual(f.read(), content[:100])
+        self.assertEqual(
+            [name for name in os.listdir(os.path.dirname(uploads.partial_path(upload.pk)))
+             if name.endswith('.chunk')],
+            [],
+        )
+
+    def test_finalize_incomplete(self):
+        upload_id = self._start().data['id']
+        self._put(upload_id, 0, self.content[:100])
+
+        res = self.client.post(finalize_url(self.recipe.id, upload_id))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    def test_other_users_upload_not_found(self):
+        upload_id = self._start().data['id']
+        other = create_user(email='other@example.com', password='password123')
+        self.client.force_authenticate(other)
+
+        res = self._put(upload_id, 0, self.content)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cancel_upload(self):
+        upload_id = self._start().data['id']
+
+        res = self.client.delete(upload_url(self.recipe.id, upload_id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(os.path.exists(uploads.partial_path(upload_id)))
+
+
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def bulk_payload(count, **params):
+    return [
+        {
+            'title': f'Recipe {i}',
+            'time_minutes': 10,
+            'price': '5.00',
+            'tags': [{'name': 'Dinner'}, {'name': f'Tag {i}'}],
+            'ingredients': [{'name': 'Salt'}],
+            **params,
+        }
+        for i in range(count)
+    ]
+
+
+class RecipeBulkApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create(self):
+        res = self.client.post(BULK_URL, bulk_payload(3), format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        ids = [result['id'] for result in res.data['results']]
+        recipes = Recipe.objects.filter(user=self.user).order_by('id')
+        self.assertEqual(list(recipes.values_list('id', flat=True)), ids)
+        self.assertEqual(recipes[2].title, 'Recipe 2')
+        self.assertEqual(
+            sorted(recipes[2].tags.values_list('name', flat=True)), ['Dinner', 'Tag 2'])
+        self.assertEqual(Tag.objects.filter(user=self.user, name='Dinner').count(), 1)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 1)
+
+    def test_single_create_takes_bulk_insert_lock(self):
+        """
+        id를 돌려주지 않는 DB(MySQL)에서는 레시피 하나 만들기도 유저 행을 잠가서
+        같은 유저의 bulk INSERT 중간에 끼어들어 409가 나지 않게 함
+        """
+        user_table = get_user_model()._meta.db_table
+        with patch.object(connection.features, 'can_return_rows_from_bulk_insert', False):
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.post(RECIPES_URL, {
+                    'title': 'Soup', 'time_minutes': 10, 'price': '5.00',
+                }, format='json')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            locks = [q['sql'] for q in queries if q['sql'].startswith('SELECT')
+                     and f'FROM "{user_table}"' in q['sql']]
+            self.assertEqual(len(locks), 1)
+
+            res = self.client.post(BULK_URL, bulk_payload(3), format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        ids = [result['id'] for result in res.data['results']]
+        self.assertEqual(
+            list(Recipe.objects.filter(user=self.user, title__startswith='Recipe')
+                 .order_by('id').values_list('id', flat=True)),
+            ids,
+        )
+
+    def test_bulk_create_query_count_constant(self):
+        """항목 수가 늘어도 쿼리 수는 그대로"""
+        counts = []
+        for count in (2, 20):
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.post(BULK_URL, bulk_payload(
+                    count,
+                    tags=[{'name': f'Tag {count}'}],
+                    ingredients=[{'name': f'Ingredient {count}'}],
+                ), format='json')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            counts.append(len(queries))
+
+        self.assertEqual(counts[0], counts[1])
+
+    def test_bulk_create_visible_to_list_filters_and_sync(self):
+        """시그널 없이 넣어도 목록 캐시, 테그 필터, 동기화에 바로 보임"""
+        self.client.get(RECIPES_URL)
+        tag = Tag.objects.create(user=self.user, name='Dinner')
+        self.client.get(RECIPES_URL, {'tags': tag.id, 'match': 'all'})
+
+        self.client.post(BULK_URL, bulk_payload(2), format='json')
+
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(len(res.data['results']), 2)
+        res = self.client.get(RECIPES_URL, {'tags': tag.id, 'match': 'all'})
+        self.assertEqual(len(res.data['results']), 2)
+        res = self.client.get(reverse('recipe:recipe-changes'))
+        self.assertEqual(len(res.data['updated']), 2)
+
+    def test_bulk_create_partial_failure(self):
+        """잘못된 항목은 errors로 알려주고 나머지는 저장"""
+        payload = bulk_payload(2)
+        payload.insert(1, {'title': 'No time'})
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        results = res.data['results']
+        self.assertEqual([result['index'] for result in results], [0, 1, 2])
+        self.assertIn('time_minutes', results[1]['errors'])
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+
+    def test_bulk_create_limits(self):
+        res = self.client.post(BULK_URL, {'title': 'Not a list'}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with self.settings(RECIPE_BULK_MAX_ITEMS=2):
+            res = self.client.post(BULK_URL, bulk_payload(3), format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_update(self):
+        recipe = create_recipe(user=self.user, title='Old')
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Old tag'))
+        untouched = create_recipe(user=self.user, title='Untouched')
+        other = create_recipe(user=create_user(email='other@example.com', password='test123'))
+
+        res = self.client.patch(BULK_URL, [
+            {'id': recipe.id, 'title': 'New', 'tags': [{'name': 'New tag'}]},
+            {'id': untouched.id, 'price': '9.99'},
+            {'id': other.id, 'title': 'Hacked'},
+        ], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertIn('id', res.data['results'][2]['errors'])
+        recipe.refresh_from_db()
+        untouched.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(recipe.title, 'New')
+        self.assertEqual(list(recipe.tags.values_list('name', flat=True)), ['New tag'])
+        self.assertEqual(untouched.title, 'Untouched')
+        self.assertEqual(untouched.price, Decimal('9.99'))
+        self.assertEqual(other.title, 'Sample recipe title111')
+
+    def test_bulk_delete(self):
+        recipes = [create_recipe(user=self.user) for _ in range(2)]
+        other = create_recipe(user=create_user(email='other@example.com', password='test123'))
+
+        res = self.client.delete(
+            BULK_URL, {'ids': [recipes[0].id, other.id]}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['deleted'], [recipes[0].id])
+        self.assertEqual(res.data['not_found'], [other.id])
+        self.assertTrue(Recipe.objects.filter(pk=other.id).exists())
+        self.assertFalse(Recipe.objects.filter(pk=recipes[0].id).exists())
+
+
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+class RecipeExportApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+        tag = Tag.objects.create(user=self.user, name='Dinner')
+        self.recipes = []
+        for i in range(5):
+            recipe = create_recipe(user=self.user, title=f'레시피 {i}')
+            recipe.tags.add(tag)
+            self.recipes.append(recipe)
+        create_recipe(user=create_user(email='other@example.com', password='test123'))
+
+    def test_export_ndjson_streams_in_chunks(self):
+        """청크마다 쿼리 3번(레시피, 테그, 재료)으로 나눠서 보냄"""
+        with patch('recipe.export.CHUNK_SIZE', 2), \
+                CaptureQueriesContext(connection) as queries:
+            res = self.client.get(EXPORT_URL)
+            chunks = list(res.streaming_content)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertTrue(res['Content-Type'].startswith('application/x-ndjson'))
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(len(queries), 3 * 3)
+        rows = [json.loads(line) for line in b''.join(chunks).decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [recipe.id for recipe in self.recipes])
+        self.assertEqual(rows[0]['title'], '레시피 0')
+        self.assertEqual(rows[0]['tags'][0]['name'], 'Dinner')
+        self.assertEqual(rows[0]['price'], '5.25')
+
+    @override_settings(SERVER_MODE='asgi')
+    def test_export_under_asgi(self):
+        """
+        ASGI 핸들러는 응답을 이벤트 루프에서 읽으므로 그 전에 다 만들어 둠.
+        AsyncClient는 응답을 테스트 스레드에서 읽어서 ASGIHandler를 직접 부름
+        """
+        token = Token.objects.create(user=self.user)
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': EXPORT_URL, 'query_string': b'format=csv',
+            'headers': [
+                (b'host', b'testserver'),
+                (b'authorization', f'Token {token.key}'.encode()),
+            ],
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        # 테스트 클라이언트처럼 요청이 끝날 때 테스트 트랜잭션의 연결을 닫지 않게 함
+        request_finished.disconnect(close_old_connections)
+        try:
+            with patch('recipe.export.CHUNK_SIZE', 2):
+                async_to_sync(ASGIHandler())(scope, receive, send)
+        finally:
+            request_finished.connect(close_old_connections)
+
+        self.assertEqual(messages[0]['status'], status.HTTP_200_OK)
+        headers = dict(messages[0]['headers'])
+        self.assertIn(b'recipes.csv', headers[b'Content-Disposition'])
+        body = b''.join(m.get('body', b'') for m in messages[1:]).decode()
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual([row['title'] for row in rows], [f'레시피 {i}' for i in range(5)])
+
+    def test_export_csv(self):
+        res = self.client.get(EXPORT_URL, {'format': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('recipes.csv', res['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(b''.join(res.streaming_content).decode())))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['title'], '레시피 0')
+        self.assertEqual(rows[0]['tags'], 'Dinner')
+        self.assertEqual(rows[0]['ingredients'], '')
+
+    def test_export_csv_escapes_formulas(self):
+        """스프레드시트에서 수식으로 실행될 칸은 ' 로 시작하게 (CSV injection)"""
+        recipe = Recipe.objects.filter(user=self.user).order_by('id').first()
+        recipe.title = '=HYPERLINK("http://evil.example")'
+        recipe.description = "'-already quoted"
+        recipe.save()
+        recipe.tags.set([Tag.objects.create(user=self.user, name='@Dinner')])
+
+        res = self.client.get(EXPORT_URL, {'format': 'csv'})
+
+        row = next(csv.DictReader(io.StringIO(b''.join(res.streaming_content).decode())))
+        self.assertEqual(row['title'], '\'=HYPERLINK("http://evil.example")')
+        self.assertEqual(row['description'], "''-already quoted")
+        self.assertEqual(row['tags'], "'@Dinner")
+        self.assertEqual(row['price'], str(recipe.price))
+
+    def test_export_filters(self):
+        res = self.client.get(EXPORT_URL, {'search': '레시피', 'tags': '999999'})
+
+        self.assertEqual(b''.join(res.streaming_content), b'')
+
+    def test_export_invalid_format(self):
+        res = self.client.get(EXPORT_URL, {'format': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,30 @@
+"""
+파이썬 역색인 테스트
+"""
+from django.test import SimpleTestCase
+
+from recipe.search import InvertedIndex, tokenize
+
+
+class InvertedIndexTests(SimpleTestCase):
+    def test_tokenize(self):
+        self.assertEqual(tokenize('Kimchi-Fried Rice, 김치!'), ['kimchi', 'fried', 'rice', '김치'])
+
+    def test_search_any_word(self):
+        index = InvertedIndex([(1, 'red curry'), (2, 'green curry'), (3, 'pasta')])
+
+        ids = [doc_id for doc_id, score in index.search('red pasta')]
+
+        self.assertEqual(sorted(ids), [1, 3])
+
+    def test_rare_word_scores_higher(self):
+        """여러 문서에 흔한 단어보다 드문 단어가 맞는 문서가 먼저"""
+        index = InvertedIndex([(1, 'curry rice'), (2, 'curry noodle'), (3, 'curry bread')])
+
+        ranked = index.search('curry noodle')
+
+        self.assertEqual(ranked[0][0], 2)
+
+    def test_empty(self):
+        self.assertEqual(InvertedIndex().search('anything'), [])
+        self.assertEqual(InvertedIndex([(1, 'rice')]).search('   '), [])
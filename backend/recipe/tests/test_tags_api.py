@@ -58,7 +58,7 @@ class PrivateTagsApiTests(TestCase):
         tags = Tag.objects.all().order_by('-name')
         serializer = TagSerializer(tags, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
         # 생성한 테그가 모두 잘 있는지 확인
 
     def test_tags_limited_to_user(self):
@@ -72,8 +72,8 @@ class PrivateTagsApiTests(TestCase):
         res = self.client.get(TAGS_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         # print(tag.name) #Comfort Food
-        self.assertEqual(res.data[0]['name'], tag.name)
-        self.assertEqual(res.data[0]['id'], tag.id)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
+        self.assertEqual(res.data['results'][0]['id'], tag.id)
 
 
     # 테그 수정하는 기능 테스트
@@ -88,6 +88,17 @@ class PrivateTagsApiTests(TestCase):
         tag.refresh_from_db()
         self.assertEqual(tag.name, payload['name'])
 
+    def test_update_tag_duplicate_name_error(self):
+        """이미 있는 테그 이름으로 바꾸면 400"""
+        Tag.objects.create(user=self.user, name='Dessert')
+        tag = Tag.objects.create(user=self.user, name='After Dinner')
+
+        res = self.client.patch(detail_url(tag.id), {'name': 'Dessert'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, 'After Dinner')
+
 
     # 삭제 기능 테스트
     def test_delete_tag(self):
@@ -119,8 +130,8 @@ class PrivateTagsApiTests(TestCase):
 
         s1 = TagSerializer(tag1)
         s2 = TagSerializer(tag2)
-        self.assertIn(s1.data, res.data)
-        self.assertNotIn(s2.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertNotIn(s2.data, res.data['results'])
 
     def test_filtered_tags_unique(self):
         """필터 결과가 중복된거 주지않는지 검사"""
@@ -143,5 +154,82 @@ class PrivateTagsApiTests(TestCase):
 
         res = self.client.get(TAGS_URL, {'assigned_only': 1})
         # Dinner은 할당되지 않았는데 그게맞는지 검사
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_tags_paginated(self):
+        """페이지를 넘길 때 이름 역순으로 빠지거나 중복되지 않음"""
+        names = ['Vegan', 'Dessert', 'Brunch', 'Dinner', 'Apple']
+        tags = [Tag.objects.create(user=self.user, name=n) for n in names]
+
+        ids = []
+        res = self.client.get(TAGS_URL, {'page_size': 2})
+        while True:
+            ids.extend(t['id'] for t in res.data['results'])
+            if not res.data['next']:
+                break
+            res = self.client.get(res.data['next'])
+
+        expected = sorted(tags, key=lambda t: t.name, reverse=True)
+        self.assertEqual(ids, [t.id for t in expected])
+
+    def test_tags_with_counts(self):
+        """with_counts=1이면 테그마다 레시피 수가 같이 오는지 테스트"""
+        breakfast = Tag.objects.create(user=self.user, name='Breakfast')
+        dinner = Tag.objects.create(user=self.user, name='Dinner')
+        unused = Tag.objects.create(user=self.user, name='Unused')
+        for title in ('Pancakes', 'Porridge'):
+            recipe = Recipe.objects.create(
+                title=title, time_minutes=5, price=Decimal('2.00'), user=self.user)
+            recipe.tags.add(breakfast)
+        recipe.tags.add(dinner)
+
+        res = self.client.get(TAGS_URL, {'with_counts': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        counts = {t['id']: t['recipe_count'] for t in res.data['results']}
+        self.assertEqual(counts, {breakfast.id: 2, dinner.id: 1, unused.id: 0})
+
+    def test_tags_with_counts_restricted_to_recipe_filter(self):
+        """레시피 필터를 같이 주면 필터된 레시피만 세는지 테스트"""
+        breakfast = Tag.objects.create(user=self.user, name='Breakfast')
+        sweet = Tag.objects.create(user=self.user, name='Sweet')
+        salty = Tag.objects.create(user=self.user, name='Salty')
+        pancakes = Recipe.objects.create(
+            title='Pancakes', time_minutes=5, price=Decimal('2.00'), user=self.user)
+        pancakes.tags.add(breakfast, sweet)
+        soup = Recipe.objects.create(
+            title='Soup', time_minutes=5, price=Decimal('2.00'), user=self.user)
+        soup.tags.add(salty)
+
+        res = self.client.get(
+            TAGS_URL, {'with_counts': 1, 'assigned_only': 1, 'tags': f'{breakfast.id}'})
+
+        counts = {t['id']: t['recipe_count'] for t in res.data['results']}
+        self.assertEqual(counts, {breakfast.id: 1, sweet.id: 1})
+
+    def test_tags_with_counts_single_query(self):
+        """테그 수와 상관없이 테그 목록 + 레시피 수를 쿼리 한번으로"""
+        recipe = Recipe.objects.create(
+            title='Pancakes', time_minutes=5, price=Decimal('2.00'), user=self.user)
+        recipe.tags.add(*[
+            Tag.objects.create(user=self.user, name=f'Tag {i}') for i in range(10)])
+
+        with self.assertNumQueries(1):
+            res = self.client.get(TAGS_URL, {'with_counts': 1})
+
+        self.assertEqual(len(res.data['results']), 10)
+
+    def test_tags_with_counts_boolean_values(self):
+        """with_counts=true, yes 등도 되고, 잘못된 값은 500이 아니라 400"""
+        Tag.objects.create(user=self.user, name='Dessert')
+
+        for value in ('true', 'yes'):
+            res = self.client.get(TAGS_URL, {'with_counts': value})
+            self.assertEqual(res.data['results'][0]['recipe_count'], 0)
+
+        res = self.client.get(TAGS_URL, {'with_counts': 'several'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('with_counts', res.data)
 
+        res = self.client.get(TAGS_URL, {'assigned_only': 'maybe'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,158 @@
+"""
+나눠서 올리는(이어 올리기가 되는) 레시피 사진 업로드.
+
+1. POST   /recipes/{id}/uploads/                      {"size": 전체 크기, "filename": "a.jpg"}
+2. PUT    /recipes/{id}/uploads/{upload_id}/          헤더 Upload-Offset: 이미 보낸 크기, 본문: 다음 조각
+3. GET    /recipes/{id}/uploads/{upload_id}/          연결이 끊겼으면 offset을 확인하고 거기서부터 다시 보냄
+4. POST   /recipes/{id}/uploads/{upload_id}/finalize/ upload-image와 같은 202 응답
+
+조각은 요청 본문을 메모리에 모으지 않고 조각 파일에 받은 뒤, 업로드 파일의 offset 위치에 붙입니다.
+네트워크로 받는 동안에는 트랜잭션/행 잠금을 잡지 않아서 느린 클라이언트가 DB 연결이나
+같은 업로드의 다시 보내기를 막지 않음. 붙일 때 짧은 트랜잭션에서 offset을 다시 확인함
+크기는 처음 요청에서, 형식(매직 바이트)은 첫 조각에서 확인해서 다 받기 전에 거절합니다.
+다 받은 파일은 복사하지 않고 옮겨서 사진으로 저장합니다.
+"""
+import logging
+import os
+import shutil
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import ImageUpload, recipe_image_file_path
+from recipe import images, imaging
+
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    pass
+
+
+class OffsetMismatch(UploadError):
+    """보낸 조각의 위치가 지금까지 받은 크기와 다름. offset부터 다시 보내야 함"""
+
+    def __init__(self, offset):
+        super().__init__(f'Expected Upload-Offset {offset}.')
+        self.offset = offset
+
+
+class IncompleteChunk(UploadError):
+    """Content-Length보다 적게 받음. 받은 만큼은 기록했으므로 offset부터 다시 보내면 됨"""
+
+    def __init__(self, offset):
+        super().__init__(f'Chunk ended early; continue from Upload-Offset {offset}.')
+        self.offset = offset
+
+
+class _ReceivedFile(File):
+    # 저장소가 이 파일을 복사하지 않고 옮기게 함 (FileSystemStorage._save)
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def partial_path(upload_id):
+    directory = os.path.dirname(recipe_image_file_path(None, 'image.jpg'))
+    return default_storage.path(os.path.join(directory, 'partial', f'{upload_id}.part'))
+
+
+def create(recipe, filename, size):
+    upload = ImageUpload.objects.create(
+        user_id=recipe.user_id, recipe=recipe, filename=filename, size=size)
+    path = partial_path(upload.pk)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+    return upload
+
+
+def _check(upload, offset, length):
+    if offset != upload.received:
+        raise OffsetMismatch(upload.received)
+    if offset + length > upload.size:
+        raise UploadError('Chunk goes past the declared upload size.')
+
+
+def append(upload, offset, stream, length):
+    """
+    stream에서 length 바이트를 읽어서 offset 위치에 이어 씀.
+    중간에 연결이 끊기면 받은 만큼만 기록하고 IncompleteChunk. 클라이언트는 그 위치부터 다시 보내면 됨.
+    받는 동안 업로드가 취소되었으면 ImageUpload.DoesNotExist
+    """
+    _check(upload, offset, length)
+    # 받기 전에 먼저 확인해서 틀린 조각은 본문을 읽지 않고 거절 (확정은 아래 트랜잭션에서)
+
+    path = partial_path(upload.pk)
+    chunk_path = f'{path}.{uuid.uuid4().hex}.chunk'
+    written = 0
+    try:
+        with open(chunk_path, 'wb') as f:
+            while written < length:
+                try:
+                    data = stream.read(min(READ_SIZE, length - written))
+                except OSError as exc:
+                    logger.warning('Upload %s: chunk read failed: %s', upload.pk, exc)
+                    break
+                if not data:
+                    break
+                f.write(data)
+                written += len(data)
+
+        with transaction.atomic():
+            upload = ImageUpload.objects.select_for_update().get(pk=upload.pk)
+            # 같은 업로드에 조각이 동시에 오면 먼저 붙인 쪽만 받고 나머지는 OffsetMismatch
+            _check(upload, offset, written)
+            with open(path, 'r+b') as dest, open(chunk_path, 'rb') as src:
+                dest.seek(offset)
+                dest.truncate()
+                # 전에 끊긴 조각의 나머지는 버림
+                shutil.copyfileobj(src, dest, READ_SIZE)
+            upload.received = offset + written
+            upload.save(update_fields=['received', 'updated_at'])
+    finally:
+        os.remove(chunk_path)
+
+    head_complete = upload.received >= imaging.SNIFF_BYTES or upload.received == upload.size
+    if offset < imaging.SNIFF_BYTES and head_complete:
+        with open(path, 'rb') as f:
+            head = f.read(imaging.SNIFF_BYTES)
+        if imaging.sniff_format(head) is None:
+            upload.delete()
+            raise UploadError('Upload a JPEG, PNG, GIF or WebP image.')
+    if written < length:
+        raise IncompleteChunk(upload.received)
+    return upload
+
+
+def finalize(upload):
+    """다 받은 파일을 레시피 사진으로 저장하고 처리를 예약. 레시피를 반환"""
+    with transaction.atomic():
+        upload = ImageUpload.objects.select_for_update().select_related('recipe').get(pk=upload.pk)
+        if upload.received != upload.size:
+            raise UploadError(f'Upload is incomplete: {upload.received} of {upload.size} bytes.')
+        recipe = upload.recipe
+        with open(partial_path(upload.pk), 'rb') as f:
+            images.attach(recipe, _ReceivedFile(f, name=upload.filename))
+        upload.delete()
+    return recipe
+
+
+def delete_expired():
+    """RECIPE_IMAGE_UPLOAD_EXPIRY초 동안 조각이 오지 않은 업로드를 지우고 개수를 반환"""
+    cutoff = timezone.now() - timedelta(seconds=settings.RECIPE_IMAGE_UPLOAD_EXPIRY)
+    deleted, _ = ImageUpload.objects.filter(updated_at__lt=cutoff).delete()
+    return deleted
+
+
+def remove_partial_file(upload_id):
+    try:
+        os.remove(partial_path(upload_id))
+    except FileNotFoundError:
+        pass
+        # 저장할 때 사진 자리로 옮겨졌음
@@ -3,8 +3,9 @@ from django.urls import (
     include,
 )
 
+from django.conf import settings
 from rest_framework.routers import DefaultRouter
-from recipe import views
+from recipe import async_views, views
 
 router = DefaultRouter()
 
@@ -15,5 +16,8 @@ router.register('ingredients', views.IngredientViewSet)
 app_name = 'recipe' # URL 패턴을 구별하기 위해 사용 
 
 urlpatterns = [
-    path('', include(router.urls))
-]
\ No newline at end of file
+    path('', include(
+        async_views.async_urls(router.urls) if settings.RECIPE_ASYNC_VIEWS else router.urls
+    ))
+    # RECIPE_ASYNC_VIEWS=1이면 읽기가 많은 목록/상세는 같은 주소의 async 뷰로 (asgi로 띄울 때)
+]
@@ -18,14 +18,123 @@ OpenApiTypes는 OpenAPI: 스펙에서 사용할 수 있는 데이터 타입을 
 문자열, 정수, 부울, 배열 등 다양한 데이터 타입을 제공합니다
 '''
 
+import hashlib
+import os
+from functools import partial
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import FileResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.cache import parse_etags, patch_vary_headers
+
 from rest_framework import (viewsets, mixins, status,) # Django REST Framework에서 viewsets 모듈을 가져옴
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.fields import BooleanField
+from rest_framework.negotiation import BaseContentNegotiation
 from rest_framework.response import Response
 
-from rest_framework.authentication import TokenAuthentication # REST 프레임워크에서 토큰 인증을 사용하기 위해
-from rest_framework.permissions import IsAuthenticated # 인증된 사용자인지 확인하기 위해
-from core.models import (Recipe, Tag, Ingredient) # core 애플리케이션의 Recipe 모델을 가져옴
+from user.authentication import CachedTokenAuthentication # 토큰 인증 (한번 확인한 토큰은 캐시)
+from rest_framework.permissions import AllowAny, IsAuthenticated # 인증된 사용자인지 확인하기 위해
+from core.models import (ImageUpload, Recipe, Tag, Ingredient) # core 애플리케이션의 Recipe 모델을 가져옴
+from recipe import bulk
+from recipe import export
 from recipe import serializers # recipe 애플리케이션의 serializers 모듈을 가져옴
+from recipe import facets
+from recipe import filters
+from recipe import images
+from recipe import imaging
+from recipe import querysets
+from recipe import renditions
+from recipe import search
+from recipe import sync
+from recipe import uploads
+from recipe.cache import CachedReadMixin
+from recipe.pagination import (
+	RecipeCursorPagination,
+	RecipeAttrCursorPagination,
+)
+
+UPLOAD_ID_PARAMETER = OpenApiParameter(
+	'upload_id', OpenApiTypes.UUID, location=OpenApiParameter.PATH)
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+	"""
+	Accept 헤더를 보지 않고 첫번째 렌더러(JSON)를 사용.
+	사진 응답(Accept: image/webp 등)에서 406이 나지 않게 하고, 오류는 JSON으로 보냄
+	"""
+	def select_parser(self, request, parsers):
+		return parsers[0]
+
+	def select_renderer(self, request, renderers, format_suffix=None):
+		return (renderers[0], renderers[0].media_type)
+
+
+class RecipeFilterMixin:
+	"""
+	레시피 목록 필터 (tags, ingredients, match, search).
+	레시피 뷰셋과 테그/재료의 레시피 수 집계(with_counts)에서 같이 사용
+	"""
+	recipe_filter_params = ('tags', 'ingredients', 'search')
+
+	# 필터 구현
+	def _params_to_ints(self, qs):
+		'''
+			쿼리 파라미터로 전달된 문자열을 정수 목록으로 변환합니다
+			qs: 쿼리 문자열입니다. 예: "1,2,3"
+			반환값: 정수로 변환된 ID 목록입니다. 예: [1, 2, 3]
+		'''
+		return [int(str_id) for str_id in qs.split(',')]
+
+	def _filter_relations(self, queryset, relations, match):
+		'''
+			relations: {'tags': [1, 2], 'ingredients': [3]}
+			비트맵 인덱스로 레시피 id를 먼저 구하고, 결과가 적으면 id로만 조회합니다.
+			결과가 많거나 인덱스를 쓰지 않으면 through 테이블 EXISTS 서브쿼리로 필터링
+			(JOIN이 아니라서 레시피 행이 중복되지 않으므로 distinct()가 필요 없음)
+		'''
+		if settings.RECIPE_FACET_INDEX:
+			recipe_ids = facets.resolve(
+				self.request.user.pk, relations, match, settings.RECIPE_FACET_MAX_IDS)
+			if recipe_ids is not None:
+				return queryset.filter(pk__in=recipe_ids)
+		for relation, ids in relations.items():
+			queryset = filters.filter_by_relation(queryset, relation, ids, match)
+		return queryset
+
+	def has_recipe_filters(self):
+		return any(self.request.query_params.get(param) for param in self.recipe_filter_params)
+
+	def filter_recipes(self, queryset):
+		tags = self.request.query_params.get('tags')
+		ingredients = self.request.query_params.get('ingredients')
+		# url: http://localhost:90/api/recipe/recipes/?ingredients=바나나&tags=맛점
+		'''
+		쿼리 파라미터를 사용하여 필터링된 쿼리셋을 반환하는 과정을 설명합니다.
+		이 메서드는 클라이언트가 제공한 쿼리 파라미터(tags 및 ingredients)를
+		사용하여 Recipe 객체를 필터링하고, 최종적으로 현재 인증된 사용자의 필터링된 레시피 목록을 반환합니다
+		'''
+		match = self.request.query_params.get('match', filters.MATCH_ANY)
+		if match not in filters.MATCH_CHOICES:
+			raise ValidationError({'match': [f'Must be one of {", ".join(filters.MATCH_CHOICES)}.']})
+		# match=any: 하나라도 가진 레시피, match=all: 모두 가진 레시피
+		relations = {}
+		if tags:
+			relations['tags'] = self._params_to_ints(tags)
+		if ingredients:
+			relations['ingredients'] = self._params_to_ints(ingredients)
+		if relations:
+			queryset = self._filter_relations(queryset, relations, match)
+		search_query = self.request.query_params.get('search', '').strip()
+		if search_query:
+			queryset = search.search_recipes(queryset, self.request.user, search_query)
+			# 제목/설명 검색. relevance(관련도)가 붙고 페이지네이션이 관련도순으로 정렬함
+		return queryset.filter(user=self.request.user)
+
 
 @extend_schema_view(
 # @extend_schema_view는 Django REST Framework 뷰셋의 각 액션에 대해 OpenAPI 스키마를 확장할 수 있는 데코레이터
@@ -46,12 +155,24 @@ from recipe import serializers # recipe 애플리케이션의 serializers 모듈
 				'ingredients', # 파라미터의 이름
 				OpenApiTypes.STR, #파라미터의 데이터 타입
 				description='Comma separed list of ingredient IDs to filter' #파라미터에 대한 설명입니다. 
-			)
+			),
+			OpenApiParameter(
+				'match',
+				OpenApiTypes.STR,
+				enum=['any', 'all'],
+				description='any: recipes with any of the given tags/ingredients (default), '
+					'all: recipes with all of them',
+			),
+			OpenApiParameter(
+				'search',
+				OpenApiTypes.STR,
+				description='Search words in title and description, ordered by relevance',
+			),
 		]
 	)
 )
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(RecipeFilterMixin, CachedReadMixin, viewsets.ModelViewSet):
 	"""레시피 뷰셋"""
 	'''
 	viewsets.ModelViewSet은 Django REST Framework에서 제공하는 클래스입니다. 
@@ -60,43 +181,33 @@ class RecipeViewSet(viewsets.ModelViewSet):
 	'''
 	serializer_class = serializers.RecipeDetailSerializer
 	queryset = Recipe.objects.all() # Recipe 모델의 모든 객체를 쿼리셋으로 반환합니다
-	authentication_classes = [TokenAuthentication]
+	authentication_classes = [CachedTokenAuthentication]
 	permission_classes = [IsAuthenticated]
-
-	# 필터 구현
-	def _params_to_ints(self, qs):
-		'''
-			쿼리 파라미터로 전달된 문자열을 정수 목록으로 변환합니다
-			qs: 쿼리 문자열입니다. 예: "1,2,3"
-			반환값: 정수로 변환된 ID 목록입니다. 예: [1, 2, 3]
-		'''
-		return [int(str_id) for str_id in qs.split(',')]
+	pagination_class = RecipeCursorPagination
+	# 목록은 ?cursor= 로 다음 페이지를 가져옴 (-id 기준 keyset)
 
 	def get_queryset(self):
 		# get_queryset 메서드는 Django REST Framework에서 GET 요청으로 목록을 조회할 때 사용되는 메서드입니다
-		tags = self.request.query_params.get('tags')
-		ingredients = self.request.query_params.get('ingredients')
-		# url: http://localhost:90/api/recipe/recipes/?ingredients=바나나&tags=맛점
-		'''
-		쿼리 파라미터를 사용하여 필터링된 쿼리셋을 반환하는 과정을 설명합니다.
-		이 메서드는 클라이언트가 제공한 쿼리 파라미터(tags 및 ingredients)를
-		사용하여 Recipe 객체를 필터링하고, 최종적으로 현재 인증된 사용자의 필터링된 레시피 목록을 반환합니다
-		'''
-		queryset = self.queryset
-		if tags:
-			tag_ids = self._params_to_ints(tags)
-			queryset = queryset.filter(tags__id__in=tag_ids)
-			'''
-			tag_ids = [1, 2, 3]인 경우, recipe의 tags 필드에서 
-			id가 1, 2, 3 중 하나인 태그를 가진 레시피를 필터링합니다
-			'''
-		if ingredients:
-			ingredient_ids = self._params_to_ints(ingredients)
-			queryset = queryset.filter(ingredients__id__in=ingredient_ids)
-		return queryset.filter(user=self.request.user).order_by('-id').distinct()
-		# .distinct() : 중복방지	 
+		queryset = self.filter_recipes(self.queryset).order_by('-id')
+
+		# 액션별 시리얼라이저를 보고 tags/ingredients를 prefetch (N+1 방지)
+		# 조회(list, retrieve, export)일 때만 쓰지 않는 컬럼을 제외함. 저장할 때는 모든 컬럼이 필요
+		return querysets.optimize_queryset(
+			queryset,
+			self.get_serializer_class(),
+			defer_unused=self.action in ('list', 'retrieve', 'export'),
+		)
 
 	
+	def list(self, request, *args, **kwargs):
+		# 데이터가 바뀌지 않았으면 캐시된 응답을 그대로 (ETag가 같으면 304)
+		return self.cached_response(
+			request, partial(super().list, request, *args, **kwargs))
+
+	def retrieve(self, request, *args, **kwargs):
+		return self.cached_response(
+			request, partial(super().retrieve, request, *args, **kwargs))
+
 	def get_serializer_class(self):
 		'''
 		아래 코드를 통해 list 액션에 대한 직렬화 클래스를 
@@ -106,8 +217,10 @@ class RecipeViewSet(viewsets.ModelViewSet):
 		'''
 		if self.action == 'list':
 			return serializers.RecipeSerializer
-		elif self.action == 'upload_image':
+		elif self.action in ('upload_image', 'finalize_upload'):
 			return serializers.RecipeImageSerializer
+		elif self.action in ('start_upload', 'upload_chunk'):
+			return serializers.ImageUploadSerializer
 		
 		return self.serializer_class
 	
@@ -137,13 +250,396 @@ class RecipeViewSet(viewsets.ModelViewSet):
 		# data=request.data: 업로드된 이미지 데이터
 
 		if serializer.is_valid():
-			serializer.save()
-			return Response(serializer.data, status=status.HTTP_200_OK)
+			images.attach(recipe, serializer.validated_data['image'])
+			# 예전 사진은 다른 레시피가 같은 파일을 쓰고 있지 않으면 지워짐
+			return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
 		
 		return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 		# http://localhost:8000/static/media/uploads/recipe/d17dfbf4-43a1-47b1-8ee6-2269d9158744.png
 		# 이주소를 반환해주는데 들어가면 볼수있음
 
+	# 나눠서 올리는 사진 업로드 (recipe/uploads.py)
+	@extend_schema(request=serializers.ImageUploadSerializer, responses={201: serializers.ImageUploadSerializer})
+	@action(methods=['POST'], detail=True, url_path='uploads', url_name='uploads')
+	# url이 /api/recipe/recipes/{id}/uploads/ 가 됨
+	def start_upload(self, request, pk=None):
+		"""전체 크기와 파일 이름을 받아서 업로드를 시작. 크기가 너무 크면 여기서 거절"""
+		recipe = self.get_object()
+		serializer = self.get_serializer(data=request.data)
+		serializer.is_valid(raise_exception=True)
+		upload = uploads.create(recipe, **serializer.validated_data)
+		return self._upload_response(upload, status.HTTP_201_CREATED)
+
+	@extend_schema(
+		methods=['PUT'],
+		parameters=[
+			UPLOAD_ID_PARAMETER,
+			OpenApiParameter(
+				'Upload-Offset',
+				OpenApiTypes.INT,
+				location=OpenApiParameter.HEADER,
+				required=True,
+				description='Bytes already sent; must equal the offset the server reports',
+			),
+		],
+		request={'application/octet-stream': OpenApiTypes.BINARY},
+		responses={200: serializers.ImageUploadSerializer},
+	)
+	@extend_schema(
+		methods=['GET'], parameters=[UPLOAD_ID_PARAMETER],
+		responses={200: serializers.ImageUploadSerializer},
+	)
+	@extend_schema(methods=['DELETE'], parameters=[UPLOAD_ID_PARAMETER])
+	@action(
+		methods=['GET', 'PUT', 'DELETE'], detail=True,
+		url_path=r'uploads/(?P<upload_id>[0-9a-f-]{36})', url_name='upload',
+	)
+	def upload_chunk(self, request, pk=None, upload_id=None):
+		"""
+		GET: 지금까지 받은 크기(offset) 확인. 연결이 끊겼다가 이어서 보낼 때 사용
+		PUT: 본문을 Upload-Offset 위치에 이어 씀 (본문을 메모리에 모으지 않음)
+		DELETE: 업로드 취소
+		"""
+		upload = self._get_upload(upload_id)
+		if request.method == 'GET':
+			return self._upload_response(upload)
+		if request.method == 'DELETE':
+			upload.delete()
+			return Response(status=status.HTTP_204_NO_CONTENT)
+
+		try:
+			offset = int(request.META['HTTP_UPLOAD_OFFSET'])
+		except (KeyError, ValueError):
+			raise ValidationError({'Upload-Offset': ['A valid integer header is required.']})
+		try:
+			length = int(request.META.get('CONTENT_LENGTH') or 0)
+		except ValueError:
+			length = 0
+		if length <= 0:
+			raise ValidationError(
+				{'Content-Length': ['A non-empty chunk with a Content-Length header is required.']})
+		if length > settings.RECIPE_IMAGE_UPLOAD_CHUNK_SIZE:
+			return Response(
+				{'detail': f'Chunk is larger than {settings.RECIPE_IMAGE_UPLOAD_CHUNK_SIZE} bytes.'},
+				status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+			)
+		try:
+			upload = uploads.append(upload, offset, request.stream, length)
+		except uploads.OffsetMismatch as exc:
+			return Response(
+				{'detail': str(exc), 'offset': exc.offset},
+				status=status.HTTP_409_CONFLICT,
+				headers={'Upload-Offset': str(exc.offset)},
+			)
+		except uploads.IncompleteChunk as exc:
+			# 받은 만큼은 기록됨. 클라이언트는 offset부터 다시 보냄
+			return Response(
+				{'detail': str(exc), 'offset': exc.offset},
+				status=status.HTTP_400_BAD_REQUEST,
+				headers={'Upload-Offset': str(exc.offset)},
+			)
+		except ImageUpload.DoesNotExist:
+			raise NotFound()
+			# 받는 동안 취소(DELETE)되거나 만료되어 지워짐
+		except uploads.UploadError as exc:
+			raise ValidationError({'detail': [str(exc)]})
+		return self._upload_response(upload)
+
+	@extend_schema(
+		parameters=[UPLOAD_ID_PARAMETER],
+		request=None, responses={202: serializers.RecipeImageSerializer},
+	)
+	@action(
+		methods=['POST'], detail=True,
+		url_path=r'uploads/(?P<upload_id>[0-9a-f-]{36})/finalize', url_name='upload-finalize',
+	)
+	def finalize_upload(self, request, pk=None, upload_id=None):
+		"""다 받은 파일을 레시피 사진으로 저장. upload-image와 같은 202 응답"""
+		upload = self._get_upload(upload_id)
+		try:
+			recipe = uploads.finalize(upload)
+		except uploads.UploadError as exc:
+			raise ValidationError({'detail': [str(exc)]})
+		serializer = self.get_serializer(recipe)
+		return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+	def _get_upload(self, upload_id):
+		recipe = self.get_object()
+		upload = ImageUpload.objects.filter(pk=upload_id, recipe=recipe).first()
+		if upload is None:
+			raise NotFound()
+		return upload
+
+	def _upload_response(self, upload, status_code=status.HTTP_200_OK):
+		serializer = serializers.ImageUploadSerializer(upload)
+		return Response(
+			serializer.data, status=status_code,
+			headers={'Upload-Offset': str(upload.received)},
+		)
+
+	# 여러 레시피 한번에 생성/수정/삭제 (가져오기 작업용)
+	@extend_schema(
+		methods=['POST'],
+		request=serializers.RecipeBulkSerializer(many=True),
+		responses={201: OpenApiTypes.OBJECT, 207: OpenApiTypes.OBJECT},
+		description='Create recipes in one transaction. Returns one result per item: '
+			'{"index", "id"} or {"index", "errors"}. Valid items are saved even if others fail (207).',
+	)
+	@extend_schema(
+		methods=['PATCH'],
+		request=serializers.RecipeBulkSerializer(many=True),
+		responses={200: OpenApiTypes.OBJECT, 207: OpenApiTypes.OBJECT},
+		description='Partially update recipes; every item needs an "id".',
+	)
+	@extend_schema(
+		methods=['DELETE'],
+		request=OpenApiTypes.OBJECT,
+		responses={200: OpenApiTypes.OBJECT},
+		description='Delete recipes: {"ids": [1, 2, ...]}.',
+	)
+	@action(methods=['POST', 'PATCH', 'DELETE'], detail=False, url_path='bulk')
+	# url이 /api/recipe/recipes/bulk/ 가 됨
+	def bulk(self, request):
+		"""
+		레시피를 하나씩 POST하면 요청/트랜잭션/테그 조회가 레시피 수만큼 생기므로
+		목록을 한번에 받아서 같이 검사하고 한 트랜잭션으로 저장 (recipe/bulk.py)
+		"""
+		if request.method == 'DELETE':
+			ids = request.data.get('ids') if isinstance(request.data, dict) else None
+			if not isinstance(ids, list) or not all(isinstance(pk, int) for pk in ids):
+				raise ValidationError({'ids': ['A list of recipe ids is required.']})
+			self._check_bulk_size(ids)
+			deleted = bulk.delete_recipes(request.user, ids)
+			return Response({
+				'deleted': deleted,
+				'not_found': sorted(set(ids) - set(deleted)),
+			})
+
+		items = request.data
+		if not isinstance(items, list):
+			raise ValidationError({'non_field_errors': ['Expected a list of recipes.']})
+		self._check_bulk_size(items)
+
+		instances = None
+		if request.method == 'PATCH':
+			ids = [item.get('id') for item in items if isinstance(item, dict)]
+			instances = Recipe.objects.filter(user=request.user, pk__in=[
+				pk for pk in ids if isinstance(pk, int)]).in_bulk()
+
+		results, valid = [], []
+		for index, item in enumerate(items):
+			instance = None
+			if instances is not None:
+				instance = instances.get(item.get('id') if isinstance(item, dict) else None)
+				if instance is None:
+					results.append({'index': index, 'errors': {'id': ['Recipe not found.']}})
+					continue
+			serializer = serializers.RecipeBulkSerializer(
+				instance, data=item, partial=instance is not None,
+				context=self.get_serializer_context(),
+			)
+			if serializer.is_valid():
+				valid.append((index, instance, serializer.validated_data))
+			else:
+				results.append({'index': index, 'errors': serializer.errors})
+
+		try:
+			if instances is None:
+				saved = bulk.create_recipes(request.user, [data for _, _, data in valid])
+			else:
+				saved = bulk.update_recipes(
+					request.user, [(instance, data) for _, instance, data in valid])
+		except bulk.BulkConflict as exc:
+			return Response({'detail': str(exc)}, status=status.HTTP_409_CONFLICT)
+		results.extend(
+			{'index': index, 'id': recipe.pk}
+			for (index, _, _), recipe in zip(valid, saved))
+		results.sort(key=lambda result: result['index'])
+
+		if not valid:
+			status_code = status.HTTP_400_BAD_REQUEST
+		elif len(valid) < len(items):
+			status_code = status.HTTP_207_MULTI_STATUS
+		elif instances is None:
+			status_code = status.HTTP_201_CREATED
+		else:
+			status_code = status.HTTP_200_OK
+		return Response({'results': results}, status=status_code)
+
+	def _check_bulk_size(self, items):
+		if not items or len(items) > settings.RECIPE_BULK_MAX_ITEMS:
+			raise ValidationError({'non_field_errors': [
+				f'Send between 1 and {settings.RECIPE_BULK_MAX_ITEMS} items.']})
+
+	# 내보내기 뷰
+	@extend_schema(
+		parameters=[
+			OpenApiParameter(
+				'format',
+				OpenApiTypes.STR,
+				enum=['ndjson', 'csv'],
+				description='ndjson (default): one recipe JSON per line / csv',
+			),
+			OpenApiParameter('tags', OpenApiTypes.STR),
+			OpenApiParameter('ingredients', OpenApiTypes.STR),
+			OpenApiParameter('match', OpenApiTypes.STR, enum=['any', 'all']),
+			OpenApiParameter('search', OpenApiTypes.STR),
+		],
+		responses={
+			(200, 'application/x-ndjson'): OpenApiTypes.BINARY,
+			(200, 'text/csv'): OpenApiTypes.BINARY,
+		},
+	)
+	@action(
+		methods=['GET'], detail=False, url_path='export',
+		content_negotiation_class=IgnoreClientContentNegotiation,
+	)
+	# url이 /api/recipe/recipes/export/?format=csv 가 됨
+	def export(self, request):
+		"""
+		레시피 전체를 스트리밍으로 내려줌 (recipe/export.py).
+		목록 필터(tags, ingredients, search)를 그대로 쓸 수 있음
+		"""
+		fmt = request.query_params.get('format', 'ndjson')
+		if fmt not in export.FORMATS:
+			raise ValidationError({'format': [f'Must be one of {", ".join(export.FORMATS)}.']})
+		content_type, ext, lines = export.FORMATS[fmt]
+
+		body = lines(self.get_queryset(), self.get_serializer_class(), self.get_serializer_context())
+		if settings.SERVER_MODE == 'asgi':
+			# ASGI에서는 응답을 이벤트 루프에서 읽으므로 ORM을 쓰는 제너레이터를 넘길 수 없음.
+			# 이 (뷰) 스레드에서 임시 파일로 다 만들어서 보냄
+			response = FileResponse(export.spool(body), content_type=f'{content_type}; charset=utf-8')
+		else:
+			response = StreamingHttpResponse(body, content_type=f'{content_type}; charset=utf-8')
+		response['Content-Disposition'] = f'attachment; filename="recipes.{ext}"'
+		response['Cache-Control'] = 'private, no-store'
+		return response
+
+	# 사진 축소본 뷰
+	@extend_schema(
+		parameters=[
+			OpenApiParameter(
+				'w',
+				OpenApiTypes.INT,
+				description='Width in pixels, rounded up to one of the supported widths',
+			),
+			OpenApiParameter(
+				'format',
+				OpenApiTypes.STR,
+				enum=['auto', 'webp', 'jpeg'],
+				description='auto (default) picks WebP when the Accept header allows it',
+			),
+			OpenApiParameter(
+				's',
+				OpenApiTypes.STR,
+				description='Signature from the thumbnail URL; lets <img> tags load without a token',
+			),
+		],
+		responses={(200, 'image/*'): OpenApiTypes.BINARY},
+	)
+	@action(
+		methods=['GET'], detail=True, url_path='image',
+		permission_classes=[AllowAny],
+		content_negotiation_class=IgnoreClientContentNegotiation,
+	)
+	# url이 /api/recipe/recipes/{id}/image/?w=320 이 됨
+	def image(self, request, pk=None):
+		"""사진을 원하는 너비/형식으로 줄여서 반환. 만든 축소본은 디스크에 캐시"""
+		recipe = Recipe.objects.only(
+			'id', 'user_id', 'image', 'image_status', 'image_renditions').filter(pk=pk).first()
+		if recipe is None or not recipe.image:
+			raise NotFound()
+		signed = renditions.check_signature(
+			recipe.pk, recipe.image.name, request.query_params.get('s'))
+		if not signed and recipe.user_id != request.user.pk:
+			raise NotFound()
+			# 서명이 없으면 주인만
+		if recipe.image_status == Recipe.IMAGE_PENDING:
+			return Response(
+				{'detail': 'Image is still being processed.'}, status=status.HTTP_409_CONFLICT)
+		if recipe.image_status != Recipe.IMAGE_READY:
+			raise NotFound()
+			# 검사(recipe/images.py)를 통과한 사진만 열어서 줄임
+
+		try:
+			width = int(request.query_params.get('w', settings.RECIPE_THUMBNAIL_WIDTH))
+		except ValueError:
+			raise ValidationError({'w': ['A valid integer is required.']})
+		width = renditions.snap_width(width)
+		requested = request.query_params.get('format')
+		fmt = renditions.negotiate_format(requested, request.META.get('HTTP_ACCEPT', ''))
+		if fmt is None:
+			raise ValidationError({'format': ['Must be one of auto, webp, jpeg.']})
+
+		name = recipe.image_renditions.get(fmt, {}).get(str(width))
+		try:
+			if name:
+				# 업로드할 때 미리 만들어둔 축소본 (recipe/images.py)
+				f, key = default_storage.open(name, 'rb'), hashlib.sha1(name.encode()).hexdigest()
+			else:
+				f, key = renditions.open_rendition(
+					default_storage.path(recipe.image.name), width, fmt)
+		except (FileNotFoundError, imaging.InvalidImage):
+			raise NotFound()
+
+		etag = f'"{key[:32]}"'
+		if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+			f.close()
+			response = HttpResponseNotModified()
+		else:
+			response = FileResponse(
+				f, content_type=f'image/{fmt}', filename=os.path.basename(f.name))
+		response['ETag'] = etag
+		# 서명된 주소는 사진이 바뀌면 주소도 바뀌므로 오래 캐시해도 됨
+		response['Cache-Control'] = (
+			'public, max-age=31536000, immutable' if signed else 'private, max-age=3600')
+		if requested in (None, 'auto'):
+			patch_vary_headers(response, ['Accept'])
+		return response
+
+	@extend_schema(
+		parameters=[
+			OpenApiParameter(
+				'since',
+				OpenApiTypes.STR,
+				description='Change token returned as "next" by the previous call (0 for everything). '
+					'Recent changes can be sent again by the next call; apply them by recipe id. '
+					'410 means the token expired: drop local recipes and sync again from 0.',
+			),
+			OpenApiParameter('page_size', OpenApiTypes.INT),
+		]
+	)
+	@action(methods=['GET'], detail=False, url_path='changes')
+	# url이 /api/recipe/recipes/changes/?since=<토큰> 이 됨
+	def changes(self, request):
+		"""
+		since 토큰 이후에 생성/수정된 레시피와 삭제된 레시피 id만 반환합니다.
+		응답의 next를 다음 요청의 since로 보내면 되고, has_more가 true면 바로 이어서 요청.
+		최근 변경은 다음 동기화에서 한번 더 올 수 있으므로 클라이언트는 레시피 id로 덮어씀
+		"""
+		since = request.query_params.get('since', '0')
+		try:
+			sync.parse_token(since)
+		except ValueError:
+			raise ValidationError({'since': ['A valid sync token is required.']})
+
+		limit = self.paginator.get_page_size(request)
+		try:
+			updated, deleted, next_token, has_more = sync.changes_since(
+				request.user, since, limit)
+		except sync.TokenExpired as exc:
+			return Response({'detail': str(exc)}, status=status.HTTP_410_GONE)
+
+		recipes = self.get_queryset().filter(pk__in=updated)
+		serializer = self.get_serializer(recipes, many=True)
+		return Response({
+			'updated': serializer.data,
+			'deleted': deleted,
+			'next': next_token,
+			'has_more': has_more,
+		})
+
 @extend_schema_view(
 # Django REST Framework에서 생성된 OpenAPI 스키마를 확장하거나 수정하기 위한 데코레이터
 	list=extend_schema(
@@ -154,50 +650,112 @@ class RecipeViewSet(viewsets.ModelViewSet):
 				OpenApiTypes.INT, enum=[0,1],
 				#  레시피에 할당된 태그나 재료만 반환하도록 필터링 로직을 구현
 				description='Filter by items assigned to recipes.',
-			)
+			),
+			OpenApiParameter(
+				'with_counts',
+				OpenApiTypes.INT, enum=[0,1],
+				description='Include recipe_count (number of recipes using each item). '
+					'tags, ingredients, match and search restrict which recipes are counted.',
+			),
+			OpenApiParameter('tags', OpenApiTypes.STR),
+			OpenApiParameter('ingredients', OpenApiTypes.STR),
+			OpenApiParameter('match', OpenApiTypes.STR, enum=['any', 'all']),
+			OpenApiParameter('search', OpenApiTypes.STR),
 		]
 	)
 )
-class BaseRecipeAttrViewSet(mixins.UpdateModelMixin, # PATCH 요청을 통해 모델 인스턴스를 업데이트할 수 있습니다
+class BaseRecipeAttrViewSet(RecipeFilterMixin,
+				 mixins.UpdateModelMixin, # PATCH 요청을 통해 모델 인스턴스를 업데이트할 수 있습니다
 				 mixins.DestroyModelMixin, # DELETE 요청을 통해 모델 인스턴스를 삭제할 수 있습니다
 				 mixins.ListModelMixin, # GET 요청을 통해 모델 인스턴스의 목록을 조회할 수 있습니다
 				 viewsets.GenericViewSet): # 양한 CRUD 작업을 지원합니다
-	authentication_classes = [TokenAuthentication]
+	authentication_classes = [CachedTokenAuthentication]
 	# 클라이언트는 요청 헤더에 유효한 토큰을 포함하여 인증을 수행해야 합니다
 	permission_classes = [IsAuthenticated]
 	# 인증된 사용자만 이 뷰셋에 접근할 수 있도록 제한합니다
+	pagination_class = RecipeAttrCursorPagination
 	
 	def get_queryset(self):
 		'''
 		queryset을 가져올 때 특정 조건에 따라 필터링된 결과를 반환하는 역할을 합니다.
 		주로 사용자가 요청한 매개변수에 따라 queryset을 동적으로 변경할 때 사용됩니다
 		'''
-		assigned_only = bool(
-			int(self.request.query_params.get('assigned_only', 0))
-		)
+		assigned_only = self._query_flag('assigned_only')
 		'''
 		이 부분은 URL 쿼리 매개변수에서 assigned_only라는 매개변수의 값을 가져옵니다.
 		URL에 assigned_only 매개변수가 포함되지 않은 경우 기본값으로 0을 반환합니다.
 		예를 들어, http://localhost:8000/api/recipe/ingredients/?assigned_only=1라고 하면 assigned_only의 값은 1이 됩니다.
 		http://localhost:8000/api/recipe/ingredients/처럼 assigned_only 매개변수가 없으면 기본값 0이 사용됩니다.
 		'''
+		with_counts = self._query_flag('with_counts')
+		# with_counts=1이면 테그/재료마다 그걸 쓰는 레시피 수(recipe_count)를 같이 반환
+
 		queryset = self.queryset
-		if assigned_only:
-			queryset = queryset.filter(recipe__isnull=False)
-			# 레시피가 할당되어 있는 재료 또는 테그들만을 필터링하여 가져오도록 하는 것
+		if assigned_only or with_counts:
+			# 이 테그/재료와 레시피의 연결 (through 테이블). 레시피 필터(tags, ingredients, match, search)가
+			# 있으면 필터된 레시피와의 연결만
+			links, target = self._recipe_links()
+			if assigned_only:
+				queryset = queryset.filter(Exists(links))
+				# 레시피가 할당되어 있는 재료 또는 테그들만을 필터링하여 가져오도록 하는 것
+				# JOIN이 아니라 EXISTS라서 중복이 생기지 않음 (distinct() 필요 없음)
+			if with_counts:
+				counts = links.order_by().values(target).annotate(
+					count=Count('*')).values('count')
+				queryset = queryset.annotate(recipe_count=Coalesce(Subquery(counts), 0))
+				# 상관 서브쿼리라서 현재 페이지의 테그/재료에 대해서만 셈
+
+		return queryset.filter(user=self.request.user).order_by('-name')
+
+	def _query_flag(self, name):
+		'''?name=1, 0, true, false 등을 bool로. 잘못된 값(?with_counts=yes 등)이면 400'''
+		value = self.request.query_params.get(name)
+		if value is None:
+			return False
+		try:
+			return BooleanField().to_internal_value(value)
+		except ValidationError as exc:
+			raise ValidationError({name: exc.detail})
+
+	def _recipe_links(self):
+		'''(바깥 쿼리의 테그/재료와 연결된 through 행들, through의 테그/재료 id 컬럼)'''
+		field = Recipe._meta.get_field(self.recipe_relation)
+		Through = field.remote_field.through
+		target = f'{field.m2m_reverse_field_name()}_id'
+		links = Through.objects.filter(**{target: OuterRef('pk')})
+		if self.has_recipe_filters():
+			links = links.filter(recipe_id__in=self.filter_recipes(Recipe.objects.all()).values('pk'))
+		return links, target
 
-		return queryset.filter(user=self.request.user).order_by('-name').distinct()
+	def get_serializer_class(self):
+		if self.action == 'list' and self._query_flag('with_counts'):
+			return self.count_serializer_class
+		return self.serializer_class
+
+	def perform_update(self, serializer):
+		# 이미 있는 이름으로 바꾸면 (user, name) 유니크 제약에 걸림 -> 400으로 응답
+		try:
+			with transaction.atomic():
+				serializer.save()
+		except IntegrityError:
+			raise ValidationError(
+				{'name': ['You already have an item with this name.']}
+			)
 	
 
 class TagViewSet(BaseRecipeAttrViewSet):
 	""" DB의 테그를 관리 """
 	serializer_class = serializers.TagSerializer
+	count_serializer_class = serializers.TagCountSerializer
 	queryset = Tag.objects.all()
+	recipe_relation = 'tags'
 
 
 class IngredientViewSet(BaseRecipeAttrViewSet):
 	serializer_class = serializers.IngredientSerializer
+	count_serializer_class = serializers.IngredientCountSerializer
 	queryset = Ingredient.objects.all()
+	recipe_relation = 'ingredients'
 		  
 
 
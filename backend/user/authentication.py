@@ -0,0 +1,146 @@
+"""
+토큰 인증 결과를 캐시하는 인증 클래스.
+DRF TokenAuthentication은 요청마다 Token + User를 조회하는데,
+한번 확인한 토큰은 프로세스 메모리(LRU) -> 공용 캐시 순으로 찾아서 DB 조회를 생략합니다.
+캐시에는 유저의 필드 값(password 제외)과 토큰 생성시각만 넣습니다.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+class LRUCache:
+    """프로세스 안에서 쓰는 LRU 캐시. 항목은 ttl초가 지나면 만료됨 (thread-safe)"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+token_cache = LRUCache(
+    maxsize=settings.AUTH_TOKEN_CACHE_SIZE,
+    ttl=settings.AUTH_TOKEN_CACHE_TTL,
+)
+# 다른 프로세스에서 토큰이 삭제되면 이 캐시는 TTL이 지날 때까지 모름. 그래서 TTL을 짧게 둠
+
+
+def token_digest(key):
+    """캐시 키에 토큰 원문이 남지 않도록 해시를 사용"""
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _shared_cache():
+    alias = settings.AUTH_TOKEN_SHARED_CACHE
+    return caches[alias] if alias else None
+
+
+def _shared_key(digest):
+    return f'auth:token:{digest}'
+
+
+def invalidate_token(key):
+    """토큰이 삭제되거나 유저가 바뀌었을 때 캐시에서 지움"""
+    digest = token_digest(key)
+    token_cache.delete(digest)
+    shared = _shared_cache()
+    if shared is not None:
+        shared.delete(_shared_key(digest))
+
+
+def _user_fields():
+    """캐시에 넣는 유저 필드. password(해시)는 공용 캐시에 남지 않도록 뺌"""
+    return [
+        field.attname for field in get_user_model()._meta.concrete_fields
+        if field.attname != 'password'
+    ]
+
+
+def _dump(user, token):
+    return {
+        'user': [getattr(user, name) for name in _user_fields()],
+        'created': token.created,
+    }
+
+
+def _load(key, cached):
+    """
+    캐시 값으로 요청마다 새 객체를 만들어서 다른 요청과 같은 객체를 공유하지 않게 함.
+    password는 .defer('password')로 읽은 것처럼 지연 필드가 되므로, 필요하면 그때 DB에서 읽고
+    save()는 읽은 필드만 저장함
+    """
+    user = get_user_model().from_db(DEFAULT_DB_ALIAS, _user_fields(), cached['user'])
+    token = Token(key=key, user=user, created=cached['created'])
+    token._state.adding = False
+    token._state.db = DEFAULT_DB_ALIAS
+    return user, token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication과 똑같이 쓰면 됨 (헤더: Authorization: Token <key>)"""
+
+    def authenticate_credentials(self, key):
+        digest = token_digest(key)
+        shared = _shared_cache()
+
+        cached = token_cache.get(digest)
+        if cached is None and shared is not None:
+            cached = shared.get(_shared_key(digest))
+            if cached is not None:
+                token_cache.set(digest, cached)
+
+        if cached is None:
+            # 캐시에 없으면 원래대로 DB에서 확인 (없는 토큰, 비활성 유저는 여기서 401)
+            user, token = super().authenticate_credentials(key)
+            cached = _dump(user, token)
+            token_cache.set(digest, cached)
+            if shared is not None:
+                shared.set(
+                    _shared_key(digest),
+                    cached,
+                    settings.AUTH_TOKEN_SHARED_CACHE_TTL,
+                )
+            return (user, token)
+
+        user, token = _load(key, cached)
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        return (user, token)
@@ -0,0 +1,27 @@
+"""
+토큰 인증 캐시를 비우는 시그널
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from user.authentication import invalidate_token
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """토큰이 삭제되면 바로 인증 안되게"""
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """
+    유저 정보가 바뀌면(UserSerializer.update, 비활성화 등) 캐시된 유저도 바뀌어야 하므로 지움.
+    queryset.update()는 시그널이 없으니 주의
+    """
+    if created:
+        return
+    for key in Token.objects.filter(user=instance).values_list('key', flat=True):
+        invalidate_token(key)
@@ -0,0 +1,103 @@
+"""
+캐시 토큰 인증 테스트
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import _shared_key, token_cache, token_digest
+
+ME_URL = reverse('user:me')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test name',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_second_request_skips_auth_query(self):
+        """두번째 요청부터는 토큰 조회 쿼리가 없음"""
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_invalid_token_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token wrong')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_rejected(self):
+        """토큰을 지우면 캐시에 있어도 인증 실패"""
+        self.client.get(ME_URL)
+        self.token.delete()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_profile_update_refreshes_cached_user(self):
+        """UserSerializer.update로 바뀐 정보가 다음 요청에 바로 보임"""
+        self.client.get(ME_URL)
+        self.client.patch(ME_URL, {'name': 'New name'})
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'New name')
+
+    def test_shared_cache_has_no_password(self):
+        """공용 캐시에는 비밀번호 해시를 넣지 않음"""
+        with self.settings(AUTH_TOKEN_SHARED_CACHE='default'):
+            self.client.get(ME_URL)
+            cached = caches['default'].get(_shared_key(token_digest(self.token.key)))
+
+        self.assertIsNotNone(cached)
+        self.assertNotIn(self.user.password, repr(cached))
+
+    def test_cached_user_update_keeps_password(self):
+        """캐시에서 만든 유저를 저장해도 비밀번호가 지워지지 않음"""
+        self.client.get(ME_URL)
+        self.client.patch(ME_URL, {'name': 'New name'})
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, 'New name')
+        self.assertTrue(self.user.check_password('testpass123'))
+
+    def test_cached_user_password_change(self):
+        self.client.get(ME_URL)
+
+        res = self.client.patch(ME_URL, {'password': 'newpass123'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('newpass123'))
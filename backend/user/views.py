@@ -2,12 +2,14 @@
 유저 api의 뷰
 """
 
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions
 # Django REST Framework에서 제공하는 기능들을 사용하기위함
 
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 
+from user.authentication import CachedTokenAuthentication
+
 from user.serializers import (
 	UserSerializer,
 	AuthTokenSerializer,
@@ -35,8 +37,8 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
 	RetrieveUpdateAPIView를 상속받아 사용자의 세부 정보를 가져오고 업데이트하는 기능을 제공함
 	"""
 	serializer_class = UserSerializer
-	authentication_classes = [authentication.TokenAuthentication]
-	# TokenAuthentication은 토큰 기반 인증 방식을 사용합니다. 클라이언트는 요청 헤더에 Token을 포함하여 인증을 수행해야 합니다
+	authentication_classes = [CachedTokenAuthentication]
+	# TokenAuthentication(CachedTokenAuthentication은 결과를 캐시)은 토큰 기반 인증 방식을 사용합니다. 클라이언트는 요청 헤더에 Token을 포함하여 인증을 수행해야 합니다
 	# 사용자가 누구인지를 확인
 	permission_classes = [permissions.IsAuthenticated]
 	# IsAuthenticated는 사용자가 인증된 경우에만 이 뷰에 접근할 수 있도록 제한합니다. 인증되지 않은 사용자는 이 뷰에 접근할 수 없습니다